@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""html_to_ghost.py 성능 측정 스크립트"""
+
+import io
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+
+from PIL import Image
+
+import html_to_ghost as h2g
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+def time_call(func, repeat):
+    """함수를 repeat번 실행하여 1회당 평균 시간(ms)을 반환"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def bench_parse(html_files, repeat, parsers):
+    """포스트당 파싱 비용 비교 (기존 이중 파싱 vs 단일 파싱 파이프라인)"""
+    print("\n[파싱] 포스트당 평균 시간 (ms)")
+    print(f"{'parser':<12} {'before':>10} {'after':>10} {'speedup':>8}")
+
+    documents = []
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            documents.append(f.read())
+
+    for parser in parsers:
+        def before():
+            # 기존 방식: 본문용 트리 + 태그 추출용 트리를 각각 파싱
+            for html_content in documents:
+                soup = h2g.BeautifulSoup(html_content, parser)
+                h2g.extract_title(soup, '')
+                h2g.extract_date(soup, '')
+                h2g.extract_tags(h2g.BeautifulSoup(html_content, parser))
+
+        def after():
+            # 단일 파싱: 모든 추출 단계가 같은 트리를 공유
+            for html_content in documents:
+                soup = h2g.parse_html(html_content, parser)
+                h2g.extract_title(soup, '')
+                h2g.extract_date(soup, '')
+                h2g.extract_tags(soup)
+
+        before_ms = time_call(before, repeat) / len(documents)
+        after_ms = time_call(after, repeat) / len(documents)
+        print(f"{parser:<12} {before_ms:>10.2f} {after_ms:>10.2f} {before_ms / after_ms:>7.2f}x")
+
+def legacy_match_post(soup, title, date_text):
+    """비교용: 문자열 정규식, lambda 스타일 비교, 태그 직렬화를 사용하던 기존 매칭 경로"""
+    re.search(r'(\d{4})\.(\d{2})\.(\d{2})\. (\d{2}):(\d{2})', date_text)
+    slug = re.sub(r'[^\w\s가-힣]', '', title)
+    re.sub(r'\s+', '-', slug.strip())
+    soup.find('div', style=lambda s: s and 'border-bottom: solid' in s)
+    content_divs = soup.find_all('div', class_='se2_in_page') or soup.find_all('div')[:1]
+    for img in soup.find_all('img'):
+        re.search(r'data-image-id="(\d+)_(\d+)"', str(img))
+    any('<img' in str(div) for div in content_divs)
+    content_html = ''.join(str(div) for div in content_divs)
+    re.sub(r'\s{2,}', ' ', re.sub(r'\n', '', content_html))
+    re.sub(r'\s{2,}', ' ', title)
+
+def current_match_post(soup, title, date_text):
+    """현재 매칭 경로 (미리 컴파일한 정규식, 속성 직접 조회, 직렬화와 정제를 한 번에 처리)"""
+    h2g.DATE_RE.search(date_text)
+    slug = h2g.SLUG_INVALID_RE.sub('', title)
+    h2g.WHITESPACE_RE.sub('-', slug.strip())
+    soup.find('div', style=h2g.DATE_DIV_STYLE_RE)
+    content_divs = soup.find_all('div', class_='se2_in_page') or soup.find_all('div')[:1]
+    for img in soup.find_all('img'):
+        h2g.IMAGE_ID_RE.fullmatch(img.get('data-image-id') or '')
+    content_html = h2g.render_content_html(content_divs)
+    '<img' in content_html
+    h2g.clean_text(title)
+
+def legacy_extract_post(soup):
+    """비교용: 레이아웃 판별 없이 제목/날짜/태그/본문 후보마다 soup.find/find_all로 트리를 다시 훑던 기존 추출 경로"""
+    soup.find('h3') or soup.find('h5', class_='se_textarea') or soup.find('div', class_='se_card_titleView')
+    soup.find('div', style=h2g.DATE_DIV_STYLE_RE) or soup.find('span', class_='se_publishDate')
+    soup.find('div', class_='backup_post_tags') or soup.find('div', class_='backup_post_series_title')
+    for class_name in ('se2_in_page', 'se_textView', 'se_component_wrap', 'se_card'):
+        content_divs = soup.find_all('div', class_=class_name)
+        if content_divs:
+            return content_divs
+    return soup.find_all('p', class_='se_textarea')
+
+def bench_matching(html_files, repeat):
+    """포스트당 정규식/선택자 매칭 비용 비교 (파싱 제외)"""
+    print("\n[정규식/선택자 매칭] 포스트당 평균 시간 (ms)")
+    print(f"{'step':<24} {'before':>10} {'after':>10} {'speedup':>8}")
+
+    posts = []
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            soup = h2g.parse_html(f.read())
+        posts.append((soup, h2g.extract_title(soup, 'title'), h2g.extract_date(soup, '20160202')))
+
+    img_tags = [img for soup, _, _ in posts for img in soup.find_all('img')]
+    content_lists = [soup.find_all('div', class_='se2_in_page') or soup.find_all('div')[:1] for soup, _, _ in posts]
+    steps = [
+        ('data-image-id',
+         lambda: [re.search(r'data-image-id="(\d+)_(\d+)"', str(img)) for img in img_tags],
+         lambda: [h2g.IMAGE_ID_RE.fullmatch(img.get('data-image-id') or '') for img in img_tags]),
+        ('date style',
+         lambda: [soup.find('div', style=lambda s: s and 'border-bottom: solid' in s) for soup, _, _ in posts],
+         lambda: [soup.find('div', style=h2g.DATE_DIV_STYLE_RE) for soup, _, _ in posts]),
+        ('layout extract',
+         lambda: [legacy_extract_post(soup) for soup, _, _ in posts],
+         lambda: [h2g.extract_document(soup, 'title', '20160202') for soup, _, _ in posts]),
+        ('serialize + clean',
+         lambda: [h2g.clean_html(''.join(str(div) for div in divs)) for divs in content_lists],
+         lambda: [h2g.render_content_html(divs) for divs in content_lists]),
+        ('post total',
+         lambda: [legacy_match_post(*post) for post in posts],
+         lambda: [current_match_post(*post) for post in posts]),
+    ]
+    for name, before, after in steps:
+        before_ms = time_call(before, repeat) / len(posts)
+        after_ms = time_call(after, repeat) / len(posts)
+        print(f"{name:<24} {before_ms:>10.3f} {after_ms:>10.3f} {before_ms / after_ms:>7.2f}x")
+
+def legacy_compress_image(image_path, output_path, max_size_mb=1):
+    """비교용: 디스크에 저장하고 크기를 확인하는 기존 compress_image 구현"""
+    if os.path.getsize(image_path) / (1024 * 1024) <= max_size_mb:
+        shutil.copy2(image_path, output_path)
+        return True
+
+    img = Image.open(image_path)
+    quality = 90
+    while quality > 30:
+        img.save(output_path, quality=quality, optimize=True)
+        if os.path.getsize(output_path) / (1024 * 1024) <= max_size_mb:
+            return True
+        quality -= 10
+
+    width, height = img.size
+    ratio = 0.9
+    while ratio > 0.5:
+        resized_img = img.resize((int(width * ratio), int(height * ratio)), Image.LANCZOS)
+        resized_img.save(output_path, quality=quality, optimize=True)
+        if os.path.getsize(output_path) / (1024 * 1024) <= max_size_mb:
+            return True
+        ratio -= 0.1
+
+    shutil.copy2(image_path, output_path)
+    return True
+
+def bench_compress(image_files, repeat, max_size_mb):
+    """이미지 압축 비용 비교 (기존 저장-측정 반복 vs 메모리 인코딩 + 이진 탐색)"""
+    print(f"\n[이미지 압축] 최대 크기 {max_size_mb}MB, 이미지당 평균 시간 (ms) / 출력 크기 (KB)")
+    print(f"{'image':<28} {'size':>8} {'before':>9} {'after':>9} {'out_kb':>14}")
+
+    output_dir = tempfile.mkdtemp(prefix='h2g-bench-')
+    total_before = total_after = 0
+    try:
+        for image_file in image_files:
+            before_path = os.path.join(output_dir, 'before.jpg')
+            after_path = os.path.join(output_dir, 'after.jpg')
+            try:
+                before_ms = time_call(lambda: legacy_compress_image(image_file, before_path, max_size_mb), repeat)
+            except Exception as e:
+                # 기존 구현은 RGBA/팔레트 이미지를 JPEG로 저장하지 못하는 경우가 있음
+                print(f"{os.path.basename(image_file):<28} 기존 구현 실패: {e}")
+                continue
+            after_ms = time_call(lambda: h2g.compress_image(image_file, after_path, max_size_mb), repeat)
+            total_before += before_ms
+            total_after += after_ms
+            sizes = f"{os.path.getsize(before_path) / 1024:.0f}->{os.path.getsize(after_path) / 1024:.0f}"
+            print(f"{os.path.basename(image_file):<28} {os.path.getsize(image_file) / 1024:>7.0f}K "
+                  f"{before_ms:>9.2f} {after_ms:>9.2f} {sizes:>14}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    if total_after:
+        print(f"{'합계':<28} {'':>8} {total_before:>9.2f} {total_after:>9.2f} ({total_before / total_after:.2f}x)")
+
+def find_image_files(html_files):
+    """HTML 파일이 있는 디렉토리 아래의 이미지 파일 목록"""
+    image_files = []
+    for root in sorted({os.path.dirname(html_file) or '.' for html_file in html_files}):
+        for dir_path, _, files in os.walk(root):
+            for file in sorted(files):
+                if file.lower().endswith(IMAGE_EXTENSIONS):
+                    image_files.append(os.path.join(dir_path, file))
+    return image_files
+
+# 합성 코퍼스의 본문 레이아웃과 태그 형식
+LAYOUTS = ('se2_in_page', 'se_textView', 'se_component_wrap', 'se_card')
+TAG_VARIANTS = ('backup_post_tags', 'series_title', 'hashtags', 'none')
+
+# 합성 이미지 크기 (가로, 세로) - large는 노이즈 이미지라 1MB를 넘어 압축 대상이 됨
+IMAGE_SIZES = {
+    'small': (200, 150),
+    'medium': (800, 600),
+    'large': (1600, 1200),
+}
+
+WORDS = ['동네서점', '그림책', '페미니즘', '책추천', '오늘', '이야기', 'book', 'review', '곰', '오리']
+
+def make_image_pool(rng):
+    """합성 이미지 원본 (크기별 JPEG/PNG 바이트)"""
+    pool = {}
+    for name, (width, height) in IMAGE_SIZES.items():
+        if name == 'large':
+            img = Image.frombytes('RGB', (width, height), rng.getrandbits(width * height * 24).to_bytes(width * height * 3, 'little'))
+        else:
+            img = Image.new('RGB', (width, height), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        for image_format, ext in (('JPEG', 'JPEG'), ('PNG', 'PNG')):
+            buffer = io.BytesIO()
+            img.save(buffer, format=image_format, quality=95)
+            pool[(name, ext)] = buffer.getvalue()
+    return pool
+
+def random_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def synthetic_post_html(rng, layout, tag_variant, title, date_text, image_srcs):
+    """네이버 포스트 백업 형식의 합성 HTML 문서"""
+    paragraphs = [f"<p>{random_text(rng, rng.randint(10, 40))}</p>" for _ in range(rng.randint(3, 12))]
+    if tag_variant == 'hashtags':
+        paragraphs.append(f"<p>#{rng.choice(WORDS)} #{rng.choice(WORDS)}</p>")
+    images = [f'<img src="{src}" data-image-id="{i + 1}_1" alt="image{i}">' for i, src in enumerate(image_srcs)]
+
+    if layout == 'se2_in_page':
+        header = (f'<h3>{title}</h3>'
+                  f'<div style="border-bottom: solid 1px #ddd;">{date_text}</div>')
+        body = ''.join(
+            f'<div class="se2_in_page sect_dsc"><div>{p}{images[i] if i < len(images) else ""}</div></div>'
+            for i, p in enumerate(paragraphs)
+        )
+    elif layout == 'se_textView':
+        header = (f'<h5 class="se_textarea">{title}</h5>'
+                  f'<span class="se_publishDate">{date_text}</span>')
+        body = '<div class="se_textView">' + ''.join(
+            f'<p class="se_textarea">{p}</p>' for p in paragraphs
+        ) + ''.join(images) + '</div>'
+    elif layout == 'se_component_wrap':
+        header = (f'<div class="se_card_titleView"><h5>{title}</h5></div>'
+                  f'<span class="se_publishDate">{date_text}</span>')
+        body = ''.join(
+            f'<div class="se_component_wrap"><div class="se_sectionArea">{p}{images[i] if i < len(images) else ""}</div></div>'
+            for i, p in enumerate(paragraphs)
+        )
+    else:
+        header = (f'<div class="se_card_titleView"><h5>{title}</h5></div>'
+                  f'<span class="se_publishDate">{date_text}</span>')
+        body = ''.join(
+            f'<div class="se_card"><div class="se_card_container">{p}{images[i] if i < len(images) else ""}</div></div>'
+            for i, p in enumerate(paragraphs)
+        )
+
+    if tag_variant == 'backup_post_tags':
+        tags = ''.join(f'<span class="backup_post_tag">#{rng.choice(WORDS)}</span>' for _ in range(rng.randint(1, 6)))
+        footer = f'<div class="backup_post_tags">{tags}</div>'
+    elif tag_variant == 'series_title':
+        footer = f'<div class="backup_post_series_title">{rng.choice(WORDS)}</div>'
+    else:
+        footer = ''
+
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8" /><title>{title}</title></head>'
+            f'<body><div class="backup_post">{header}{body}{footer}</div></body></html>')
+
+def generate_corpus(root, posts, images_per_post=3, large_image_ratio=0.1, seed=1):
+    """합성 네이버 포스트 백업 생성 (POST_ARTICLE_001/<날짜>_<ID>_<제목>.html + image/<날짜>_<ID>/)
+
+    레이아웃, 태그 형식, 이미지 크기/형식을 포스트마다 돌아가며 섞어 생성합니다.
+    """
+    rng = random.Random(seed)
+    pool = make_image_pool(rng)
+    article_dir = os.path.join(root, 'POST_ARTICLE_001')
+    os.makedirs(article_dir, exist_ok=True)
+
+    html_files = []
+    for n in range(posts):
+        date_str = f"{2016 + n % 3}{(n % 12) + 1:02d}{(n % 28) + 1:02d}"
+        post_id = str(3500000 + n)
+        post_dir = f"{date_str}_{post_id}"
+        image_dir = os.path.join(article_dir, 'image', post_dir)
+        os.makedirs(image_dir, exist_ok=True)
+
+        image_srcs = []
+        for i in range(rng.randint(0, images_per_post * 2)):
+            size = 'large' if rng.random() < large_image_ratio else rng.choice(('small', 'medium'))
+            ext = rng.choice(('JPEG', 'PNG'))
+            filename = f"{post_dir}_{i + 1}.{ext}"
+            with open(os.path.join(image_dir, filename), 'wb') as f:
+                # 뒤에 붙인 바이트는 디코딩에 영향이 없지만 이미지마다 내용 해시를 다르게 만듦
+                f.write(pool[(size, ext)] + f"{post_dir}_{i}".encode())
+            image_srcs.append(f"image/{post_dir}/{filename}")
+
+        title = random_text(rng, rng.randint(2, 6))
+        date_text = f"{date_str[:4]}.{date_str[4:6]}.{date_str[6:8]}. {n % 24:02d}:{n % 60:02d}"
+        html = synthetic_post_html(rng, LAYOUTS[n % len(LAYOUTS)], TAG_VARIANTS[(n // len(LAYOUTS)) % len(TAG_VARIANTS)],
+                                   title, date_text, image_srcs)
+        html_file = os.path.join(article_dir, f"{post_dir}_{title.replace(' ', '')}.html")
+        with open(html_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+        html_files.append(html_file)
+
+    return html_files
+
+def peak_memory_mb():
+    """프로세스 최대 상주 메모리 (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def report_stage(name, seconds, items, unit):
+    rate = items / seconds if seconds else float('inf')
+    print(f"{name:<22} {seconds * 1000:>10.1f} ms {items:>7} {unit:<6} {rate:>10.1f} {unit}/s  peak {peak_memory_mb():>7.1f} MB")
+
+def bench_stages(html_files, max_size_mb=1):
+    """단계별 처리량 측정: 디렉토리 탐색, 파싱, 이미지 탐색, 이미지 압축, 전체 변환, JSON 생성, JSON 정제"""
+    print(f"\n[단계별 처리량] 포스트 {len(html_files)}개")
+    work_dir = tempfile.mkdtemp(prefix='h2g-bench-out-')
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    try:
+        # 0. 입력 디렉토리 탐색 (기존 os.walk 방식과 한 번 탐색하는 PostIndex 비교)
+        input_dirs = sorted({html_file.split(os.sep)[0] for html_file in html_files})
+        start = time.perf_counter()
+        walked = [os.path.join(root, name) for input_dir in input_dirs
+                  for root, _, names in os.walk(input_dir) for name in names if name.endswith('.html')]
+        report_stage('discovery (os.walk)', time.perf_counter() - start, len(walked), 'files')
+        start = time.perf_counter()
+        post_index = h2g.PostIndex()
+        for input_dir in input_dirs:
+            post_index.scan(input_dir)
+        found = sum(len(files) for files in post_index.files_by_year.values())
+        report_stage('discovery (PostIndex)', time.perf_counter() - start, found, 'files')
+
+        # 1. 파싱 및 추출 (레이아웃 판별 후 제목/날짜/태그/본문 div)
+        start = time.perf_counter()
+        documents = []
+        layouts = {}
+        with quiet:
+            for html_file in html_files:
+                html_content, encoding, _ = h2g.read_html_source(html_file)
+                soup = h2g.parse_html(html_content, encoding=encoding)
+                layout, _, _, _, content_divs = h2g.extract_document(soup, '', '')
+                layouts[layout] = layouts.get(layout, 0) + 1
+                documents.append((html_file, soup, content_divs))
+        report_stage('parse+extract', time.perf_counter() - start, len(html_files), 'posts')
+        print(f"{'':<22} 레이아웃: {', '.join(f'{name} {count}' for name, count in sorted(layouts.items()))}")
+
+        # 2. 이미지 파일 탐색
+        locator = h2g.ImageLocator()
+        start = time.perf_counter()
+        image_paths = []
+        for html_file, soup, content_divs in documents:
+            date_str, post_id = os.path.basename(html_file).split('_')[:2]
+            for img in soup.find_all('img'):
+                src = img.get('src', '')
+                candidates = h2g.build_image_candidates(html_file, date_str, post_id, src, os.path.basename(src))
+                path = locator.find(candidates)
+                if path:
+                    image_paths.append(path)
+        report_stage('image resolution', time.perf_counter() - start, len(image_paths), 'images')
+        documents.clear()
+
+        # 3. 이미지 압축 (최대 크기 초과 이미지만 실제 압축, 나머지는 복사)
+        bytes_in = bytes_out = 0
+        start = time.perf_counter()
+        for i, path in enumerate(image_paths):
+            output_path = os.path.join(work_dir, f"compress_{i}.jpg")
+            with quiet:
+                h2g.compress_image(path, output_path, max_size_mb)
+            bytes_in += os.path.getsize(path)
+            bytes_out += os.path.getsize(output_path)
+            os.remove(output_path)
+        report_stage('compress_image', time.perf_counter() - start, len(image_paths), 'images')
+        print(f"{'':<22} 입력 {bytes_in / 1024 / 1024:.1f} MB -> 출력 {bytes_out / 1024 / 1024:.1f} MB")
+
+        # 4. 전체 변환 (process_html_file)
+        start = time.perf_counter()
+        with quiet:
+            posts = [post for post in (h2g.process_html_file(f, work_dir, use_image_cache=False) for f in html_files) if post]
+        report_stage('process_html_file', time.perf_counter() - start, len(posts), 'posts')
+
+        # 5. Ghost JSON 생성
+        json_file = os.path.join(work_dir, 'ghost-export.json')
+        start = time.perf_counter()
+        with quiet:
+            h2g.create_ghost_json(posts, json_file)
+        report_stage('create_ghost_json', time.perf_counter() - start, len(posts), 'posts')
+        posts.clear()
+
+        # 6. JSON 정제 (기존 --clean-only의 전체 읽기/정제와 스트리밍 정제 비교)
+        start = time.perf_counter()
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        h2g.clean_json_data(data)
+        post_count = len(data['db'][0]['data']['posts'])
+        del data
+        report_stage('clean_json_data', time.perf_counter() - start, post_count, 'posts')
+        start = time.perf_counter()
+        h2g.clean_json_file(json_file)
+        report_stage('clean_json_file', time.perf_counter() - start, post_count, 'posts')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def legacy_largest_div(soup):
+    """비교용: div마다 get_text()/find_all('img')로 하위 트리를 다시 순회하는 기존 방법 6"""
+    main_content_div = None
+    max_content_length = 0
+    for div in soup.find_all('div'):
+        content_length = len(div.get_text()) + len(div.find_all('img')) * 100
+        if content_length > max_content_length:
+            max_content_length = content_length
+            main_content_div = div
+    return main_content_div
+
+def nested_post_html(rng, depth, sections):
+    """본문 클래스가 없어 방법 6으로만 본문을 찾을 수 있는 깊게 중첩된 합성 문서"""
+    parts = []
+    for section in range(sections):
+        inner = f"<p>{random_text(rng, rng.randint(5, 30))}</p>"
+        if rng.random() < 0.3:
+            inner += f'<img src="image/{section}.jpg">'
+        if rng.random() < 0.2:
+            inner += f"<!-- {random_text(rng, 20)} --><script>var x = '{random_text(rng, 20)}';</script>"
+        for level in range(rng.randint(depth // 2, depth)):
+            inner = f'<div class="level{level}">{inner}<span>{rng.choice(WORDS)}</span></div>'
+        parts.append(inner)
+    return (f'<!DOCTYPE html><html><head><title>nested</title></head>'
+            f'<body><div class="wrapper">{"".join(parts)}</div><div class="footer">{random_text(rng, 50)}</div></body></html>')
+
+def bench_fallback(depths, repeat, sections=20, seed=1):
+    """방법 6(가장 큰 div 추정) 기존 구현과 한 번 순회 구현 비교 (같은 div 선택 여부 확인)"""
+    print(f"\n[본문 추정 (방법 6)] 문서당 평균 시간 (ms), 섹션 {sections}개")
+    print(f"{'depth':>6} {'divs':>7} {'before':>10} {'after':>10} {'speedup':>8}  same")
+    rng = random.Random(seed)
+    for depth in depths:
+        soup = h2g.parse_html(nested_post_html(rng, depth, sections))
+        legacy = legacy_largest_div(soup)
+        current = h2g.find_largest_content_div(soup)[0]
+        before_ms = time_call(lambda: legacy_largest_div(soup), repeat)
+        after_ms = time_call(lambda: h2g.find_largest_content_div(soup), repeat)
+        print(f"{depth:>6} {len(soup.find_all('div')):>7} {before_ms:>10.2f} {after_ms:>10.2f} "
+              f"{before_ms / after_ms:>7.2f}x  {'yes' if legacy is current else 'NO'}")
+
+def photo_jpeg(rng, megapixels):
+    """사진처럼 부드러운 색 변화와 약한 노이즈를 가진 4:3 합성 JPEG 바이트"""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    cells = (max(2, width // 32), max(2, height // 32))
+    base = Image.frombytes('RGB', cells, rng.getrandbits(cells[0] * cells[1] * 24).to_bytes(cells[0] * cells[1] * 3, 'little'))
+    img = Image.blend(base.resize((width, height), Image.BICUBIC), Image.effect_noise((width, height), 32).convert('RGB'), 0.3)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+def peak_memory_delta_mb(func):
+    """func를 새 프로세스(fork)에서 한 번 실행하여 늘어난 최대 상주 메모리 (MB)
+
+    Pillow의 픽셀 버퍼는 tracemalloc으로 추적되지 않으므로 프로세스의 최대 상주 메모리 증가량으로 측정합니다.
+    """
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+
+    def run():
+        before = peak_memory_mb()
+        func()
+        sender.send(peak_memory_mb() - before)
+
+    process = context.Process(target=run)
+    process.start()
+    delta = receiver.recv()
+    process.join()
+    return delta
+
+def bench_photos(megapixels, repeat, max_size_mb=1, seed=1):
+    """큰 사진의 압축 비교 (기존 compress_image vs 헤더로 축소 비율을 정하고 축소 디코딩 후 한 번 리샘플링)"""
+    print(f"\n[큰 사진 압축] 최대 크기 {max_size_mb}MB, 이미지당 평균 시간 (ms) / 최대 메모리 증가량 (MB) / 출력")
+    print(f"{'MP':>5} {'size':>8} {'before':>9} {'after':>9} {'speedup':>8} {'mem_before':>11} {'mem_after':>10} "
+          f"{'before_out':>16} {'after_out':>16}")
+    rng = random.Random(seed)
+    work_dir = tempfile.mkdtemp(prefix='h2g-photo-')
+    try:
+        for mp in megapixels:
+            image_file = os.path.join(work_dir, f'photo_{mp}.jpg')
+            with open(image_file, 'wb') as f:
+                f.write(photo_jpeg(rng, mp))
+            results = {}
+            for name, compress in (('before', legacy_compress_image), ('after', h2g.compress_image)):
+                output_path = os.path.join(work_dir, f'{name}.jpg')
+                memory = peak_memory_delta_mb(lambda: compress(image_file, output_path, max_size_mb))
+                ms = time_call(lambda: compress(image_file, output_path, max_size_mb), repeat)
+                with Image.open(output_path) as img:
+                    output = f"{img.width}x{img.height} {os.path.getsize(output_path) // 1024}K"
+                results[name] = (ms, memory, output)
+            (before_ms, before_mb, before_out), (after_ms, after_mb, after_out) = results['before'], results['after']
+            print(f"{mp:>5} {os.path.getsize(image_file) / 1024:>7.0f}K {before_ms:>9.1f} {after_ms:>9.1f} "
+                  f"{before_ms / after_ms:>7.2f}x {before_mb:>11.1f} {after_mb:>10.1f} {before_out:>16} {after_out:>16}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def available_parsers():
+    """설치된 파서 백엔드 목록"""
+    parsers = ['html.parser']
+    if h2g.resolve_html_parser('auto') == 'lxml':
+        parsers.append('lxml')
+    return parsers
+
+def main():
+    parser = argparse.ArgumentParser(description='html_to_ghost.py 성능 측정')
+    parser.add_argument('html_files', nargs='*', help='측정에 사용할 HTML 파일 (기본값: POST_ARTICLE_*/*.html)')
+    parser.add_argument('--repeat', '-r', type=int, help='반복 횟수 (기본값: 5)', default=5)
+    parser.add_argument('--max-size-mb', type=float, help='이미지 압축 측정 시 최대 크기 (기본값: 0.1, 샘플 이미지도 압축되도록 작게 설정)', default=0.1)
+    parser.add_argument('--synthetic', type=int, help='합성 포스트 N개를 생성하여 단계별 처리량 측정', default=0)
+    parser.add_argument('--images-per-post', type=int, help='합성 포스트당 평균 이미지 수 (기본값: 3)', default=3)
+    parser.add_argument('--large-image-ratio', type=float, help='합성 이미지 중 1MB를 넘는 큰 이미지 비율 (기본값: 0.1)', default=0.1)
+    parser.add_argument('--seed', type=int, help='합성 코퍼스 난수 시드 (기본값: 1)', default=1)
+    parser.add_argument('--corpus-dir', help='합성 코퍼스를 저장할 디렉토리 (지정하면 측정 후에도 남김)', default=None)
+    parser.add_argument('--nested', type=int, nargs='+', metavar='DEPTH', help='지정한 중첩 깊이의 합성 문서로 본문 추정(방법 6) 측정', default=None)
+    parser.add_argument('--photos', type=float, nargs='+', metavar='MP', help='지정한 화소 수(메가픽셀)의 합성 사진으로 큰 JPEG 압축 측정', default=None)
+    args = parser.parse_args()
+
+    if args.nested:
+        bench_fallback(args.nested, args.repeat, seed=args.seed)
+        return
+
+    if args.photos:
+        bench_photos(args.photos, args.repeat, seed=args.seed)
+        return
+
+    if args.synthetic:
+        corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='h2g-corpus-')
+        start = time.perf_counter()
+        html_files = generate_corpus(corpus_dir, args.synthetic, args.images_per_post, args.large_image_ratio, args.seed)
+        print(f"합성 코퍼스 생성: {corpus_dir} (포스트 {len(html_files)}개, {time.perf_counter() - start:.1f}초)")
+        # process_html_file은 작업 디렉토리 기준 상대 경로도 탐색하므로 코퍼스 디렉토리에서 측정
+        cwd = os.getcwd()
+        os.chdir(corpus_dir)
+        try:
+            bench_stages([os.path.relpath(f, corpus_dir) for f in html_files])
+        finally:
+            os.chdir(cwd)
+            if not args.corpus_dir:
+                shutil.rmtree(corpus_dir, ignore_errors=True)
+        return
+
+    html_files = args.html_files or sorted(glob.glob(os.path.join('POST_ARTICLE_*', '*.html')))
+    if not html_files:
+        print("오류: 측정할 HTML 파일이 없습니다.")
+        sys.exit(1)
+
+    print(f"HTML 파일 수: {len(html_files)}, 반복 횟수: {args.repeat}")
+
+    bench_parse(html_files, args.repeat, available_parsers())
+    bench_matching(html_files, args.repeat)
+
+    image_files = find_image_files(html_files)
+    if image_files:
+        bench_compress(image_files, args.repeat, args.max_size_mb)
+
+if __name__ == '__main__':
+    main()
@@ -1,258 +1,2679 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
+import abc
+import math
+import codecs
+import posixpath
 import re
+import sys
 import json
+import mmap
 import uuid
 import time
 import shutil
+import tarfile
+import zipfile
+import sqlite3
+import hashlib
 import argparse
+import logging
+import threading
 from datetime import datetime
+from functools import partial
+from itertools import chain
+from collections import Counter, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
+from bs4.element import CData, Comment, NavigableString, Tag
+from bs4.formatter import HTMLFormatter
 from PIL import Image
 
+logger = logging.getLogger('html_to_ghost')
+
+def configure_logging(level=logging.INFO):
+    """콘솔 로그 설정 (메시지만 표준 출력으로 출력)
+
+    프로세스 풀의 initializer로도 사용되어 워커 프로세스의 로그 레벨을 맞춥니다.
+    """
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.propagate = False
+
+class Metrics:
+    """단계별 소요 시간(벽시계/CPU)과 카운터 수집
+
+    워커 프로세스에서 수집한 값은 to_dict()로 넘겨받아 merge()로 합칩니다.
+    """
+    
+    def __init__(self):
+        self.stages = {}
+        self.counters = Counter()
+    
+    @contextmanager
+    def stage(self, name):
+        """with 블록의 실행 시간을 name 단계에 누적"""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+            entry['calls'] += 1
+            entry['wall'] += time.perf_counter() - wall
+            entry['cpu'] += time.process_time() - cpu
+    
+    def count(self, name, n=1):
+        self.counters[name] += n
+    
+    def add_time(self, name, wall, cpu=0.0, calls=1):
+        """다른 곳(워커 프로세스 등)에서 측정한 시간을 name 단계에 누적"""
+        entry = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+        entry['calls'] += calls
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+    
+    def merge(self, data):
+        """다른 Metrics의 to_dict() 결과 합치기"""
+        for name, values in data.get('stages', {}).items():
+            entry = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+            for key in entry:
+                entry[key] += values.get(key, 0)
+        self.counters.update(data.get('counters', {}))
+    
+    def to_dict(self):
+        return {
+            'stages': {name: dict(values) for name, values in self.stages.items()},
+            'counters': dict(sorted(self.counters.items()))
+        }
+    
+    def report(self):
+        """단계별 요약 로그 출력"""
+        if self.stages:
+            logger.info("단계별 소요 시간:")
+            for name, values in sorted(self.stages.items(), key=lambda item: -item[1]['wall']):
+                logger.info("  %-14s %8.2fs (CPU %.2fs, %d회)", name, values['wall'], values['cpu'], values['calls'])
+        if self.counters:
+            logger.info("카운터:")
+            for name, value in sorted(self.counters.items()):
+                logger.info("  %-32s %d", name, value)
+
+# 현재 프로세스의 지표 수집기
+_metrics = Metrics()
+
+def get_metrics():
+    return _metrics
+
+def swap_metrics(metrics):
+    """현재 프로세스의 지표 수집기를 교체하고 이전 수집기 반환"""
+    global _metrics
+    previous, _metrics = _metrics, metrics
+    return previous
+
+# 변환 과정에서 반복 사용하는 정규식과 선택자 (모듈 로드 시 한 번만 컴파일)
+# 네이버 포스트 날짜 (예: "2016.02.02. 16:24")
+DATE_RE = re.compile(r'(\d{4})\.(\d{2})\.(\d{2})\. (\d{2}):(\d{2})')
+# 슬러그에서 제거할 문자 (한글, 영문, 숫자, 공백 이외)
+SLUG_INVALID_RE = re.compile(r'[^\w\s가-힣]')
+WHITESPACE_RE = re.compile(r'\s+')
+# 정제 시 하나로 줄일 연속 공백
+MULTI_SPACE_RE = re.compile(r'\s{2,}')
+# 정제 시 공백을 그대로 두는 블록(pre 등), 주석, 태그 (태그 밖의 텍스트만 공백 정리)
+HTML_CLEAN_TOKEN_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>', re.S | re.I)
+# 태그 안에서 따옴표로 감싼 속성 값을 제외한 공백
+TAG_SPACE_RE = re.compile(r'("[^"]*"|\'[^\']*\')|\s+')
+# 네이버 편집기 전용 래퍼 div 클래스와 요소 id (본문 출력 시 제거)
+NAVER_WRAPPER_CLASS_RE = re.compile(r'se[_-]|se2_|__mug_|__clip_|sect_')
+NAVER_ELEMENT_ID_RE = re.compile(r'mug_obj_|__clip_|SE-')
+# 본문 해시태그
+HASHTAG_RE = re.compile(r'#([^\s#]+)')
+# HTML 파일명 (<날짜>_<포스트 ID>_<제목>.html)
+POST_FILENAME_RE = re.compile(r'(\d+)_(\d+)_(.+)\.html')
+POST_FILENAME_KEY_RE = re.compile(r'((\d{4})\d{4})_(\d+)_.+\.html')
+# 포스트별 이미지 디렉토리 (image/<날짜>_<포스트 ID>)
+POST_IMAGE_DIR_RE = re.compile(r'(\d{8})_(\d+)')
+POST_ARTICLE_DIR_RE = re.compile(r'POST_ARTICLE_(\d+)')
+# img 태그의 data-image-id 속성 값 (<섹션 ID>_<이미지 ID>)
+IMAGE_ID_RE = re.compile(r'(\d+)_(\d+)')
+# 날짜 div의 style 속성 (BeautifulSoup은 정규식 속성 값에 search를 사용)
+DATE_DIV_STYLE_RE = re.compile('border-bottom: solid')
+
 def parse_date(date_str):
     """네이버 포스트 날짜 문자열을 파싱하여 ISO 형식으로 변환"""
     # 예: "2016.02.02. 16:24"
-    match = re.search(r'(\d{4})\.(\d{2})\.(\d{2})\. (\d{2}):(\d{2})', date_str)
+    match = DATE_RE.search(date_str)
     if match:
         year, month, day, hour, minute = map(int, match.groups())
         dt = datetime(year, month, day, hour, minute)
         return dt.isoformat() + 'Z'
     return datetime.now().isoformat() + 'Z'
 
-def create_slug(text):
-    """텍스트를 URL 슬러그로 변환"""
-    # 원본 텍스트 보존 (디버깅용)
-    original = text
+def create_slug(text):
+    """텍스트를 URL 슬러그로 변환"""
+    # 한글, 영문, 숫자, 공백만 남기고 나머지 제거
+    slug = SLUG_INVALID_RE.sub('', text)
+    
+    # 공백을 하이픈으로 변환
+    slug = WHITESPACE_RE.sub('-', slug.strip())
+    
+    logger.debug("원본: '%s' -> 슬러그: '%s'", text, slug)
+    
+    return slug.lower()
+
+# 입력으로 읽을 수 있는 압축 파일 (경로 안에서 압축 파일 부분을 찾는 패턴)
+ARCHIVE_PATH_RE = re.compile(r'\.(?:zip|tar|tar\.gz|tgz|tar\.bz2|tbz2|tar\.xz|txz)(?=[/\\]|$)', re.IGNORECASE)
+
+# 디렉토리 항목 (os.DirEntry와 같은 속성을 사용하는 압축 파일 항목)
+class ArchiveEntry:
+    __slots__ = ('name', 'path', '_is_dir')
+    
+    def __init__(self, name, path, is_dir):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+    
+    def is_dir(self):
+        return self._is_dir
+    
+    def is_file(self):
+        return not self._is_dir
+    
+    def is_symlink(self):
+        return False
+
+class TarMemberFile(io.RawIOBase):
+    """압축하지 않은 tar 파일 안의 멤버를 읽는 읽기 전용 스트림
+
+    멤버마다 파일을 따로 열어 위치를 공유하지 않으므로 여러 스레드에서 동시에 읽을 수 있습니다.
+    """
+    
+    def __init__(self, path, offset, size):
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def readinto(self, buffer):
+        n = min(len(buffer), self._size - self._pos)
+        if n <= 0:
+            return 0
+        self._file.seek(self._offset + self._pos)
+        n = self._file.readinto(memoryview(buffer)[:n])
+        self._pos += n
+        return n
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def tell(self):
+        return self._pos
+    
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+class InputArchive(abc.ABC):
+    """압축을 풀지 않고 zip/tar 파일을 디렉토리처럼 읽는 입력 백엔드
+
+    멤버 목록은 처음 열 때 한 번만 읽어(zip은 중앙 디렉토리) 경로 -> (크기, 수정 시각 ns) 인덱스와
+    디렉토리별 항목 목록을 만들고, 이후 탐색과 존재 확인은 인덱스에서 처리합니다.
+    압축 파일 안의 경로는 '<압축 파일 경로>/<멤버 경로>' 형식으로 일반 파일 경로처럼 다룹니다.
+    하위 클래스는 형식별로 멤버 열기(open), fork 후 다시 열기(_reopen), 닫기(close)를 구현합니다.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.signature = (st.st_size, st.st_mtime_ns)
+        # 파일 핸들을 연 프로세스 (fork된 워커 프로세스는 파일 위치를 공유하지 않도록 다시 엶)
+        self._pid = os.getpid()
+        # 멤버 경로('/' 구분) -> (크기, 수정 시각 ns, 멤버 정보)
+        self.files = {}
+        # 디렉토리 경로('' = 최상위) -> {항목 이름: 디렉토리 여부} (압축 파일 안의 순서 유지)
+        self.dirs = {'': {}}
+    
+    def _add(self, name, size, mtime, info, is_dir=False):
+        """멤버 하나를 인덱스에 추가 (절대 경로나 '..'가 포함된 멤버는 무시)"""
+        parts = [part for part in name.replace('\\', '/').split('/') if part and part != '.']
+        if not parts or '..' in parts:
+            return
+        for depth in range(len(parts)):
+            parent = '/'.join(parts[:depth])
+            is_leaf = depth == len(parts) - 1
+            children = self.dirs.setdefault(parent, {})
+            if not children.get(parts[depth]):
+                children[parts[depth]] = is_dir or not is_leaf
+            if not is_leaf or is_dir:
+                self.dirs.setdefault('/'.join(parts[:depth + 1]), {})
+        if not is_dir:
+            self.files['/'.join(parts)] = (size, int(mtime * 1_000_000_000), info)
+    
+    @staticmethod
+    def member_name(member):
+        """압축 파일 안의 상대 경로를 인덱스 키로 정규화 (압축 파일 밖을 가리키면 None)"""
+        member = posixpath.normpath(member.replace('\\', '/')) if member else ''
+        if member == '.':
+            return ''
+        if member.startswith('../') or member == '..' or member.startswith('/'):
+            return None
+        return member
+    
+    def listdir(self, member):
+        """디렉토리 항목 (이름, 디렉토리 여부) 목록 (없는 디렉토리는 None)"""
+        member = self.member_name(member)
+        children = self.dirs.get(member) if member is not None else None
+        return None if children is None else list(children.items())
+    
+    def isdir(self, member):
+        member = self.member_name(member)
+        return member is not None and member in self.dirs
+    
+    def stat(self, member):
+        """멤버의 (크기, 수정 시각 ns) (없으면 None)"""
+        entry = self.files.get(self.member_name(member))
+        return entry[:2] if entry else None
+    
+    @abc.abstractmethod
+    def open(self, member):
+        """멤버를 읽기 전용 바이너리 스트림으로 열기"""
+    
+    @abc.abstractmethod
+    def _reopen(self):
+        """압축 파일 핸들을 현재 프로세스에서 다시 열기"""
+    
+    def _check_process(self):
+        """fork로 물려받은 핸들이면 현재 프로세스에서 다시 열기"""
+        if self._pid != os.getpid():
+            self._reopen()
+            self._pid = os.getpid()
+    
+    @abc.abstractmethod
+    def close(self):
+        """압축 파일 핸들 닫기"""
+
+class ZipInputArchive(InputArchive):
+    """zip 입력: 중앙 디렉토리로 인덱스를 만들고 멤버를 압축 해제 스트림으로 읽음"""
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(path)
+        self._lock = threading.Lock()
+        for info in self._zip.infolist():
+            name = info.filename
+            if not info.flag_bits & 0x800:
+                # UTF-8 표시가 없는 이름은 cp437로 읽히므로 원래 바이트를 UTF-8/CP949로 다시 해석 (한국어 Windows 압축)
+                raw = name.encode('cp437', errors='replace')
+                for encoding in FALLBACK_HTML_ENCODINGS:
+                    try:
+                        name = raw.decode(encoding)
+                        break
+                    except UnicodeDecodeError:
+                        continue
+            self._add(name, info.file_size, time.mktime(info.date_time + (0, 0, -1)), info, info.is_dir())
+    
+    def open(self, member):
+        # ZipFile은 여러 스레드에서 멤버를 동시에 열어 읽을 수 있음
+        with self._lock:
+            self._check_process()
+        return self._zip.open(self.files[self.member_name(member)][2])
+    
+    def _reopen(self):
+        self._zip = zipfile.ZipFile(self.path)
+    
+    def close(self):
+        self._zip.close()
+
+class TarInputArchive(InputArchive):
+    """tar 입력: 멤버 헤더로 인덱스를 만들고, 압축하지 않은 tar는 멤버 위치에서 바로 읽음
+
+    gzip/bzip2/xz로 압축한 tar는 멤버를 읽을 때마다 앞부분부터 압축을 풀어야 할 수 있어 느리므로
+    가능하면 zip이나 압축하지 않은 tar를 사용합니다.
+    """
+    
+    def __init__(self, path):
+        super().__init__(path)
+        try:
+            self._tar = tarfile.open(path, 'r:')
+            self.compressed = False
+        except tarfile.ReadError:
+            self._tar = tarfile.open(path, 'r:*')
+            self.compressed = True
+            logger.warning("경고: 압축된 tar 파일은 멤버를 읽을 때마다 압축 해제가 필요해 느릴 수 있습니다: %s", path)
+        self._lock = threading.Lock()
+        for member in self._tar.getmembers():
+            if member.isfile() or member.isdir():
+                self._add(member.name, member.size, member.mtime, member, member.isdir())
+    
+    def open(self, member):
+        info = self.files[self.member_name(member)][2]
+        if not self.compressed:
+            return io.BufferedReader(TarMemberFile(self.path, info.offset_data, info.size))
+        # 압축 스트림은 위치를 공유하므로 잠금 안에서 멤버 전체를 읽음
+        with self._lock:
+            self._check_process()
+            return io.BytesIO(self._tar.extractfile(info).read())
+    
+    def _reopen(self):
+        self._tar = tarfile.open(self.path, 'r:*')
+    
+    def close(self):
+        self._tar.close()
+
+# 프로세스별로 연 압축 파일 입력 (압축 파일 경로 -> InputArchive, 압축 파일이 아니면 None)
+_input_archives = {}
+_input_archives_lock = threading.Lock()
+
+def get_input_archive(path):
+    """압축 파일 경로의 InputArchive (압축 파일이 아니거나 열 수 없으면 None)"""
+    try:
+        return _input_archives[path]
+    except KeyError:
+        pass
+    with _input_archives_lock:
+        if path not in _input_archives:
+            archive = None
+            if os.path.isfile(path):
+                try:
+                    archive = (ZipInputArchive if zipfile.is_zipfile(path) else TarInputArchive)(path)
+                except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                    logger.error("오류: 압축 파일을 읽을 수 없습니다: %s (%s)", path, e)
+            _input_archives[path] = archive
+        return _input_archives[path]
+
+def refresh_input_archives():
+    """바뀌거나 삭제된 압축 파일 입력을 닫아 다음 접근 때 다시 읽게 함 (감시 모드의 재탐색용)"""
+    with _input_archives_lock:
+        for path, archive in list(_input_archives.items()):
+            try:
+                st = os.stat(path)
+                changed = archive is None or (st.st_size, st.st_mtime_ns) != archive.signature
+            except OSError:
+                changed = True
+            if changed:
+                if archive is not None:
+                    archive.close()
+                del _input_archives[path]
+
+def is_archive_path(path):
+    """압축 파일(.zip, .tar, .tar.gz 등) 경로인지 확인"""
+    path = path.rstrip('/\\')
+    return any(match.end() == len(path) for match in ARCHIVE_PATH_RE.finditer(path))
+
+def split_archive_path(path):
+    """경로를 (InputArchive, 압축 파일 안의 멤버 경로)로 분리 (압축 파일 안이 아니면 (None, path))"""
+    match = ARCHIVE_PATH_RE.search(path)
+    while match:
+        archive = get_input_archive(path[:match.end()])
+        if archive is not None:
+            return archive, path[match.end():].lstrip('/\\')
+        match = ARCHIVE_PATH_RE.search(path, match.end())
+    return None, path
+
+def open_input(path):
+    """입력 파일을 바이너리 읽기 스트림으로 열기 (압축 파일 안의 파일은 멤버 스트림)"""
+    archive, member = split_archive_path(path)
+    if archive is None:
+        return open(path, 'rb')
+    if archive.stat(member) is None:
+        raise FileNotFoundError(path)
+    return archive.open(member)
+
+def input_stat(path):
+    """입력 파일의 (크기, 수정 시각 ns) (압축 파일 안의 파일은 멤버 정보, 없으면 OSError)"""
+    archive, member = split_archive_path(path)
+    if archive is None:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    stat = archive.stat(member)
+    if stat is None:
+        raise FileNotFoundError(path)
+    return stat
+
+def input_size(path):
+    return input_stat(path)[0]
+
+def input_exists(path):
+    """os.path.exists와 같되 압축 파일 안의 파일과 디렉토리도 확인"""
+    archive, member = split_archive_path(path)
+    if archive is None:
+        return os.path.exists(path)
+    return archive.stat(member) is not None or archive.isdir(member)
+
+def input_isdir(path):
+    """os.path.isdir와 같되 압축 파일 자체와 압축 파일 안의 디렉토리도 디렉토리로 취급"""
+    archive, member = split_archive_path(path)
+    if archive is None:
+        return os.path.isdir(path)
+    return archive.isdir(member)
+
+def scan_input_dir(dir_path):
+    """디렉토리 항목 목록 (os.scandir 결과 또는 압축 파일 안의 ArchiveEntry, 읽을 수 없으면 OSError)"""
+    archive, member = split_archive_path(dir_path)
+    if archive is None:
+        with os.scandir(dir_path) as entries:
+            return list(entries)
+    children = archive.listdir(member)
+    if children is None:
+        raise FileNotFoundError(dir_path)
+    return [ArchiveEntry(name, os.path.join(dir_path, name), is_dir) for name, is_dir in children]
+
+def copy_input(path, output_path):
+    """입력 파일을 output_path로 복사 (일반 파일은 shutil.copy2, 압축 파일 안의 파일은 스트림 복사)"""
+    archive, member = split_archive_path(path)
+    if archive is None:
+        shutil.copy2(path, output_path)
+        return
+    with archive.open(member) as src, open(output_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    mtime_ns = archive.stat(member)[1]
+    os.utime(output_path, ns=(mtime_ns, mtime_ns))
+
+# 이미지 압축 품질 범위 (JPEG quality)
+MIN_JPEG_QUALITY = 30
+MAX_JPEG_QUALITY = 90
+JPEG_QUALITY_STEP = 5
+
+# 품질만으로 부족해 크기를 줄일 때 사용하는 품질과 최소 축소 비율
+# (최소 비율 0.5는 JPEG 1/2 축소 디코딩 크기와 같아 큰 JPEG는 리샘플링 없이 축소 디코딩 결과를 사용)
+RESIZE_JPEG_QUALITY = 75
+MIN_RESIZE_RATIO = 0.5
+
+# 이미지 출력 형식 정책 (--image-format)
+# jpeg: 최대 크기를 넘는 이미지만 JPEG로 압축하고 나머지는 그대로 복사 (기존 동작)
+# webp/avif: 래스터 이미지를 해당 형식으로 다시 인코딩 (GIF는 애니메이션 유지를 위해 jpeg 정책과 동일)
+IMAGE_FORMAT_POLICIES = ('jpeg', 'webp', 'avif')
+
+# 형식별 압축 시작 품질 (최대 크기를 넘으면 MIN_JPEG_QUALITY까지 낮춤)
+IMAGE_FORMAT_QUALITY = {
+    'JPEG': MAX_JPEG_QUALITY,
+    'WEBP': 82,
+    'AVIF': 60,
+}
+
+# 그래픽(팔레트/흑백) PNG로 보는 이미지 모드 (헤더만으로 판단, 무손실로 유지)
+GRAPHIC_IMAGE_MODES = ('1', 'L', 'LA', 'P', 'PA')
+
+def image_format_supported(image_format):
+    """설치된 Pillow가 해당 형식(예: 'AVIF')으로 저장할 수 있는지 확인"""
+    Image.init()
+    return image_format in Image.SAVE
+
+def output_image_format(source_format, source_mode, over_limit, policy='jpeg'):
+    """출력 형식 정책에 따라 (저장 형식, 무손실 여부) 결정
+
+    저장 형식이 None이면 원본을 그대로 복사합니다.
+    - jpeg 정책: 최대 크기를 넘는 이미지만 JPEG
+    - webp 정책: 그래픽 PNG는 무손실 WebP, 나머지는 손실 WebP (이미 WebP이고 최대 크기 이하면 복사)
+    - avif 정책: 그래픽 PNG는 PNG로 유지(avif 무손실 미지원), 나머지는 AVIF
+    """
+    legacy = ('JPEG' if over_limit else None), False
+    if policy == 'jpeg' or source_format not in ('JPEG', 'PNG', 'BMP', 'WEBP'):
+        return legacy
+    
+    target = policy.upper()
+    graphic = source_format == 'PNG' and source_mode in GRAPHIC_IMAGE_MODES
+    if graphic and target == 'AVIF':
+        return legacy
+    if source_format == target and not over_limit:
+        return None, False
+    return target, graphic and target == 'WEBP'
+
+def to_rgb_image(img):
+    """JPEG로 저장할 수 있도록 RGB 이미지로 변환 (투명 영역은 흰색 배경으로 합성)"""
+    if img.mode == 'RGB':
+        return img
+    
+    if img.mode == 'P':
+        # 팔레트 투명도는 RGBA로 변환해야 알파 채널로 반영됨
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    
+    if img.mode in ('RGBA', 'LA', 'PA'):
+        rgba = img.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    
+    return img.convert('RGB')
+
+def to_web_image(img):
+    """WebP/AVIF로 저장할 수 있도록 RGB 또는 RGBA 이미지로 변환 (투명도 유지)"""
+    if img.mode in ('RGB', 'RGBA'):
+        return img
+    if img.mode in ('LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        return img.convert('RGBA')
+    return img.convert('RGB')
+
+# EXIF 방향 태그와 방향 값별 회전/뒤집기 (ImageOps.exif_transpose와 같은 변환)
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+def exif_orientation(img):
+    """헤더의 EXIF 방향 값 (없거나 알 수 없는 값이면 1)
+
+    open 시점에 읽은 EXIF만 확인하므로 픽셀 데이터를 디코딩하지 않습니다.
+    """
+    data = img.info.get('exif')
+    if not data:
+        return 1
+    exif = Image.Exif()
+    try:
+        exif.load(data)
+    except Exception:
+        return 1
+    orientation = exif.get(EXIF_ORIENTATION_TAG, 1)
+    return orientation if orientation in EXIF_ORIENTATION_TRANSPOSE else 1
+
+def display_size(size, orientation):
+    """EXIF 방향을 적용하여 화면에 표시되는 (너비, 높이)"""
+    width, height = size
+    return (height, width) if orientation >= 5 else (width, height)
+
+# sRGB 프로필 (처음 사용할 때 생성, ImageCms를 사용할 수 없으면 False)
+_srgb_profile = None
+
+def get_srgb_profile():
+    global _srgb_profile
+    if _srgb_profile is None:
+        try:
+            from PIL import ImageCms
+            _srgb_profile = ImageCms.createProfile('sRGB')
+        except (ImportError, OSError):
+            _srgb_profile = False
+    return _srgb_profile
+
+def to_srgb_image(img, icc_profile):
+    """내장 색 프로필(ICC)이 있는 이미지를 sRGB로 변환
+
+    출력 이미지는 프로필 없이 저장되어 브라우저가 sRGB로 해석하므로, Adobe RGB/Display P3/CMYK 사진의
+    색이 달라지지 않도록 저장 전에 변환합니다. 프로필을 읽을 수 없거나 ImageCms(LittleCMS)를
+    사용할 수 없으면 그대로 반환합니다.
+    """
+    if not icc_profile or img.mode not in ('RGB', 'RGBA', 'CMYK', 'L'):
+        return img
+    srgb = get_srgb_profile()
+    if not srgb:
+        return img
+    from PIL import ImageCms
+    try:
+        profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        if img.mode in ('RGB', 'RGBA') and ImageCms.getProfileDescription(profile).strip().startswith('sRGB'):
+            return img
+        return ImageCms.profileToProfile(img, profile, srgb, outputMode='RGBA' if img.mode == 'RGBA' else 'RGB')
+    except (ImageCms.PyCMSError, OSError, ValueError) as e:
+        logger.debug("색 프로필 변환 실패 (프로필 무시): %s", e)
+        return img
+
+def prepare_image(img, image_format, icc_profile=None, orientation=1):
+    """디코딩한 이미지를 저장할 수 있게 정리 (sRGB 변환, 형식별 모드 변환, EXIF 방향 적용)
+
+    JPEG는 RGB로, WebP/AVIF는 투명도를 유지하여 변환합니다.
+    출력에는 EXIF를 쓰지 않으므로 방향은 픽셀을 회전하여 반영합니다.
+    """
+    img = to_srgb_image(img, icc_profile)
+    img = to_rgb_image(img) if image_format == 'JPEG' else to_web_image(img)
+    if orientation in EXIF_ORIENTATION_TRANSPOSE:
+        img = img.transpose(EXIF_ORIENTATION_TRANSPOSE[orientation])
+    return img
+
+# IJG 표준 휘도 양자화 테이블의 합 (품질 50, 배율 100%)
+# JPEG 헤더의 양자화 테이블과 비교하여 원본의 압축 배율(품질)을 구함
+IJG_LUMA_TABLE_SUM = 3688
+
+# 인코딩 크기 추정 지수: 크기 ~ 양자화 배율 ** -JPEG_SCALE_SIZE_EXPONENT,
+# 크기 ~ 픽셀 수 ** JPEG_AREA_SIZE_EXPONENT (작게 줄인 이미지일수록 픽셀당 바이트가 커서 1보다 작음)
+JPEG_SCALE_SIZE_EXPONENT = 0.55
+JPEG_AREA_SIZE_EXPONENT = 0.9
+
+def ijg_quality_scale(quality):
+    """IJG(libjpeg, Pillow) 품질에 해당하는 양자화 테이블 배율 (%)"""
+    return 5000 / quality if quality < 50 else 200 - 2 * quality
+
+def resize_ratio_for(size, max_bytes):
+    """quality로 인코딩한 크기가 size인 이미지를 max_bytes의 95%로 맞추는 축소 비율 (MIN_RESIZE_RATIO~1)"""
+    area = (0.95 * max_bytes / max(size, 1)) ** (1 / JPEG_AREA_SIZE_EXPONENT)
+    return min(1.0, max(MIN_RESIZE_RATIO, area ** 0.5))
+
+def estimate_jpeg_resize_ratio(source, file_size, max_bytes, quality):
+    """디코딩하기 전에 JPEG 헤더와 파일 크기로 축소 비율 결정
+
+    헤더의 양자화 테이블로 원본의 압축 배율을 구하고, 메타데이터(EXIF, ICC)를 뺀 파일 크기를
+    품질별 배율 차이와 채널 샘플 수 차이로 환산하여 원래 크기로 인코딩했을 때의 크기를 추정합니다.
+    최저 품질로도 max_bytes를 넘을 것으로 추정되면 quality로 인코딩했을 때 max_bytes의 95%가 되는 축소 비율을,
+    품질 탐색으로 맞출 수 있을 것으로 추정되거나 양자화 테이블이 없으면 None을 반환합니다.
+    """
+    tables = getattr(source, 'quantization', None)
+    if not tables or 0 not in tables:
+        return None
+    source_scale = 100 * sum(tables[0]) / IJG_LUMA_TABLE_SUM
+    payload = file_size - len(source.info.get('exif') or b'') - len(source.info.get('icc_profile') or b'')
+    # 출력은 YCbCr 4:2:0(픽셀당 1.5 샘플)이므로 CMYK나 4:4:4처럼 샘플이 더 많은 원본은 그 비율만큼 줄여 추정
+    layers = getattr(source, 'layer', None)
+    if layers:
+        block = max(h for _, h, _, _ in layers) * max(v for _, _, v, _ in layers)
+        payload *= min(1.0, 1.5 * block / sum(h * v for _, h, v, _ in layers))
+    
+    def estimate(q):
+        return payload * (source_scale / ijg_quality_scale(q)) ** JPEG_SCALE_SIZE_EXPONENT
+    
+    if estimate(MIN_JPEG_QUALITY) <= max_bytes:
+        return None
+    ratio = resize_ratio_for(estimate(quality), max_bytes)
+    return ratio if ratio < 1.0 else None
+
+def encode_jpeg(img, quality, optimize=True):
+    """이미지를 메모리 버퍼에 JPEG로 인코딩하여 바이트 반환"""
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=optimize)
+    return buffer.getvalue()
+
+def encode_image(img, image_format, quality, optimize=True, lossless=False):
+    """이미지를 메모리 버퍼에 지정한 형식으로 인코딩하여 바이트 반환
+
+    optimize가 False이면 탐색용으로 빠른 설정(JPEG 허프만 최적화 생략, WebP/AVIF 빠른 인코딩)을 사용합니다.
+    """
+    if image_format == 'JPEG':
+        return encode_jpeg(img, quality, optimize)
+    
+    buffer = io.BytesIO()
+    if image_format == 'WEBP':
+        img.save(buffer, format='WEBP', quality=quality, lossless=lossless, method=6 if optimize else 2)
+    elif image_format == 'AVIF':
+        img.save(buffer, format='AVIF', quality=quality, speed=4 if optimize else 8)
+    else:
+        img.save(buffer, format=image_format, optimize=optimize)
+    return buffer.getvalue()
+
+def compress_image(image_path, output_path, max_size_mb=1, image_format='JPEG', lossless=False):
+    """이미지 압축 (1MB 이상인 경우)
+
+    인코딩은 메모리 버퍼에서 수행하고 최종 결과만 디스크에 한 번 씁니다.
+    품질은 구간을 좁혀 가는 탐색(양 끝 크기로 보간한 이분 탐색)으로 정하고,
+    품질만으로 부족하면 인코딩 크기로 축소 비율을 정해 한 번만 리샘플링합니다.
+    JPEG를 JPEG로 압축할 때는 디코딩 전에 헤더와 파일 크기로 축소 비율을 정하고(estimate_jpeg_resize_ratio),
+    목표 크기 이상인 가장 작은 배율(1/2, 1/4, 1/8)로 축소 디코딩(draft)하므로 절반 이하로 줄이는
+    큰 사진은 원래 크기로 디코딩하지 않습니다. 축소한 이미지가 추정과 달리 최대 크기를 넘으면
+    다시 리샘플링하지 않고 품질을 낮춰 맞춥니다 (최저 품질로도 넘으면 경고 후 최저 품질 결과 저장).
+    색 프로필은 sRGB로 변환하고 EXIF 방향은 픽셀을 회전하여 반영합니다 (출력에는 프로필과 EXIF를 쓰지 않음).
+    JPEG 결과에서는 PNG/GIF/RGBA 이미지가 RGB로 변환됩니다.
+    image_format이 WEBP/AVIF이면 최대 크기 이하인 이미지도 해당 형식으로 다시 인코딩하며 투명도를 유지하고,
+    lossless이면 무손실 인코딩을 먼저 시도합니다 (최대 크기를 넘으면 손실 압축으로 진행).
+    성공하면 출력 이미지의 (너비, 높이)를, 실패하면 False를 반환합니다.
+    """
+    try:
+        # 이미지 파일이 존재하는지 확인
+        if not input_exists(image_path):
+            logger.warning("Warning: Image file not found: %s", image_path)
+            return False
+        
+        max_bytes = int(max_size_mb * 1024 * 1024)
+        
+        # 현재 파일 크기 확인
+        file_size = input_size(image_path)
+        if image_format == 'JPEG' and file_size <= max_bytes:
+            # 이미 1MB 이하면 그대로 복사 (크기는 헤더만 읽어 확인)
+            copy_input(image_path, output_path)
+            _, width, height, _ = read_image_header(image_path)
+            return (width, height)
+        
+        def encode(image, quality, optimize=True):
+            return encode_image(image, image_format, quality, optimize)
+        
+        def save(data):
+            with open(output_path, 'wb') as f:
+                f.write(data)
+        
+        def search_quality(image, high, high_size):
+            """high(인코딩 크기 high_size)보다 낮은 품질 중 max_bytes 이하가 되는 가장 높은 품질 (최저 품질로도 넘으면 None)
+
+            품질 탐색 중에는 허프만 최적화 없이 빠르게 인코딩합니다
+            (optimize=True는 같은 품질에서 크기를 줄이기만 하므로 탐색 결과가 그대로 유효함).
+            """
+            # 조금만 초과한 경우가 많으므로 두 단계 낮은 품질을 먼저 확인하고,
+            # 그래도 초과하면 최저 품질로 탐색 하한을 정함 (최저 품질로도 초과하면 품질 탐색 생략)
+            low = None
+            for probe in (high - 2 * JPEG_QUALITY_STEP, MIN_JPEG_QUALITY):
+                if probe >= high:
+                    continue
+                size = len(encode(image, probe, optimize=False))
+                if size <= max_bytes:
+                    low, low_size = probe, size
+                    break
+                high, high_size = probe, size
+            if low is None:
+                return None
+            
+            # 양 끝의 크기로 목표 품질을 보간하여 탐색 구간을 빠르게 좁힘
+            while high - low > JPEG_QUALITY_STEP:
+                estimate = low + (max_bytes - low_size) * (high - low) // max(1, high_size - low_size)
+                estimate = min(max(estimate, low + 1), high - 1)
+                size = len(encode(image, estimate, optimize=False))
+                if size <= max_bytes:
+                    low, low_size = estimate, size
+                else:
+                    high, high_size = estimate, size
+            return low
+        
+        def save_resized(image):
+            """축소한 이미지를 resize_quality로 저장하고 크기 반환
+
+            추정이 빗나가 최대 크기를 넘으면 다시 리샘플링하지 않고 품질을 낮춰 맞춥니다.
+            """
+            data = encode(image, resize_quality)
+            if len(data) > max_bytes:
+                quality = search_quality(image, resize_quality, len(data))
+                if quality is None:
+                    # 최대한 압축했지만 여전히 최대 크기를 넘는 경우 가장 작은 결과 사용
+                    logger.warning("Warning: Could not compress image below %sMB: %s", max_size_mb, image_path)
+                    quality = MIN_JPEG_QUALITY
+                data = encode(image, quality)
+            save(data)
+            return image.size
+        
+        top_quality = IMAGE_FORMAT_QUALITY.get(image_format, MAX_JPEG_QUALITY)
+        resize_quality = min(top_quality, RESIZE_JPEG_QUALITY)
+        
+        # 이미지 열기 (압축 파일 안의 이미지도 읽을 수 있도록 스트림으로 열고, 닫기 전에 픽셀 데이터를 모두 읽음)
+        # 색 프로필과 EXIF 방향은 헤더에서 읽어 두었다가 디코딩(과 축소) 후 한 번에 적용
+        with open_input(image_path) as f:
+            source = Image.open(f)
+            width, height = source.size
+            icc_profile = source.info.get('icc_profile')
+            orientation = exif_orientation(source)
+            ratio = None
+            if source.format == 'JPEG' and image_format == 'JPEG' and not lossless:
+                ratio = estimate_jpeg_resize_ratio(source, file_size, max_bytes, resize_quality)
+            if ratio is not None:
+                target = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+                # 목표 크기 이상인 가장 작은 배율로 디코딩한 뒤 한 번만 리샘플링 (방향 적용 전 크기 기준)
+                # 최소 비율이면 1/2 축소 디코딩 크기(올림)를 그대로 사용하므로 리샘플링하지 않음
+                source.draft('RGB', target)
+                source.load()
+                if ratio > MIN_RESIZE_RATIO and source.size != target:
+                    source = source.resize(target, Image.LANCZOS)
+            img = prepare_image(source, image_format, icc_profile, orientation)
+            img.load()
+        
+        if ratio is not None:
+            return save_resized(img)
+        
+        if lossless:
+            data = encode_image(img, image_format, 100, lossless=True)
+            if len(data) <= max_bytes:
+                save(data)
+                return img.size
+        
+        # 최고 품질로 충분하면 바로 저장 (대부분의 경우), 아니면 최대 크기 이하를 만족하는 가장 높은 품질 탐색
+        top_size = len(encode(img, top_quality, optimize=False))
+        quality = top_quality if top_size <= max_bytes else search_quality(img, top_quality, top_size)
+        if quality is not None:
+            save(encode(img, quality))
+            return img.size
+        
+        # 품질을 낮춰도 최대 크기를 넘는 경우 resize_quality 인코딩 크기로 축소 비율을 정해 한 번만 리샘플링
+        ratio = resize_ratio_for(len(encode(img, resize_quality, optimize=False)), max_bytes)
+        width, height = img.size
+        return save_resized(img.resize((max(1, int(width * ratio)), max(1, int(height * ratio))), Image.LANCZOS))
+    
+    except Exception as e:
+        logger.error("Error compressing image %s: %s", image_path, e)
+        return False
+
+# Pillow 이미지 형식 -> 출력 파일 확장자
+IMAGE_FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+    'AVIF': '.avif',
+    'BMP': '.bmp',
+}
+
+def read_image_header(image_path):
+    """이미지 헤더만 읽어 (형식, 너비, 높이, 모드) 반환 (읽을 수 없으면 모두 None)
+
+    Pillow는 open 시점에 픽셀 데이터를 디코딩하지 않으므로 파일 앞부분만 읽습니다.
+    너비와 높이는 EXIF 방향을 적용하여 화면에 표시되는 크기입니다.
+    """
+    try:
+        with open_input(image_path) as f, Image.open(f) as img:
+            width, height = display_size(img.size, exif_orientation(img))
+            return img.format, width, height, img.mode
+    except Exception:
+        return None, None, None, None
+
+# Ghost가 /content/images/size/w{N}/ 경로로 제공하는 반응형 이미지 너비 (기본값, --image-widths로 변경)
+GHOST_IMAGE_WIDTHS = (600, 1000, 1600, 2000)
+
+# Ghost가 크기별 이미지를 만들 수 있는 확장자
+RESIZABLE_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+
+# 너비별 이미지 저장 품질 (JPEG/WebP/AVIF)
+VARIANT_QUALITY = {
+    'JPEG': 82,
+    'WEBP': 80,
+    'AVIF': 55,
+}
+
+def image_variant_path(output_path, width):
+    """images/<연도>/<파일> 출력 경로에 대한 Ghost 너비별 이미지 경로 (images/size/w<너비>/<연도>/<파일>)"""
+    year_dir, filename = os.path.split(output_path)
+    images_dir, year = os.path.split(year_dir)
+    return os.path.join(images_dir, 'size', f'w{width}', year, filename)
+
+def write_image_variants(output_path, widths):
+    """출력 이미지보다 작은 너비마다 Ghost의 size/w<너비> 경로에 축소 이미지 생성
+
+    큰 너비부터 차례로 직전 결과를 줄여 디코딩과 리샘플링 비용을 줄이고, 이미 있는 파일은 건너뜁니다.
+    JPEG는 가장 큰 너비 이상인 가장 작은 배율로 축소 디코딩합니다. 그대로 복사한 원본의 색 프로필과
+    EXIF 방향은 compress_image와 같이 반영합니다 (너비는 표시되는 크기 기준).
+    GIF 등 Ghost가 크기 변환하지 않는 형식은 만들지 않습니다. 생성한 파일 수를 반환합니다.
+    """
+    with Image.open(output_path) as img:
+        orientation = exif_orientation(img)
+        width, height = display_size(img.size, orientation)
+        image_format = img.format
+        targets = [(w, image_variant_path(output_path, w)) for w in sorted(set(widths), reverse=True) if w < width]
+        targets = [(w, path) for w, path in targets if not os.path.exists(path)]
+        if not targets or image_format not in ('JPEG', 'PNG', 'WEBP', 'AVIF'):
+            return 0
+        
+        if image_format == 'JPEG':
+            largest = targets[0][0]
+            img.draft('RGB', display_size((largest, max(1, round(height * largest / width))), orientation))
+        resized = prepare_image(img, image_format, img.info.get('icc_profile'), orientation)
+        for w, path in targets:
+            resized = resized.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(encode_image(resized, image_format, VARIANT_QUALITY.get(image_format, RESIZE_JPEG_QUALITY)))
+            os.replace(tmp_path, path)
+    return len(targets)
+
+# 이미지 압축 알고리즘 버전 (압축 결과가 달라지는 변경 시 올려서 캐시 무효화)
+IMAGE_COMPRESSION_VERSION = 4
+
+# 이미지 변환 캐시 파일명 (출력 디렉토리에 생성)
+IMAGE_CACHE_FILENAME = 'image-cache.sqlite'
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """파일 내용의 SHA-256 해시"""
+    h = hashlib.sha256()
+    with open_input(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def image_cache_key(digest, max_size_mb=1, output_format='jpeg'):
+    """원본 이미지 해시와 압축 설정으로 캐시 키 생성 (jpeg 정책의 키는 기존과 같음)"""
+    settings = f"max_size_mb={max_size_mb};v={IMAGE_COMPRESSION_VERSION}"
+    if output_format != 'jpeg':
+        settings += f";format={output_format}"
+    return hashlib.sha256(f"{digest}|{settings}".encode('utf-8')).hexdigest()
+
+class ImageCache:
+    """내용 해시 기반 이미지 변환 캐시 (SQLite)
+
+    - sources: 원본 파일 (경로, 크기, 수정 시각) -> 내용 해시
+    - outputs: 캐시 키 (내용 해시 + 압축 설정) -> 압축된 출력 파일 경로
+
+    재실행이나 중복 이미지에서 해시 계산과 Pillow 압축을 다시 하지 않도록 합니다.
+    여러 워커 프로세스가 같은 캐시 파일을 동시에 사용할 수 있습니다. SQLite 연결은 fork로 물려받아
+    사용할 수 없으므로 프로세스마다 처음 사용할 때 따로 연결합니다.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        # 프로세스 ID -> 연결 (부모 프로세스에서 물려받은 연결은 닫지도 사용하지도 않음)
+        self._conns = {}
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sources ('
+                'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS outputs ('
+                'key TEXT PRIMARY KEY, digest TEXT, output_path TEXT, size INTEGER)'
+            )
+    
+    @property
+    def _conn(self):
+        """현재 프로세스의 SQLite 연결 (없으면 새로 연결)"""
+        conn = self._conns.get(os.getpid())
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            self._conns[os.getpid()] = conn
+        return conn
+    
+    def source_digest(self, image_path):
+        """원본 파일 해시 (크기/수정 시각이 같으면 저장된 값 재사용)"""
+        size, mtime_ns = input_stat(image_path)
+        path = os.path.abspath(image_path)
+        row = self._conn.execute(
+            'SELECT digest FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, size, mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+        
+        digest = file_digest(image_path)
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sources (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                (path, size, mtime_ns, digest)
+            )
+        return digest
+    
+    def lookup(self, key):
+        """캐시 키에 해당하는 기존 출력 파일 경로 (파일이 없으면 None)"""
+        row = self._conn.execute('SELECT output_path FROM outputs WHERE key = ?', (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+    
+    def store(self, key, digest, output_path):
+        """압축된 출력 파일 기록"""
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO outputs (key, digest, output_path, size) VALUES (?, ?, ?, ?)',
+                (key, digest, os.path.abspath(output_path), os.path.getsize(output_path))
+            )
+    
+    def close(self):
+        conn = self._conns.pop(os.getpid(), None)
+        if conn is not None:
+            conn.close()
+
+# 프로세스별 이미지 캐시 (출력 디렉토리 -> ImageCache)
+_image_caches = {}
+
+def get_image_cache(output_dir):
+    """출력 디렉토리의 ImageCache 반환 (프로세스 내에서 공유)"""
+    cache = _image_caches.get(output_dir)
+    if cache is None:
+        os.makedirs(output_dir, exist_ok=True)
+        cache = ImageCache(os.path.join(output_dir, IMAGE_CACHE_FILENAME))
+        _image_caches[output_dir] = cache
+    return cache
+
+def plan_image(image_path, images_dir, image_cache=None, max_size_mb=1, output_format='jpeg', variant_widths=()):
+    """원본 이미지의 출력 파일명을 정하고 필요한 저장 작업을 반환
+
+    파일명은 원본 내용 해시와 압축 설정으로 정해지므로 실제 압축 전에도 Ghost URL을 알 수 있습니다.
+    확장자는 출력 형식 정책(output_format)과 원본 헤더로 정합니다 (output_image_format 참고).
+    반환하는 작업(job)의 action은 다음 중 하나입니다.
+    - 'exists': 같은 이미지가 이미 저장됨 (이전 실행 또는 다른 포스트)
+    - 'variants': 이미 저장되었지만 너비별 이미지가 없음
+    - 'copy_cached': 다른 디렉토리에 있는 변환 결과를 복사
+    - 'copy': 최대 크기 이하라 원본을 그대로 복사
+    - 'compress': Pillow로 압축 (또는 WebP/AVIF로 변환)
+
+    job의 width/height는 출력 이미지 크기입니다. 크기가 바뀌지 않는 경우(복사/재사용/형식 변환)에는
+    헤더만 읽어 정하고, 최대 크기를 넘어 압축하는 이미지는 압축 후 compress_image가 돌려준 크기로 채워집니다
+    (그 전에는 None). variant_widths가 주어지면 저장 후 그보다 작은 너비별 이미지도 생성합니다.
+    """
+    digest = image_cache.source_digest(image_path) if image_cache else file_digest(image_path)
+    key = image_cache_key(digest, max_size_mb, output_format)
+    over_limit = input_size(image_path) > max_size_mb * 1024 * 1024
+    # 헤더를 한 번만 읽어 출력 형식과 크기를 함께 확인 (jpeg 정책의 압축 대상은 항상 JPEG이므로 생략)
+    if over_limit and output_format == 'jpeg':
+        source_format, width, height, mode = None, None, None, None
+    else:
+        source_format, width, height, mode = read_image_header(image_path)
+    save_format, lossless = output_image_format(source_format, mode, over_limit, output_format)
+    extension = IMAGE_FORMAT_EXTENSIONS[save_format] if save_format else IMAGE_FORMAT_EXTENSIONS.get(source_format, '.jpg')
+    filename = f"{key[:32]}{extension}"
+    output_path = os.path.join(images_dir, filename)
+    if over_limit:
+        width, height = None, None
+    
+    job = {
+        'source': image_path,
+        'output_path': output_path,
+        'filename': filename,
+        'digest': digest,
+        'key': key,
+        'max_size_mb': max_size_mb,
+        'cached_path': None,
+        'format': save_format,
+        'lossless': lossless,
+        'widths': tuple(variant_widths),
+        'width': width,
+        'height': height
+    }
+    
+    exists = os.path.exists(output_path)
+    cached_path = image_cache.lookup(key) if image_cache and not exists else None
+    if exists:
+        job['action'] = 'exists'
+    elif cached_path:
+        job['action'] = 'copy_cached'
+        job['cached_path'] = cached_path
+    elif save_format is None:
+        job['action'] = 'copy'
+    else:
+        job['action'] = 'compress'
+    
+    # 이미 압축된 결과를 재사용하면 결과 파일의 헤더에서 크기 확인
+    if over_limit and job['action'] in ('exists', 'copy_cached'):
+        job['width'], job['height'] = read_image_header(job['cached_path'] or output_path)[1:3]
+    
+    if job['action'] == 'exists' and variants_missing(job):
+        job['action'] = 'variants'
+    
+    return job
+
+def variants_missing(job):
+    """저장된 이미지에 만들어야 할 너비별 이미지가 남아 있는지 확인"""
+    if not job['widths'] or not job['width'] or not job['filename'].lower().endswith(RESIZABLE_IMAGE_EXTENSIONS):
+        return False
+    return any(not os.path.exists(image_variant_path(job['output_path'], w)) for w in job['widths'] if w < job['width'])
+
+def execute_image_job(job):
+    """plan_image가 만든 저장 작업 실행 (다른 스레드/프로세스에서 실행 가능)"""
+    output_path = job['output_path']
+    if job['action'] == 'exists':
+        return True
+    
+    if job['action'] != 'variants':
+        # 임시 파일에 쓴 뒤 교체하여 동시에 실행되는 워커가 불완전한 파일을 보지 않도록 함
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        
+        if job['action'] == 'copy_cached':
+            shutil.copy2(job['cached_path'], tmp_path)
+            ok = True
+        elif job['action'] == 'copy':
+            copy_input(job['source'], tmp_path)
+            ok = True
+        else:
+            size = compress_image(job['source'], tmp_path, job['max_size_mb'], job['format'], job['lossless'])
+            ok = bool(size)
+            if ok:
+                job['width'], job['height'] = size
+        
+        if not (ok and os.path.exists(tmp_path)):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, output_path)
+    
+    if job['widths']:
+        try:
+            write_image_variants(output_path, job['widths'])
+        except Exception as e:
+            logger.error("Error writing image variants %s: %s", output_path, e)
+    return True
+
+def run_image_job(job):
+    """다른 스레드/프로세스에서 저장 작업을 실행하고 (성공 여부, 출력 너비, 출력 높이) 반환
+
+    프로세스 풀에서 실행하면 job에 채운 출력 크기가 호출한 쪽에 전달되지 않으므로 결과로 돌려줍니다.
+    """
+    ok = execute_image_job(job)
+    return ok, job['width'], job['height']
+
+def record_image_job(job, image_cache):
+    """완료된 저장 작업을 이미지 캐시에 기록 (캐시에서 복사한 작업은 이미 기록되어 있음)"""
+    if job['action'] == 'copy_cached':
+        return
+    if image_cache and os.path.exists(job['output_path']) and not image_cache.lookup(job['key']):
+        image_cache.store(job['key'], job['digest'], job['output_path'])
+
+def count_image_job(job):
+    """완료된 저장 작업을 이미지 지표에 반영"""
+    metrics = get_metrics()
+    action = job['action']
+    metrics.count('images.compressed' if action == 'compress'
+                  else 'images.reused' if action in ('exists', 'variants', 'copy_cached')
+                  else 'images.copied')
+    if action not in ('exists', 'variants') and os.path.exists(job['output_path']):
+        metrics.count('bytes.image_in', input_size(job['source']))
+        metrics.count('bytes.image_out', os.path.getsize(job['output_path']))
+
+def store_image(image_path, images_dir, image_cache=None, max_size_mb=1, output_format='jpeg', variant_widths=()):
+    """원본 이미지를 압축하여 images_dir에 저장하고 완료된 저장 작업(job) 반환
+
+    파일명은 원본 내용 해시와 압축 설정으로 정해지므로 재실행해도 같은 URL이 유지되고,
+    같은 이미지는 한 번만 저장됩니다. 이미 변환된 결과가 있으면 압축을 건너뜁니다.
+    """
+    job = plan_image(image_path, images_dir, image_cache, max_size_mb, output_format, variant_widths)
+    
+    if job['action'] == 'exists':
+        logger.debug("이미지 캐시 사용: %s", job['filename'])
+    elif job['action'] == 'copy_cached':
+        logger.debug("이미지 캐시 복사: %s -> %s", job['cached_path'], job['filename'])
+    
+    with get_metrics().stage('image_write'):
+        ok = execute_image_job(job)
+    if ok:
+        record_image_job(job, image_cache)
+        count_image_job(job)
+    
+    return job
+
+class ImageStage:
+    """이미지 저장 단계 (HTML 파싱과 분리된 백그라운드 작업)
+
+    복사 작업은 스레드 풀에서, 압축 작업은 프로세스 풀(processes > 0인 경우)에서 실행합니다.
+    진행 중인 작업 수를 max_pending으로 제한하여 대기열이 가득 차면 submit이 기다립니다.
+    이미지 캐시 기록은 submit/join을 호출하는 스레드에서만 수행합니다.
+    압축한 이미지의 출력 크기는 image_size로 확인합니다 (카드 크기를 채울 때 사용).
+    """
+    
+    def __init__(self, threads=4, processes=0, max_pending=64, image_cache=None):
+        self.image_cache = image_cache
+        self._threads = ThreadPoolExecutor(max_workers=max(1, threads))
+        self._processes = ProcessPoolExecutor(max_workers=processes) if processes else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = deque()
+        # 출력 경로 -> 처음 예약한 작업, 진행 중인 작업의 future
+        self._jobs = {}
+        self._futures = {}
+        self.counts = {'exists': 0, 'variants': 0, 'copy_cached': 0, 'copy': 0, 'compress': 0}
+        self.failures = []
+    
+    def submit(self, job):
+        """저장 작업 추가 (같은 출력 파일에 대한 작업은 한 번만 실행)"""
+        if job['output_path'] in self._jobs:
+            return
+        self._jobs[job['output_path']] = job
+        self.counts[job['action']] += 1
+        
+        if job['action'] == 'exists':
+            record_image_job(job, self.image_cache)
+            count_image_job(job)
+            return
+        
+        self._slots.acquire()
+        executor = self._processes if job['action'] in ('compress', 'variants') and self._processes else self._threads
+        try:
+            future = executor.submit(run_image_job, job)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append((job, future))
+        self._futures[job['output_path']] = future
+        self._collect()
+    
+    def _collect(self, wait=False):
+        """완료된 작업 결과 수집 (wait이면 모든 작업이 끝날 때까지 대기)"""
+        while self._pending and (wait or self._pending[0][1].done()):
+            job, future = self._pending.popleft()
+            del self._futures[job['output_path']]
+            try:
+                ok, width, height = future.result()
+            except Exception as e:
+                ok, width, height = False, None, None
+                logger.error("Error writing image %s: %s", job['source'], e)
+            job['width'], job['height'] = (width, height) if ok else (None, None)
+            if ok:
+                record_image_job(job, self.image_cache)
+                count_image_job(job)
+            else:
+                self.failures.append(job)
+    
+    def image_size(self, job, wait=False):
+        """job과 같은 출력 파일을 만드는 작업의 결과 (너비, 높이) 반환
+
+        작업이 끝나지 않았으면 None을 반환하고 (wait이면 끝날 때까지 대기), 저장에 실패했으면 (None, None)을 반환합니다.
+        """
+        future = self._futures.get(job['output_path'])
+        if future is None:
+            scheduled = self._jobs.get(job['output_path'], job)
+            return scheduled['width'], scheduled['height']
+        if not (wait or future.done()):
+            return None
+        try:
+            ok, width, height = future.result()
+        except Exception:
+            return None, None
+        return (width, height) if ok else (None, None)
+    
+    def join(self):
+        """모든 작업 완료 대기 후 요약 출력, 실패한 작업 목록 반환"""
+        self._collect(wait=True)
+        self._threads.shutdown()
+        if self._processes:
+            self._processes.shutdown()
+        
+        logger.info("이미지 저장 완료: 압축 %d개, 복사 %d개, 캐시 복사 %d개, 기존 파일 %d개, 너비별 이미지만 생성 %d개, 실패 %d개",
+                    self.counts['compress'], self.counts['copy'], self.counts['copy_cached'],
+                    self.counts['exists'], self.counts['variants'], len(self.failures))
+        for job in self.failures:
+            logger.warning("  - 실패: %s -> %s", job['source'], job['output_path'])
+        return self.failures
+
+# 사용 가능한 HTML 파서 백엔드 (lxml은 설치된 경우에만 사용)
+DEFAULT_HTML_PARSER = 'html.parser'
+
+def resolve_html_parser(parser=None):
+    """HTML 파서 백엔드 이름 결정
+
+    'auto'는 lxml이 설치되어 있으면 lxml을, 없으면 html.parser를 사용합니다.
+    """
+    if not parser:
+        return DEFAULT_HTML_PARSER
+    
+    if parser == 'auto':
+        try:
+            import lxml  # noqa: F401
+            return 'lxml'
+        except ImportError:
+            return DEFAULT_HTML_PARSER
+    
+    return parser
+
+# 기본 최대 HTML 파일 크기 (MB, 넘는 파일은 변환하지 않음, 0이면 제한 없음)
+DEFAULT_MAX_HTML_MB = 0
+# meta charset을 찾을 문서 앞부분 크기
+HTML_SNIFF_BYTES = 64 * 1024
+# 바이트 통계로 인코딩을 확인할 때 한 번에 디코딩하는 크기
+HTML_DECODE_CHUNK = 1024 * 1024
+
+HTML_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+# 바이트 통계로 시도할 인코딩 (EUC-KR 백업은 확장 문자가 포함된 CP949로 디코딩)
+FALLBACK_HTML_ENCODINGS = ('utf-8', 'cp949')
+
+def normalize_encoding(name):
+    """인코딩 이름을 파이썬 코덱 이름으로 변환 (EUC-KR 계열은 CP949로 처리)"""
+    try:
+        name = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return 'cp949' if name == 'euc_kr' else name
+
+def decodes_as(data, encoding, chunk_size=HTML_DECODE_CHUNK):
+    """data(bytes 또는 mmap)가 encoding으로 오류 없이 디코딩되는지 확인 (결과 문자열은 유지하지 않음)"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for offset in range(0, len(data), chunk_size):
+            decoder.decode(data[offset:offset + chunk_size])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def sniff_encoding(data):
+    """BOM, meta charset, 바이트 통계 순으로 HTML 문서 인코딩 판별
+
+    (인코딩, 판별 방법)을 반환합니다. meta charset은 문서 앞부분이 해당 인코딩으로
+    디코딩되는 경우에만 사용하고, 바이트 통계는 문서 전체를 조각 단위로 확인합니다.
+    """
+    for bom, encoding in HTML_BOMS:
+        if data[:len(bom)] == bom:
+            return encoding, 'bom'
+    
+    head = data[:HTML_SNIFF_BYTES]
+    match = META_CHARSET_RE.search(head)
+    if match:
+        encoding = normalize_encoding(match.group(1).decode('ascii'))
+        if encoding and decodes_as(head[:head.rfind(b'>') + 1], encoding):
+            return encoding, 'meta'
+    
+    for encoding in FALLBACK_HTML_ENCODINGS:
+        if decodes_as(data, encoding):
+            return encoding, 'bytes'
+    
+    return 'utf-8', 'fallback'
+
+def decode_html(data, encoding, method):
+    """data(bytes 또는 mmap)를 판별한 인코딩의 문자열로 디코딩
+
+    메모리뷰에서 바로 디코딩하므로 바이트 사본을 만들지 않습니다. 문서 전체가 판별한 인코딩으로
+    디코딩되지 않으면 (meta charset이 틀린 경우) 바이트 통계 후보를 차례로 시도하고,
+    모두 실패하면 잘못된 바이트를 대체 문자로 바꿉니다.
+    """
+    if method == 'bom' and encoding == 'utf-8':
+        encoding = 'utf-8-sig'
+    with memoryview(data) as view:
+        for candidate in dict.fromkeys((encoding,) + FALLBACK_HTML_ENCODINGS):
+            try:
+                return str(view, candidate)
+            except UnicodeDecodeError:
+                continue
+        return str(view, encoding, 'replace')
+
+def read_html_source(html_file, max_bytes=None):
+    """HTML 파일을 메모리 맵으로 열어 (문자열, 인코딩, 판별 방법) 반환
+
+    인코딩 판별과 디코딩은 메모리 맵 위에서 수행되므로 파일 내용의 바이트 사본을 만들지 않고,
+    파서에는 디코딩한 문자열 하나만 전달됩니다. max_bytes를 지정하면 이를 넘는 파일은 읽지 않고
+    None을 반환합니다 (기본값은 제한 없음).
+    압축 파일 안의 HTML은 멤버 크기를 확인한 뒤 멤버 스트림에서 한 번에 읽습니다.
+    """
+    archive, member = split_archive_path(html_file)
+    if archive is not None:
+        if max_bytes and input_size(html_file) > max_bytes:
+            return None
+        with archive.open(member) as f:
+            data = f.read()
+        if not data:
+            return '', 'utf-8', 'empty'
+        encoding, method = sniff_encoding(data)
+        return decode_html(data, encoding, method), encoding, method
+    
+    with open(html_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_bytes and size > max_bytes:
+            return None
+        if size == 0:
+            return '', 'utf-8', 'empty'
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            encoding, method = sniff_encoding(data)
+            return decode_html(data, encoding, method), encoding, method
+
+def parse_html(html_content, parser=None, encoding=None):
+    """HTML 문서를 한 번만 파싱하여 BeautifulSoup 트리 반환
+
+    html_content가 bytes이면 encoding(판별된 문서 인코딩)으로 파서가 직접 디코딩합니다.
+    """
+    if isinstance(html_content, bytes):
+        return BeautifulSoup(html_content, resolve_html_parser(parser), from_encoding=encoding)
+    return BeautifulSoup(html_content, resolve_html_parser(parser))
+
+class DocumentIndex:
+    """파싱된 트리를 한 번 순회하여 만든 태그 이름별/클래스별 요소 목록 (문서 순서)
+
+    레이아웃 판별과 추출기가 soup.find/find_all 대신 사용하므로, 찾지 못한 후보마다
+    트리 전체를 다시 훑지 않습니다. find/find_all은 같은 조건의 soup.find/find_all과 같은 요소를 반환합니다.
+    """
+    
+    def __init__(self, soup):
+        self.soup = soup
+        self.by_name = {}
+        self.by_class = {}
+        for node in soup.descendants:
+            if isinstance(node, Tag):
+                self.by_name.setdefault(node.name, []).append(node)
+                for class_name in dict.fromkeys(node.get('class') or ()):
+                    self.by_class.setdefault(class_name, []).append(node)
+    
+    def has_class(self, class_name):
+        return class_name in self.by_class
+    
+    def find_all(self, name, class_=None):
+        if class_ is None:
+            return list(self.by_name.get(name, ()))
+        return [node for node in self.by_class.get(class_, ()) if node.name == name]
+    
+    def find(self, name, class_=None):
+        nodes = self.by_name.get(name, ()) if class_ is None else self.by_class.get(class_, ())
+        return next((node for node in nodes if node.name == name), None)
+
+def document_index(soup):
+    """soup의 DocumentIndex (이미 색인이면 그대로 반환)"""
+    return soup if isinstance(soup, DocumentIndex) else DocumentIndex(soup)
+
+def find_date_div(index):
+    """border-bottom: solid 스타일을 가진 첫 번째 div (SE2 날짜 영역)"""
+    return next((div for div in index.find_all('div') if DATE_DIV_STYLE_RE.search(div.get('style') or '')), None)
+
+def se3_text_title(title_h5):
+    """h5.se_textarea 제목 텍스트 (SE3 편집기 주석 표식 안의 내용)"""
+    # HTML 주석 처리 (<!-- SE3-TEXT { -->내용<!-- } SE3-TEXT -->)
+    title_text = title_h5.text
+    if '<!-- SE3-TEXT { -->' in title_text and '<!-- } SE3-TEXT -->' in title_text:
+        return title_text.split('<!-- SE3-TEXT { -->')[1].split('<!-- } SE3-TEXT -->')[0]
+    return title_text
+
+def extract_title(soup, default_title):
+    """파싱된 트리(또는 DocumentIndex)에서 제목 추출 (여러 방법 시도)"""
+    index = document_index(soup)
+    title = default_title  # 기본값으로 파일명에서 추출한 제목 사용
+    
+    # 방법 1: h3 태그에서 찾기
+    method = 'filename'
+    title_tag = index.find('h3')
+    if title_tag:
+        title = title_tag.text
+        method = 'h3'
+    else:
+        # 방법 2: se_sectionTitle 클래스의 h5 태그에서 찾기
+        title_h5 = index.find('h5', 'se_textarea')
+        if title_h5:
+            title = se3_text_title(title_h5)
+            method = 'se_textarea'
+        else:
+            # 방법 3: se_card_titleView 클래스의 div 안에서 찾기
+            title_div = index.find('div', 'se_card_titleView')
+            if title_div:
+                title_h5 = title_div.find('h5')
+                if title_h5:
+                    title = title_h5.text
+                    method = 'se_card_titleView'
+    
+    get_metrics().count(f"method.title.{method}")
+    return title
+
+def extract_date(soup, date_str):
+    """파싱된 트리(또는 DocumentIndex)에서 날짜 문자열 추출 (여러 방법 시도)"""
+    index = document_index(soup)
+    date_text = ''
+    method = 'none'
+    
+    # 방법 1: border-bottom: solid 스타일을 가진 div에서 찾기
+    date_div = find_date_div(index)
+    if date_div:
+        date_text = date_div.text
+        method = 'border_div'
+    else:
+        # 방법 2: se_publishDate 클래스를 가진 span에서 찾기
+        date_span = index.find('span', 'se_publishDate')
+        if date_span:
+            date_text = date_span.text
+            method = 'se_publishDate'
+        else:
+            # 방법 3: 파일명에서 날짜 추출 (20160202 -> 2016.02.02)
+            if date_str and len(date_str) >= 8:
+                year = date_str[:4]
+                month = date_str[4:6]
+                day = date_str[6:8]
+                date_text = f"{year}.{month}.{day}. 00:00"
+                method = 'filename'
+    
+    get_metrics().count(f"method.date.{method}")
+    return date_text
+
+def extract_tags(soup):
+    """파싱된 트리(또는 DocumentIndex)에서 태그 추출"""
+    index = document_index(soup)
+    
+    # 태그 추출 방법 1: backup_post_tags 클래스에서 추출
+    tags_div = index.find('div', 'backup_post_tags')
+    if tags_div:
+        tag_spans = tags_div.find_all('span', class_='backup_post_tag')
+        tags = [span.text.strip().replace('#', '') for span in tag_spans]
+        get_metrics().count('method.tags.backup_post_tags')
+        return tags
+    
+    # 태그 추출 방법 2: 시리즈 제목에서 추출
+    series_title = index.find('div', 'backup_post_series_title')
+    if series_title and series_title.text:
+        get_metrics().count('method.tags.series_title')
+        return [series_title.text.strip().replace('#', '')]
+    
+    # 태그 추출 방법 3: 본문 내용에서 해시태그 추출
+    content_divs = index.find_all('div', 'se2_in_page')
+    if content_divs:
+        all_text = ' '.join([div.get_text() for div in content_divs])
+        hashtags = HASHTAG_RE.findall(all_text)
+        if hashtags:
+            get_metrics().count('method.tags.hashtag')
+            return hashtags
+    
+    get_metrics().count('method.tags.none')
+    return []
+
+def extract_tags_from_html(html_content, parser=None):
+    """HTML 내용에서 태그 추출 (이미 파싱된 트리도 허용)"""
+    soup = html_content if isinstance(html_content, BeautifulSoup) else parse_html(html_content, parser)
+    return extract_tags(soup)
+
+# 본문 추정 시 이미지 한 개에 부여하는 텍스트 길이 가중치
+CONTENT_IMAGE_WEIGHT = 100
+
+def find_largest_content_div(soup):
+    """텍스트 길이와 이미지 수(가중치 적용)의 합이 가장 큰 div 찾기
+
+    (div, 텍스트 길이, 이미지 수)를 반환하며 해당하는 div가 없으면 (None, 0, 0)을 반환합니다.
+    div마다 get_text()/find_all('img')로 하위 트리를 다시 순회하지 않고, 문서 역순으로 한 번
+    순회하며 자식의 합계로 부모의 합계를 계산합니다. 텍스트 길이는 get_text()와 같은 문자열
+    종류만 세고, 값이 같으면 문서에서 먼저 나온 div를 선택합니다.
+    """
+    nodes = [node for node in soup.descendants if isinstance(node, Tag)]
+    divs = [node for node in nodes if node.name == 'div']
+    if not divs:
+        return None, 0, 0
     
-    # 한글, 영문, 숫자, 공백만 남기고 나머지 제거
-    slug = re.sub(r'[^\w\s가-힣]', '', text)
+    # div의 get_text()가 포함하는 문자열 종류 (주석, script/style 내용 등은 제외)
+    string_types = getattr(divs[0], 'interesting_string_types', None) or (NavigableString, CData)
+    if isinstance(string_types, type):
+        string_types = (string_types,)
     
-    # 공백을 하이픈으로 변환
-    slug = re.sub(r'\s+', '-', slug.strip())
+    totals = {}
+    for node in reversed(nodes):
+        text_length = 0
+        img_count = 0
+        for child in node.contents:
+            if isinstance(child, Tag):
+                child_text, child_imgs = totals[id(child)]
+                text_length += child_text
+                img_count += child_imgs + (child.name == 'img')
+            elif type(child) in string_types:
+                text_length += len(child)
+        totals[id(node)] = (text_length, img_count)
     
-    # 디버깅 출력
-    print(f"원본: '{original}' -> 슬러그: '{slug}'")
+    best, best_text, best_imgs = None, 0, 0
+    max_content_length = 0
+    for node in divs:
+        text_length, img_count = totals[id(node)]
+        content_length = text_length + img_count * CONTENT_IMAGE_WEIGHT
+        if content_length > max_content_length:
+            max_content_length = content_length
+            best, best_text, best_imgs = node, text_length, img_count
     
-    return slug.lower()
+    return best, best_text, best_imgs
 
-def compress_image(image_path, output_path, max_size_mb=1):
-    """이미지 압축 (1MB 이상인 경우)"""
-    try:
-        # 이미지 파일이 존재하는지 확인
-        if not os.path.exists(image_path):
-            print(f"Warning: Image file not found: {image_path}")
+def find_content_divs(soup):
+    """파싱된 트리(또는 DocumentIndex)에서 본문 div 목록 찾기 (여러 클래스 시도)"""
+    index = document_index(soup)
+    content_divs = []
+    method = 'none'
+    
+    # 방법 1: se2_in_page 클래스의 div 찾기 (기존 방식)
+    se2_divs = index.find_all('div', 'se2_in_page')
+    if se2_divs:
+        content_divs = se2_divs
+        logger.debug("se2_in_page div 수: %d", len(content_divs))
+        method = 'se2_in_page'
+    
+    # 방법 2: se_textView 클래스의 div 찾기
+    if not content_divs:
+        se_textview_divs = index.find_all('div', 'se_textView')
+        if se_textview_divs:
+            content_divs = se_textview_divs
+            logger.debug("se_textView div 수: %d", len(content_divs))
+            method = 'se_textView'
+    
+    # 방법 3: se_component_wrap 클래스의 div 찾기 (이미지 포함 가능성 높음)
+    if not content_divs:
+        se_component_divs = index.find_all('div', 'se_component_wrap')
+        if se_component_divs:
+            content_divs = se_component_divs
+            logger.debug("se_component_wrap div 수: %d", len(content_divs))
+            method = 'se_component_wrap'
+    
+    # 방법 4: se_card 클래스의 div 찾기 (이미지 카드 포함)
+    if not content_divs:
+        se_card_divs = index.find_all('div', 'se_card')
+        if se_card_divs:
+            content_divs = se_card_divs
+            logger.debug("se_card div 수: %d", len(content_divs))
+            method = 'se_card'
+    
+    # 방법 5: se_textarea 클래스의 p 태그 직접 찾기
+    if not content_divs:
+        p_tags = index.find_all('p', 'se_textarea')
+        if p_tags:
+            logger.debug("se_textarea p 태그 수: %d", len(p_tags))
+            method = 'se_textarea'
+            # p 태그를 div로 감싸서 content_divs에 추가
+            content_div = index.soup.new_tag('div')
+            for p in p_tags:
+                content_div.append(p)
+            content_divs = [content_div]
+    
+    # 방법 6: 본문 영역으로 추정되는 div 찾기 (마지막 수단)
+    if not content_divs:
+        # 본문 영역으로 추정되는 div 찾기 (예: 큰 div 중에서 이미지나 텍스트가 많은 div)
+        main_content_div, text_length, img_count = find_largest_content_div(index.soup)
+        
+        if main_content_div:
+            content_divs = [main_content_div]
+            method = 'largest_div'
+            logger.debug("본문 영역으로 추정되는 div 찾음 (텍스트 길이: %d, 이미지 수: %d)", text_length, img_count)
+    
+    get_metrics().count(f"method.content.{method}")
+    return content_divs
+
+class NaverLayout:
+    """네이버 편집기 세대별 레이아웃: 판별 표식과 레이아웃 전용 제목/날짜/본문 추출기
+
+    하위 클래스는 name과 detect()를 정의하고 필요한 추출기를 재정의합니다. 추출기는 (값, 방법 이름)을
+    반환하며, 레이아웃의 표식을 찾지 못하면 None을 반환하여 공통 추출 순서(extract_title,
+    extract_date, find_content_divs)로 넘깁니다. 기본 클래스는 판별되지 않은 문서(unknown)에 사용됩니다.
+    전용 추출기는 공통 추출 순서의 앞부분 중 해당 레이아웃에 나올 수 있는 방법만 같은 순서로 시도하므로,
+    값을 찾으면 공통 추출 순서로 찾은 값과 같습니다.
+    """
+    
+    name = 'unknown'
+    
+    def detect(self, index):
+        return False
+    
+    def title(self, index):
+        return None
+    
+    def date(self, index):
+        return None
+    
+    def content(self, index):
+        return None
+
+def h3_title(index):
+    """h3 제목 (공통 추출 순서의 방법 1)"""
+    title_tag = index.find('h3')
+    return (title_tag.text, 'h3') if title_tag else None
+
+def se3_textarea_title(index):
+    """h5.se_textarea 제목 (공통 추출 순서의 방법 2)"""
+    title_h5 = index.find('h5', 'se_textarea')
+    return (se3_text_title(title_h5), 'se_textarea') if title_h5 else None
+
+def se3_card_title(index):
+    """se_card_titleView 안의 h5 제목 (공통 추출 순서의 방법 3)"""
+    title_div = index.find('div', 'se_card_titleView')
+    title_h5 = title_div.find('h5') if title_div else None
+    return (title_h5.text, 'se_card_titleView') if title_h5 else None
+
+def border_div_date(index):
+    """border-bottom 스타일 div의 날짜 (공통 추출 순서의 방법 1)"""
+    date_div = find_date_div(index)
+    return (date_div.text, 'border_div') if date_div else None
+
+def publish_date(index):
+    """span.se_publishDate 날짜 (공통 추출 순서의 방법 2)"""
+    date_span = index.find('span', 'se_publishDate')
+    return (date_span.text, 'se_publishDate') if date_span else None
+
+def first_found(index, extractors):
+    """extractors를 순서대로 시도하여 처음 찾은 (값, 방법 이름) 반환"""
+    return next((result for result in (extract(index) for extract in extractors) if result is not None), None)
+
+def class_divs(index, class_names):
+    """class_names 순서대로 해당 클래스의 div 목록을 찾아 처음 찾은 (div 목록, 클래스 이름) 반환"""
+    for class_name in class_names:
+        divs = index.find_all('div', class_name)
+        if divs:
+            return divs, class_name
+    return None
+
+class SE2Layout(NaverLayout):
+    """스마트에디터 2 (h3 제목, border-bottom 날짜 div, se2_in_page 본문)"""
+    
+    name = 'se2'
+    
+    def detect(self, index):
+        return index.has_class('se2_in_page')
+    
+    def title(self, index):
+        return h3_title(index)
+    
+    def date(self, index):
+        return border_div_date(index)
+    
+    def content(self, index):
+        return class_divs(index, ('se2_in_page',))
+
+class SE3CardLayout(NaverLayout):
+    """스마트에디터 3 카드형 (se_card_titleView 제목, se_publishDate 날짜, se_component_wrap/se_card 본문)
+
+    카드형 문서에도 se_textarea/se_textView 요소가 있을 수 있으므로 텍스트형보다 먼저 판별하고,
+    추출기는 공통 추출 순서대로 h3, h5.se_textarea 제목과 se_textView 본문을 먼저 확인합니다.
+    """
+    
+    name = 'se3_card'
+    
+    def detect(self, index):
+        return any(index.has_class(name) for name in ('se_card_titleView', 'se_component_wrap', 'se_card'))
+    
+    def title(self, index):
+        return first_found(index, (h3_title, se3_textarea_title, se3_card_title))
+    
+    def date(self, index):
+        return first_found(index, (border_div_date, publish_date))
+    
+    def content(self, index):
+        return class_divs(index, ('se_textView', 'se_component_wrap', 'se_card'))
+
+class SE3TextLayout(NaverLayout):
+    """스마트에디터 3 텍스트형 (h5.se_textarea 제목, se_publishDate 날짜, se_textView 본문)
+
+    추출기는 공통 추출 순서대로 h3 제목과 border-bottom 날짜 div를 먼저 확인합니다.
+    """
+    
+    name = 'se3_text'
+    
+    def detect(self, index):
+        return index.has_class('se_textView') or index.find('h5', 'se_textarea') is not None
+    
+    def title(self, index):
+        return first_found(index, (h3_title, se3_textarea_title))
+    
+    def date(self, index):
+        return first_found(index, (border_div_date, publish_date))
+    
+    def content(self, index):
+        return class_divs(index, ('se_textView',))
+
+# 판별 순서대로 등록된 레이아웃 (register_layout으로 새 네이버 편집기 변형 추가)
+# se2_in_page가 있는 문서는 SE2로 판별되므로 SE3 추출기는 se2_in_page 본문을 확인하지 않음
+LAYOUT_REGISTRY = [SE2Layout(), SE3CardLayout(), SE3TextLayout()]
+
+# 어느 레이아웃으로도 판별되지 않은 문서
+UNKNOWN_LAYOUT = NaverLayout()
+
+# 레이아웃별 추출 항목 (적중률 보고용)
+LAYOUT_FIELDS = ('title', 'date', 'content')
+
+def register_layout(layout, before=None):
+    """레이아웃을 판별 목록에 등록 (before 이름의 레이아웃 앞에, 없으면 맨 뒤에)
+
+    같은 이름의 레이아웃이 있으면 바꿉니다. 워커 프로세스에서도 사용하려면 모듈을 불러올 때 등록해야 합니다.
+    """
+    LAYOUT_REGISTRY[:] = [registered for registered in LAYOUT_REGISTRY if registered.name != layout.name]
+    names = [registered.name for registered in LAYOUT_REGISTRY]
+    LAYOUT_REGISTRY.insert(names.index(before) if before in names else len(names), layout)
+    return layout
+
+def detect_layout(index):
+    """등록 순서대로 표식을 확인하여 문서의 레이아웃 판별"""
+    return next((layout for layout in LAYOUT_REGISTRY if layout.detect(index)), UNKNOWN_LAYOUT)
+
+def extract_document(soup, default_title, date_str):
+    """문서를 한 번 색인하고 레이아웃을 판별한 뒤 레이아웃 전용 추출기로 제목, 날짜, 태그, 본문 div 추출
+
+    (레이아웃 이름, 제목, 날짜 문자열, 태그 목록, 본문 div 목록)을 반환합니다.
+    전용 추출기가 값을 찾지 못한 항목은 공통 추출 순서로 찾고 layout.<이름>.miss.<항목> 카운터에 기록합니다.
+    """
+    metrics = get_metrics()
+    index = DocumentIndex(soup)
+    layout = detect_layout(index)
+    metrics.count(f"layout.{layout.name}")
+    
+    def dedicated(field):
+        result = getattr(layout, field)(index)
+        if result is None:
+            metrics.count(f"layout.{layout.name}.miss.{field}")
+            return None
+        value, method = result
+        metrics.count(f"method.{field}.{method}")
+        return value
+    
+    title = dedicated('title')
+    if title is None:
+        title = extract_title(index, default_title)
+    
+    date_text = dedicated('date')
+    if date_text is None:
+        date_text = extract_date(index, date_str)
+    
+    # 태그 추출 (본문 수정 전에 같은 트리에서 추출, 백업 파일 공통 형식)
+    tags = extract_tags(index)
+    
+    content_divs = dedicated('content')
+    if content_divs is None:
+        content_divs = find_content_divs(index)
+    
+    return layout.name, title, date_text, tags, content_divs
+
+def layout_report_lines(counters):
+    """레이아웃별 문서 수, 비율과 전용 추출기 적중률 요약 줄 목록"""
+    layouts = {name.split('.', 1)[1]: value for name, value in counters.items()
+               if name.startswith('layout.') and name.count('.') == 1}
+    total = sum(layouts.values())
+    lines = []
+    for name, count in sorted(layouts.items(), key=lambda item: -item[1]):
+        rates = ', '.join(
+            f"{field} {100.0 * (count - counters.get(f'layout.{name}.miss.{field}', 0)) / count:.0f}%"
+            for field in LAYOUT_FIELDS
+        )
+        lines.append(f"{name:<10} {count:6d}개 ({100.0 * count / total:5.1f}%)  적중률: {rates}")
+    return lines
+
+def build_image_candidates(html_file, date_str, post_id, src, img_filename, image_id=None):
+    """이미지 원본 파일의 후보 경로 목록을 우선순위 순서대로 생성
+
+    image_id는 data-image-id 속성에서 추출한 (section_id, img_id) 튜플입니다.
+    """
+    html_dir = os.path.dirname(html_file)
+    post_dir = f"{date_str}_{post_id}"
+    id_filename = f"{image_id[0]}_{image_id[1]}.jpg" if image_id else None
+    
+    return [
+        # 1. HTML 파일과 같은 디렉토리의 image 폴더
+        os.path.join(html_dir, 'image', post_dir, img_filename),
+        # 2. 현재 작업 디렉토리의 image 폴더
+        os.path.join('image', post_dir, img_filename),
+        # 3. 원본 src 경로 그대로 시도
+        src if os.path.isabs(src) else os.path.join(html_dir, src),
+        # 4. POST_ARTICLE_001/image 폴더
+        os.path.join('POST_ARTICLE_001', 'image', post_dir, img_filename),
+        # 5. 이미지 ID 기반 경로
+        os.path.join(html_dir, 'image', post_dir, id_filename) if id_filename else None,
+        os.path.join('image', post_dir, id_filename) if id_filename else None,
+        # 6. 파일명만 사용
+        os.path.join(html_dir, 'image', post_dir, os.path.basename(src)),
+        os.path.join('image', post_dir, os.path.basename(src)),
+        # 7. 사용자가 제공한 형식 (image/20160414_3999621/20160414_3999621_1.JPEG)
+        os.path.join('image', post_dir, f"{post_dir}_1.JPEG"),
+        os.path.join('image', post_dir, f"{post_dir}_1.jpeg"),
+        os.path.join('image', post_dir, f"{post_dir}_1.jpg"),
+        os.path.join('image', post_dir, f"{post_dir}_1.JPG"),
+        os.path.join('image', post_dir, f"{post_dir}_1.png"),
+        os.path.join('image', post_dir, f"{post_dir}_1.PNG"),
+        # 8. 상위 디렉토리의 image 폴더
+        os.path.join(os.path.dirname(html_dir), 'image', post_dir, img_filename),
+        os.path.join(os.path.dirname(html_dir), 'image', post_dir, f"{post_dir}_1.jpg"),
+        # 9. 추가 이미지 번호 시도 (1~5)
+        os.path.join('image', post_dir, f"{post_dir}_2.jpg"),
+        os.path.join('image', post_dir, f"{post_dir}_3.jpg"),
+        os.path.join('image', post_dir, f"{post_dir}_4.jpg"),
+        os.path.join('image', post_dir, f"{post_dir}_5.jpg"),
+        # 10. 다른 확장자 시도
+        os.path.join('image', post_dir, f"{post_dir}.jpg"),
+        os.path.join('image', post_dir, f"{post_dir}.png"),
+        os.path.join('image', post_dir, f"{post_dir}.gif"),
+        # 11. 상위 디렉토리에서 이미지 폴더 직접 시도
+        os.path.join('image', post_dir, img_filename),
+    ]
+
+class ImageLocator:
+    """이미지 디렉토리 인덱스
+
+    각 디렉토리(압축 파일 안의 디렉토리 포함)를 처음 조회할 때 한 번만 읽어 파일명 인덱스를 만들고,
+    이후 조회는 파일 시스템 접근 없이 메모리에서 처리합니다. 디렉토리를 읽기 전에 상위 디렉토리의
+    인덱스(탐색 단계에서 읽은 image 디렉토리 목록 포함)를 확인하므로, 포스트 이미지 디렉토리가 없는
+    후보 경로는 디렉토리를 열어 보지 않고 없는 것으로 판단합니다.
+    """
+    
+    def __init__(self):
+        # 디렉토리 경로 -> (파일명 집합, 소문자 파일명 -> 파일명 목록)
+        self._dirs = {}
+        # 권한 등으로 읽지 못한 디렉토리 (목록으로 하위 디렉토리의 존재를 판단하지 않음)
+        self._unreadable = set()
+        # 입력 디렉토리를 다시 탐색할 때마다 올리는 번호 (워커 프로세스가 오래된 목록을 버리는 기준)
+        self.generation = 0
+    
+    def _scan(self, dir_path):
+        """디렉토리를 한 번 읽어 인덱스 생성 (없는 디렉토리는 빈 인덱스)"""
+        key = os.path.normpath(dir_path) if dir_path else '.'
+        index = self._dirs.get(key)
+        if index is None:
+            names = set()
+            folded = {}
+            if not self._missing_in_parent(key):
+                try:
+                    for entry in scan_input_dir(key):
+                        names.add(entry.name)
+                        folded.setdefault(entry.name.lower(), []).append(entry.name)
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+                except OSError:
+                    self._unreadable.add(key)
+            index = (names, folded)
+            self._dirs[key] = index
+        return index
+    
+    def _missing_in_parent(self, key):
+        """상위 디렉토리 인덱스에 없는 디렉토리인지 확인 (상위 디렉토리도 한 번만 읽음)"""
+        parent, name = os.path.split(key)
+        if not name or name in (os.curdir, os.pardir):
+            return False
+        parent_key = parent or '.'
+        names, folded = self._scan(parent_key)
+        if parent_key in self._unreadable:
+            return False
+        return name not in names and name.lower() not in folded
+    
+    def exists(self, path):
+        """os.path.exists와 같은 결과를 인덱스로 판단"""
+        if not path:
             return False
         
-        # 현재 파일 크기 확인
-        current_size = os.path.getsize(image_path) / (1024 * 1024)  # MB 단위
+        # '..' 등 정규화로 의미가 달라질 수 있는 경로는 직접 확인
+        if os.pardir in path.split(os.sep):
+            return input_exists(path)
         
-        if current_size <= max_size_mb:
-            # 이미 1MB 이하면 그대로 복사
-            shutil.copy2(image_path, output_path)
-            return True
+        dir_path, name = os.path.split(path)
+        if not name:
+            return input_exists(path)
         
-        # 이미지 열기
-        img = Image.open(image_path)
+        names, folded = self._scan(dir_path)
+        if name in names:
+            return True
         
-        # 압축 시도
-        quality = 90
-        while quality > 30:  # 최소 품질 제한
-            img.save(output_path, quality=quality, optimize=True)
-            if os.path.getsize(output_path) / (1024 * 1024) <= max_size_mb:
-                return True
-            quality -= 10
+        # 대소문자를 구분하지 않는 파일 시스템(macOS 등)에서는 대소문자만 다른 파일도 존재로 판단됨
+        if name.lower() in folded:
+            return input_exists(path)
         
-        # 품질을 낮춰도 1MB를 초과하는 경우 크기 조정
-        width, height = img.size
-        ratio = 0.9  # 10% 축소
+        return False
+    
+    def find(self, paths):
+        """후보 경로 중 존재하는 첫 번째 경로 반환 (없으면 None)"""
+        for path in paths:
+            if self.exists(path):
+                return path
+        return None
+    
+    def add_listing(self, dir_path, names):
+        """이미 읽은 디렉토리 목록을 인덱스에 추가 (디렉토리 탐색 결과 재사용)"""
+        key = os.path.normpath(dir_path) if dir_path else '.'
+        if key not in self._dirs:
+            folded = {}
+            for name in names:
+                folded.setdefault(name.lower(), []).append(name)
+            self._dirs[key] = (set(names), folded)
+    
+    def clear(self):
+        """인덱스 초기화 (디렉토리 내용이 바뀐 경우)"""
+        self._dirs.clear()
+        self._unreadable.clear()
+
+# 프로세스별 기본 이미지 인덱스 (여러 포스트가 공유)
+_image_locator = None
+
+def get_image_locator():
+    """프로세스 공용 ImageLocator 반환"""
+    global _image_locator
+    if _image_locator is None:
+        _image_locator = ImageLocator()
+    return _image_locator
+
+def set_image_locator(image_locator):
+    """프로세스 공용 ImageLocator 지정 (변환 워커 프로세스가 Converter의 인덱스를 이어받을 때 사용)"""
+    global _image_locator
+    _image_locator = image_locator
+
+# 포스트 ID 생성용 네임스페이스 (네이버 포스트 ID가 같으면 항상 같은 UUID)
+POST_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'https://post.naver.com/')
+
+def stable_post_id(date_str, post_id):
+    """네이버 포스트 날짜와 ID로 실행마다 같은 Ghost 포스트 ID 생성"""
+    return str(uuid.uuid5(POST_ID_NAMESPACE, f"{date_str}_{post_id}"))
+
+# Ghost 이미지 카드의 sizes 속성 (본문 폭 720px 기준)
+IMAGE_CARD_SIZES = '(min-width: 720px) 720px'
+
+def ghost_size_url(ghost_url, width):
+    """/content/images/<연도>/<파일> 경로를 Ghost의 너비별 이미지 경로로 변환"""
+    return ghost_url.replace('/content/images/', f'/content/images/size/w{width}/', 1)
+
+def image_srcset(ghost_url, width, widths=GHOST_IMAGE_WIDTHS):
+    """원본보다 작은 Ghost 너비별 이미지와 원본으로 srcset 값 생성 (만들 수 없으면 None)"""
+    if not width or not ghost_url.lower().endswith(RESIZABLE_IMAGE_EXTENSIONS):
+        return None
+    candidates = [f"{ghost_size_url(ghost_url, w)} {w}w" for w in sorted(set(widths)) if w < width]
+    if not candidates:
+        return None
+    candidates.append(f"{ghost_url} {width}w")
+    return ', '.join(candidates)
+
+# 이미지 단계에서 압축이 끝나야 크기를 알 수 있는 이미지의 카드 속성 자리 표시 (fill_image_sizes가 채움)
+PENDING_SIZE_PREFIX = 'ghost-pending-size:'
+PENDING_SIZE_FIELDS = ('width', 'height', 'srcset', 'sizes')
+
+def pending_size_token(filename, field):
+    """압축 결과 크기를 기다리는 출력 이미지(filename)의 field 자리 표시"""
+    return f"{PENDING_SIZE_PREFIX}{field}:{filename}"
+
+def fill_image_sizes(post_data, sizes, widths=GHOST_IMAGE_WIDTHS):
+    """본문과 이미지 정보에 남긴 크기 자리 표시를 압축 결과 크기로 채움
+
+    sizes는 출력 파일명 -> (width, height)이며, 저장에 실패한 이미지((None, None))는 크기 속성을 지웁니다.
+    HTML 본문은 srcset/sizes도 결과 너비로 다시 만들고, Mobiledoc/Lexical 문서는 숫자(또는 null)로 바꿉니다.
+    """
+    content = post_data['content']
+    if post_data.get('content_format', 'html') == 'html':
+        escape = str
+    else:
+        # Mobiledoc/Lexical 문서에서는 HTML 카드 안의 속성이 JSON 문자열로 이스케이프되어 있음
+        escape = lambda text: json.dumps(text, ensure_ascii=False)[1:-1]
+    for filename, (width, height) in sizes.items():
+        ghost_url = next((info['ghost_url'] for info in post_data['images']
+                          if info['ghost_url'].endswith('/' + filename)), None)
+        if ghost_url is None:
+            # 이 포스트의 이미지가 아닌 크기 정보는 건너뜀
+            continue
+        values = {}
+        if width and height:
+            values = {'width': str(width), 'height': str(height)}
+            srcset = image_srcset(ghost_url, width, widths)
+            if srcset:
+                values.update(srcset=srcset, sizes=IMAGE_CARD_SIZES)
+        for field in PENDING_SIZE_FIELDS:
+            attribute = escape(f' {field}="{pending_size_token(filename, field)}"')
+            content = content.replace(attribute, escape(f' {field}="{values[field]}"') if field in values else '')
+        # 카드 속성의 크기는 숫자(또는 null)로 기록
+        for field, value in (('width', width), ('height', height)):
+            content = content.replace(json.dumps(pending_size_token(filename, field)), json.dumps(value))
+    post_data['content'] = content
+    
+    for info in post_data['images']:
+        size = sizes.get(os.path.basename(info['ghost_url']))
+        if size:
+            info['width'], info['height'] = size
+    post_data.pop('pending_sizes', None)
+
+def apply_image_card(soup, img, ghost_url, width=None, height=None, widths=GHOST_IMAGE_WIDTHS, pending=False):
+    """img 태그를 Ghost 이미지 카드(figure.kg-card.kg-image-card)로 감싸고 카드 속성 설정
+
+    크기를 알면 width/height와 srcset/sizes를 함께 기록하여 레이아웃 이동 없이 반응형 이미지를 사용합니다.
+    pending이면 (이미지 단계에서 아직 압축 중) 크기 속성에 자리 표시를 넣고 압축 후 fill_image_sizes로 채웁니다.
+    링크로 감싸진 이미지는 링크째 카드에 넣습니다.
+    """
+    img['src'] = ghost_url
+    img['class'] = 'kg-image'
+    img['loading'] = 'lazy'
+    if pending:
+        filename = os.path.basename(ghost_url)
+        for field in PENDING_SIZE_FIELDS:
+            img[field] = pending_size_token(filename, field)
+    elif width and height:
+        img['width'] = str(width)
+        img['height'] = str(height)
+        srcset = image_srcset(ghost_url, width, widths)
+        if srcset:
+            img['srcset'] = srcset
+            img['sizes'] = IMAGE_CARD_SIZES
+    
+    target = img.parent if img.parent is not None and img.parent.name == 'a' else img
+    if target.parent is not None:
+        return target.wrap(soup.new_tag('figure', attrs={'class': 'kg-card kg-image-card'}))
+    figure = soup.new_tag('figure', attrs={'class': 'kg-card kg-image-card'})
+    figure.append(target)
+    return figure
+
+# 공백을 그대로 유지하는 태그
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea', 'script', 'style')
+
+# 내용이 없으면 출력하지 않는 서식/정렬 태그 (네이버 편집기가 남긴 빈 태그)
+EMPTY_DROP_TAGS = ('div', 'span', 'font', 'b', 'strong', 'i', 'em', 'u')
+
+# str(tag)와 같은 출력 형식 (속성 정렬, &/</> 치환)
+HTML_FORMATTER = HTMLFormatter.REGISTRY['minimal']
+
+def is_naver_wrapper(tag):
+    """클래스가 모두 네이버 편집기 전용(se_, se2_, __clip_ 등)인 div인지 확인"""
+    classes = tag.get('class')
+    return tag.name == 'div' and bool(classes) and all(NAVER_WRAPPER_CLASS_RE.match(c) for c in classes)
+
+def render_content_html(nodes, keep_naver_markup=False):
+    """본문 노드를 한 번 순회하며 정리된 Ghost용 HTML로 직렬화
+
+    str(tag)와 같은 형식으로 출력하면서 clean_html의 공백 정리를 텍스트에만 함께 적용하므로
+    직렬화한 문자열을 다시 훑지 않습니다. pre 등의 블록과 속성 값의 공백은 유지합니다.
+    keep_naver_markup이 아니면 주석(SE 편집기 표식), 네이버 래퍼 div(내용만 출력),
+    data-* 속성과 네이버 요소 id, 내용 없는 서식 태그를 출력하지 않습니다.
+    깊게 중첩된 문서에서도 재귀 한도에 걸리지 않도록 명시적인 스택을 사용합니다.
+    """
+    out = []
+    # 공백 정리 전의 연속된 텍스트 (태그가 나오면 정리하여 출력)
+    text = []
+    preserve = 0
+    stack = [(node, False) for node in reversed(nodes)]
+    
+    def flush_text():
+        if text:
+            out.append(MULTI_SPACE_RE.sub(' ', ''.join(text).replace('\n', '')))
+            text.clear()
+    
+    while stack:
+        node, closing = stack.pop()
+        if closing:
+            flush_text()
+            out.append(f'</{node}>')
+            if node in PRESERVE_WHITESPACE_TAGS:
+                preserve -= 1
+            continue
         
-        while ratio > 0.5:  # 최소 50%까지 축소
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-            resized_img.save(output_path, quality=quality, optimize=True)
+        if isinstance(node, Tag):
+            if node.hidden or (not keep_naver_markup and is_naver_wrapper(node)):
+                stack.extend((child, False) for child in reversed(node.contents))
+                continue
+            if (not keep_naver_markup and node.name in EMPTY_DROP_TAGS
+                    and all(isinstance(child, Comment) for child in node.contents)):
+                continue
             
-            if os.path.getsize(output_path) / (1024 * 1024) <= max_size_mb:
-                return True
+            flush_text()
+            name = f'{node.prefix}:{node.name}' if node.prefix else node.name
+            attrs = []
+            for key, value in HTML_FORMATTER.attributes(node):
+                if value is None:
+                    attrs.append(f' {key}')
+                    continue
+                if isinstance(value, (list, tuple)):
+                    value = ' '.join(value)
+                if not keep_naver_markup and (key.startswith('data-') or (key == 'id' and NAVER_ELEMENT_ID_RE.match(str(value)))):
+                    continue
+                attrs.append(f' {key}={HTML_FORMATTER.quoted_attribute_value(HTML_FORMATTER.attribute_value(str(value)))}')
             
-            ratio -= 0.1
+            if node.is_empty_element:
+                out.append(f"<{name}{''.join(attrs)}{HTML_FORMATTER.void_element_close_prefix}>")
+                continue
+            out.append(f"<{name}{''.join(attrs)}>")
+            if name in PRESERVE_WHITESPACE_TAGS:
+                preserve += 1
+            stack.append((name, True))
+            stack.extend((child, False) for child in reversed(node.contents))
+        elif isinstance(node, Comment) and not keep_naver_markup:
+            continue
+        elif preserve:
+            flush_text()
+            out.append(node.output_ready(HTML_FORMATTER))
+        else:
+            text.append(node.output_ready(HTML_FORMATTER))
+    
+    flush_text()
+    return ''.join(out)
+
+# 본문 출력 형식 (html: HTML 본문, mobiledoc/lexical: Ghost 편집기 카드 문서)
+POST_FORMATS = ('html', 'mobiledoc', 'lexical')
+
+MOBILEDOC_VERSION = '0.3.1'
+
+# 카드 문서에서 문단을 나누는 블록 태그
+CARD_BLOCK_TAGS = frozenset(('p', 'div', 'section', 'article', 'header', 'footer', 'center', 'address', 'dl', 'dt', 'dd',
+                             'figure', 'figcaption', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote'))
+
+# 문단 섹션의 종류를 정하는 태그 (나머지 블록의 텍스트는 p 섹션)
+CARD_SECTION_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote')
+
+# 텍스트 서식 태그 -> 카드 문서의 서식 이름
+CARD_INLINE_MARKUPS = {
+    'b': 'strong', 'strong': 'strong', 'i': 'em', 'em': 'em', 'u': 'u',
+    's': 's', 'strike': 's', 'del': 's', 'sup': 'sup', 'sub': 'sub', 'code': 'code',
+}
+
+# 카드로 옮길 수 없어 HTML 카드에 그대로 담는 태그
+CARD_HTML_TAGS = ('table', 'video', 'audio', 'object', 'embed', 'script', 'form', 'svg', 'canvas')
+
+# 카드 문서에 출력하지 않는 태그
+CARD_DROP_TAGS = ('style', 'noscript')
+
+# 임베드 카드로 옮기는 iframe 제공자 (호스트 -> Ghost 임베드 유형, 하위 도메인 포함)
+# 목록에 없는 iframe은 유형을 알 수 없으므로 HTML 카드에 그대로 담음
+EMBED_PROVIDER_TYPES = {
+    'youtube.com': 'video',
+    'youtube-nocookie.com': 'video',
+    'youtu.be': 'video',
+    'vimeo.com': 'video',
+    'dailymotion.com': 'video',
+    'tv.naver.com': 'video',
+    'rmcnmv.naver.com': 'video',
+    'tv.kakao.com': 'video',
+    'twitter.com': 'rich',
+    'instagram.com': 'rich',
+    'soundcloud.com': 'rich',
+    'open.spotify.com': 'rich',
+}
+
+def embed_type(url):
+    """iframe 주소의 제공자로 정한 Ghost 임베드 유형 (video/rich, 알 수 없는 제공자는 None)"""
+    host = (urlsplit(url).hostname or '').lower()
+    while host:
+        if host in EMBED_PROVIDER_TYPES:
+            return EMBED_PROVIDER_TYPES[host]
+        host = host.partition('.')[2]
+    return None
+
+# 한 갤러리로 묶는 네이버 이미지 묶음 클래스
+GALLERY_CLASS_RE = re.compile(r'imageStrip|imageGroup|collage|gallery', re.I)
+
+# Ghost 갤러리 카드의 최대 이미지 수와 한 줄의 이미지 수
+GALLERY_MAX_IMAGES = 9
+GALLERY_ROW_IMAGES = 3
+
+# Lexical 텍스트 노드의 서식 비트
+LEXICAL_TEXT_FORMATS = {'strong': 1, 'em': 2, 's': 4, 'u': 8, 'code': 16, 'sub': 32, 'sup': 64}
+
+def normalize_card_runs(runs):
+    """텍스트 조각의 줄바꿈 제거와 연속 공백 정리
+
+    조각 경계를 넘는 공백도 하나로 합치고, 서식이 같은 인접 조각은 병합하며,
+    문단 앞뒤와 줄바꿈 앞뒤의 공백, 앞뒤 줄바꿈은 제거합니다.
+    """
+    out = []
+    # 직전 출력이 공백이거나 줄의 시작인지
+    space = True
+    for run in runs:
+        if run[0] == 'break':
+            if out and out[-1][0] == 'text':
+                out[-1] = ('text', out[-1][1].rstrip(), out[-1][2])
+                if not out[-1][1]:
+                    out.pop()
+            out.append(run)
+            space = True
+            continue
         
-        # 최대한 압축했지만 여전히 1MB 초과하는 경우
-        print(f"Warning: Could not compress image below 1MB: {image_path}")
-        shutil.copy2(image_path, output_path)
-        return True
+        text = MULTI_SPACE_RE.sub(' ', run[1].replace('\n', ''))
+        if space and text[:1].isspace():
+            text = text[1:]
+        if not text:
+            continue
+        if out and out[-1][0] == 'text' and out[-1][2] == run[2]:
+            out[-1] = ('text', out[-1][1] + text, run[2])
+        else:
+            out.append(('text', text, run[2]))
+        space = text[-1].isspace()
     
-    except Exception as e:
-        print(f"Error compressing image {image_path}: {e}")
-        return False
+    while out and out[0][0] == 'break':
+        out.pop(0)
+    while out:
+        if out[-1][0] == 'break':
+            out.pop()
+            continue
+        out[-1] = ('text', out[-1][1].rstrip(), out[-1][2])
+        if out[-1][1]:
+            break
+        out.pop()
+    return out
+
+def image_card_section(src, width=None, height=None, alt='', title='', href=None, group=None):
+    """이미지 카드 섹션 (group이 같은 연속된 이미지는 갤러리로 묶을 수 있음)"""
+    return {'type': 'image', 'src': src, 'width': width, 'height': height, 'alt': alt or '', 'title': title or '',
+            'href': href, 'group': group}
 
-def extract_tags_from_html(html_content):
-    """HTML 내용에서 태그 추출"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def group_gallery_sections(sections):
+    """같은 묶음에서 연속으로 나온 이미지 카드를 갤러리 카드로 합치기
+
+    모든 이미지의 크기를 알고 링크가 없어야 하며, Ghost 갤러리 최대 이미지 수씩 나누고 하나만 남으면 이미지 카드로 둡니다.
+    """
+    out = []
+    run = []
     
-    # 태그 추출 방법 1: backup_post_tags 클래스에서 추출
-    tags_div = soup.find('div', class_='backup_post_tags')
-    if tags_div:
-        tag_spans = tags_div.find_all('span', class_='backup_post_tag')
-        tags = [span.text.strip().replace('#', '') for span in tag_spans]
-        return tags
+    def flush():
+        for start in range(0, len(run), GALLERY_MAX_IMAGES):
+            chunk = run[start:start + GALLERY_MAX_IMAGES]
+            if len(chunk) > 1:
+                out.append({'type': 'gallery', 'images': chunk})
+            else:
+                out.extend(chunk)
+        run.clear()
     
-    # 태그 추출 방법 2: 시리즈 제목에서 추출
-    series_title = soup.find('div', class_='backup_post_series_title')
-    if series_title and series_title.text:
-        return [series_title.text.strip().replace('#', '')]
+    for section in sections:
+        galleriable = (section['type'] == 'image' and section['group'] is not None and section['width']
+                       and section['height'] and not section['href'])
+        if run and not (galleriable and section['group'] == run[-1]['group']):
+            flush()
+        if galleriable:
+            run.append(section)
+        else:
+            out.append(section)
+    flush()
+    return out
+
+def build_card_sections(nodes, images=None, keep_naver_markup=False):
+    """본문 노드를 Ghost 편집기 카드 문서의 섹션 목록으로 변환 (mobiledoc/lexical 공용 중간 형식)
+
+    텍스트는 문단/제목/인용 섹션(서식이 적용된 텍스트 조각과 줄바꿈의 목록)과 목록 섹션으로,
+    이미지는 이미지 카드로 바꾸고 문단 안의 이미지는 문단을 나누어 꺼냅니다. 네이버 이미지 묶음이나
+    텍스트 없이 한 블록에 나란히 놓인 이미지는 갤러리 카드로, 알려진 제공자의 iframe은 임베드 카드,
+    pre는 코드 카드, hr은 구분선 카드로 바꾸고, 표나 동영상처럼 카드로 옮길 수 없는 요소는 HTML 카드에 담습니다.
+    images는 ghost_url -> 이미지 정보(width/height) 사전입니다.
+    render_content_html과 같이 명시적인 스택으로 순회합니다.
+    """
+    images = images or {}
+    sections = []
+    # 현재 문단의 텍스트 조각 ('text', 텍스트, 서식) / ('break',)
+    runs = []
+    # 열려 있는 서식, 문단 섹션 태그, 목록 태그, 갤러리 묶음 (블록 id, 이미지 묶음 여부)
+    marks = []
+    blocks = []
+    lists = []
+    groups = []
+    # 작성 중인 목록 섹션
+    current_list = None
     
-    # 태그 추출 방법 3: 본문 내용에서 해시태그 추출
-    content_divs = soup.find_all('div', class_='se2_in_page')
-    if content_divs:
-        hashtag_pattern = r'#([^\s#]+)'
-        all_text = ' '.join([div.get_text() for div in content_divs])
-        hashtags = re.findall(hashtag_pattern, all_text)
-        if hashtags:
-            return hashtags
+    def flush_text():
+        if runs:
+            normalized = normalize_card_runs(runs)
+            if normalized:
+                sections.append({'type': 'text', 'tag': blocks[-1] if blocks else 'p', 'runs': normalized})
+            runs.clear()
     
-    return []
+    def list_item(new=False):
+        nonlocal current_list
+        if current_list is None:
+            current_list = {'type': 'list', 'tag': lists[0], 'items': []}
+        if new or not current_list['items']:
+            current_list['items'].append([])
+        return current_list['items'][-1]
+    
+    def close_list():
+        nonlocal current_list
+        if current_list is not None:
+            items = [item for item in map(normalize_card_runs, current_list['items']) if item]
+            if items:
+                sections.append(dict(current_list, items=items))
+            current_list = None
+    
+    def boundary():
+        # 목록 안의 블록 경계는 항목 안의 줄바꿈으로 처리
+        if lists:
+            item = list_item()
+            if item and item[-1][0] != 'break':
+                item.append(('break',))
+        else:
+            flush_text()
+    
+    def add_run(run):
+        (list_item() if lists else runs).append(run)
+    
+    def add_card(section):
+        if lists:
+            # 목록 안의 카드는 목록을 나누어 출력하고 나머지 항목은 새 목록으로 이어감
+            close_list()
+        else:
+            flush_text()
+        sections.append(section)
+    
+    stack = [(node, None) for node in reversed(nodes)]
+    while stack:
+        node, closing = stack.pop()
+        if closing is not None:
+            block, mark, section_tag, list_tag = closing
+            if mark:
+                marks.pop()
+            if block:
+                boundary()
+                groups.pop()
+            if section_tag:
+                blocks.pop()
+            if list_tag:
+                lists.pop()
+                if not lists:
+                    close_list()
+            continue
+        
+        if isinstance(node, Tag):
+            name = node.name
+            if node.hidden:
+                stack.extend((child, None) for child in reversed(node.contents))
+                continue
+            if name in CARD_DROP_TAGS:
+                continue
+            if name == 'br':
+                add_run(('break',))
+                continue
+            if name == 'img':
+                src = node.get('src')
+                if src:
+                    info = images.get(src) or {}
+                    href = next((mark[1] for mark in reversed(marks) if mark[0] == 'a'), None)
+                    add_card(image_card_section(src, info.get('width'), info.get('height'), node.get('alt'),
+                                                node.get('title'), href, groups[-1][0] if groups else None))
+                continue
+            if name == 'hr':
+                add_card({'type': 'hr'})
+                continue
+            if name == 'iframe':
+                src = node.get('src')
+                if src:
+                    url = f"https:{src}" if src.startswith('//') else src
+                    provider_type = embed_type(url)
+                    if provider_type:
+                        add_card({'type': 'embed', 'url': url, 'embed_type': provider_type,
+                                  'html': render_content_html([node], keep_naver_markup)})
+                    else:
+                        add_card({'type': 'html', 'html': render_content_html([node], keep_naver_markup)})
+                continue
+            if name == 'pre':
+                add_card({'type': 'code', 'code': node.get_text()})
+                continue
+            if name in CARD_HTML_TAGS:
+                add_card({'type': 'html', 'html': render_content_html([node], keep_naver_markup)})
+                continue
+            
+            list_tag = name in ('ul', 'ol')
+            block = list_tag or name == 'li' or name in CARD_BLOCK_TAGS
+            section_tag = name in CARD_SECTION_TAGS
+            mark = None
+            if name == 'a' and node.get('href'):
+                mark = ('a', node['href'])
+            elif name in CARD_INLINE_MARKUPS:
+                mark = (CARD_INLINE_MARKUPS[name],)
+            
+            if list_tag:
+                if lists:
+                    boundary()
+                else:
+                    flush_text()
+                lists.append(name)
+            elif name == 'li' and lists:
+                list_item(new=True)
+            elif block:
+                boundary()
+            if block:
+                # 이미지 카드의 figure는 감싼 블록의 묶음을 그대로 사용
+                if groups and (groups[-1][1] or name == 'figure'):
+                    groups.append(groups[-1])
+                else:
+                    classes = node.get('class') or ()
+                    groups.append((id(node), any(GALLERY_CLASS_RE.search(c) for c in classes)))
+            if section_tag:
+                blocks.append(name)
+            if mark:
+                marks.append(mark)
+            
+            stack.append((node, (block, bool(mark), section_tag, list_tag)))
+            stack.extend((child, None) for child in reversed(node.contents))
+        elif isinstance(node, NavigableString) and (type(node) is NavigableString or isinstance(node, CData)):
+            add_run(('text', str(node), tuple(dict.fromkeys(marks))))
+    
+    close_list()
+    flush_text()
+    return group_gallery_sections(sections)
+
+def card_image_payload(section, card_width=''):
+    """이미지 카드 섹션의 Ghost 카드 속성"""
+    payload = {'src': section['src'], 'width': section['width'], 'height': section['height'],
+               'title': section['title'], 'alt': section['alt'], 'caption': '', 'cardWidth': card_width}
+    if section['href']:
+        payload['href'] = section['href']
+    return payload
+
+def card_gallery_images(section):
+    """갤러리 카드의 이미지 목록 (한 줄에 GALLERY_ROW_IMAGES개씩 배치)"""
+    return [{'fileName': os.path.basename(image['src']), 'row': index // GALLERY_ROW_IMAGES,
+             'width': image['width'], 'height': image['height'], 'src': image['src'],
+             'alt': image['alt'], 'caption': ''}
+            for index, image in enumerate(section['images'])]
+
+def mobiledoc_document(sections):
+    """카드 섹션 목록을 Mobiledoc 문서(dict)로 변환"""
+    atoms = []
+    cards = []
+    markups = []
+    markup_index = {}
+    doc_sections = []
+    
+    def markup_id(mark):
+        if mark not in markup_index:
+            markup_index[mark] = len(markups)
+            markups.append(['a', ['href', mark[1]]] if mark[0] == 'a' else [mark[0]])
+        return markup_index[mark]
+    
+    def markers(runs):
+        result = []
+        open_marks = ()
+        for run in runs:
+            run_marks = run[2] if run[0] == 'text' else ()
+            common = 0
+            while common < min(len(open_marks), len(run_marks)) and open_marks[common] == run_marks[common]:
+                common += 1
+            if result:
+                result[-1][2] = len(open_marks) - common
+            opened = [markup_id(mark) for mark in run_marks[common:]]
+            if run[0] == 'text':
+                result.append([0, opened, 0, run[1]])
+            else:
+                atoms.append(['soft-return', '', {}])
+                result.append([1, opened, 0, len(atoms) - 1])
+            open_marks = run_marks
+        if result:
+            result[-1][2] = len(open_marks)
+        return result
+    
+    def card(name, payload):
+        cards.append([name, payload])
+        doc_sections.append([10, len(cards) - 1])
+    
+    for section in sections:
+        kind = section['type']
+        if kind == 'text':
+            doc_sections.append([1, section['tag'], markers(section['runs'])])
+        elif kind == 'list':
+            doc_sections.append([3, section['tag'], [markers(item) for item in section['items']]])
+        elif kind == 'image':
+            card('image', card_image_payload(section))
+        elif kind == 'gallery':
+            card('gallery', {'images': card_gallery_images(section), 'caption': ''})
+        elif kind == 'embed':
+            card('embed', {'url': section['url'], 'html': section['html'], 'type': section['embed_type']})
+        elif kind == 'code':
+            card('code', {'code': section['code']})
+        elif kind == 'hr':
+            card('hr', {})
+        else:
+            card('html', {'html': section['html']})
+    
+    return {'version': MOBILEDOC_VERSION, 'atoms': atoms, 'cards': cards, 'markups': markups, 'sections': doc_sections}
+
+def lexical_element(node_type, children, **fields):
+    """Lexical 요소 노드 (root, paragraph, heading, quote, list, listitem, link)"""
+    return dict({'children': children, 'direction': 'ltr', 'format': '', 'indent': 0, 'type': node_type, 'version': 1},
+                **fields)
+
+def lexical_inline_nodes(runs):
+    """텍스트 조각을 Lexical 텍스트/줄바꿈 노드로 변환 (같은 링크의 연속된 조각은 link 노드 하나로 묶음)"""
+    children = []
+    link = None
+    for run in runs:
+        if run[0] == 'break':
+            node = {'type': 'linebreak', 'version': 1}
+            href = None
+        else:
+            node = {'detail': 0, 'format': sum(LEXICAL_TEXT_FORMATS.get(mark[0], 0) for mark in run[2]),
+                    'mode': 'normal', 'style': '', 'text': run[1], 'type': 'text', 'version': 1}
+            href = next((mark[1] for mark in run[2] if mark[0] == 'a'), None)
+        if href is None:
+            link = None
+            children.append(node)
+            continue
+        if link is None or link['url'] != href:
+            link = lexical_element('link', [], rel=None, target=None, title=None, url=href)
+            children.append(link)
+        link['children'].append(node)
+    return children
+
+def lexical_document(sections):
+    """카드 섹션 목록을 Lexical 문서(dict)로 변환"""
+    children = []
+    for section in sections:
+        kind = section['type']
+        if kind == 'text':
+            tag = section['tag']
+            inline = lexical_inline_nodes(section['runs'])
+            if tag == 'p':
+                children.append(lexical_element('paragraph', inline))
+            elif tag == 'blockquote':
+                children.append(lexical_element('quote', inline))
+            else:
+                children.append(lexical_element('heading', inline, tag=tag))
+        elif kind == 'list':
+            items = [lexical_element('listitem', lexical_inline_nodes(item), value=index)
+                     for index, item in enumerate(section['items'], 1)]
+            children.append(lexical_element('list', items, listType='bullet' if section['tag'] == 'ul' else 'number',
+                                            start=1, tag=section['tag']))
+        elif kind == 'image':
+            children.append(dict({'type': 'image', 'version': 1}, **card_image_payload(section, 'regular')))
+        elif kind == 'gallery':
+            children.append({'type': 'gallery', 'version': 1, 'images': card_gallery_images(section), 'caption': ''})
+        elif kind == 'embed':
+            children.append({'type': 'embed', 'version': 1, 'url': section['url'], 'embedType': section['embed_type'],
+                             'html': section['html'], 'metadata': {}, 'caption': ''})
+        elif kind == 'code':
+            children.append({'type': 'codeblock', 'version': 1, 'code': section['code'], 'language': '', 'caption': ''})
+        elif kind == 'hr':
+            children.append({'type': 'horizontalrule', 'version': 1})
+        else:
+            children.append({'type': 'html', 'version': 1, 'html': section['html']})
+    return {'root': lexical_element('root', children)}
+
+def card_document(sections, post_format):
+    """카드 섹션 목록을 post_format(mobiledoc/lexical) 문서의 JSON 문자열로 직렬화"""
+    document = mobiledoc_document(sections) if post_format == 'mobiledoc' else lexical_document(sections)
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+
+def process_html_file(html_file, output_dir, parser=None, image_locator=None, use_image_cache=True, defer_images=False,
+                      max_html_bytes=None, image_cards=True, output_format='jpeg', image_widths=GHOST_IMAGE_WIDTHS,
+                      image_variants=False, keep_naver_markup=False, post_format='html'):
+    """HTML 파일 처리
 
-def process_html_file(html_file, output_dir):
-    """HTML 파일 처리"""
+    문서는 한 번만 파싱되며, 같은 트리를 제목/날짜/태그/본문/이미지 단계가 공유합니다.
+    defer_images이면 이미지를 저장하지 않고 저장 작업 목록을 post_data['image_jobs']로 반환합니다.
+    이때 압축으로 크기가 바뀌는 이미지의 카드 크기는 자리 표시로 남기고 출력 파일명을 post_data['pending_sizes']에
+    기록하므로, 호출한 쪽에서 압축이 끝난 뒤 fill_image_sizes로 채워야 합니다.
+    max_html_bytes를 지정하면 이를 넘는 HTML 파일은 읽지 않고 건너뜁니다 (None 반환).
+    image_cards이면 이미지를 크기 정보가 포함된 Ghost 이미지 카드로 출력하며, srcset은 image_widths 너비를 사용합니다.
+    output_format은 이미지 출력 형식 정책이고, image_variants이면 image_widths 너비별 이미지 파일도 생성합니다.
+    본문은 render_content_html로 직렬화하며, keep_naver_markup이면 네이버 편집기 주석과 래퍼를 그대로 둡니다.
+    post_format이 mobiledoc/lexical이면 같은 본문 div를 Ghost 편집기 카드 문서로 변환하여 JSON 문자열로 반환합니다.
+    """
+    metrics = get_metrics()
     try:
         # 파일명에서 정보 추출
         filename = os.path.basename(html_file)
-        match = re.match(r'(\d+)_(\d+)_(.+)\.html', filename)
+        match = POST_FILENAME_RE.match(filename)
         if not match:
-            print(f"Warning: Could not parse filename: {filename}")
+            logger.warning("Warning: Could not parse filename: %s", filename)
             return None
         
         date_str, post_id, title_slug = match.groups()
-        print(f"파일명 파싱: {date_str}, {post_id}, {title_slug}")
+        logger.debug("파일명 파싱: %s, %s, %s", date_str, post_id, title_slug)
         
-        # HTML 파일 읽기
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        # HTML 파일 읽기 (메모리 맵에서 인코딩 판별 후 바이트 사본 없이 문자열로 디코딩)
+        with metrics.stage('read'):
+            source = read_html_source(html_file, max_html_bytes)
         
-        print(f"HTML 파일 크기: {len(html_content)} 바이트")
+        if source is None:
+            metrics.count('files.skipped_large')
+            logger.warning("Warning: HTML 파일이 최대 크기(%.1fMB)를 넘어 건너뜁니다: %s (%.1fMB)",
+                           max_html_bytes / (1024 * 1024), html_file, input_size(html_file) / (1024 * 1024))
+            return None
         
-        # HTML 파싱
-        soup = BeautifulSoup(html_content, 'html.parser')
+        html_content, encoding, encoding_method = source
+        html_size = input_size(html_file)
+        logger.debug("HTML 파일 크기: %d 바이트, 인코딩: %s (%s)", html_size, encoding, encoding_method)
+        metrics.count('bytes.html_in', html_size)
+        metrics.count(f"encoding.{encoding}")
         
-        # 제목 추출 (여러 방법 시도)
-        title = title_slug  # 기본값으로 파일명에서 추출한 제목 사용
+        # HTML 파싱 (문서당 한 번)
+        with metrics.stage('parse'):
+            soup = parse_html(html_content, parser, encoding)
+        del html_content, source
         
-        # 방법 1: h3 태그에서 찾기
-        title_tag = soup.find('h3')
-        if title_tag:
-            title = title_tag.text
-        else:
-            # 방법 2: se_sectionTitle 클래스의 h5 태그에서 찾기
-            title_h5 = soup.find('h5', class_='se_textarea')
-            if title_h5:
-                # HTML 주석 처리 (<!-- SE3-TEXT { -->내용<!-- } SE3-TEXT -->)
-                title_text = title_h5.text
-                if '<!-- SE3-TEXT { -->' in title_text and '<!-- } SE3-TEXT -->' in title_text:
-                    title = title_text.split('<!-- SE3-TEXT { -->')[1].split('<!-- } SE3-TEXT -->')[0]
-                else:
-                    title = title_text
-            else:
-                # 방법 3: se_card_titleView 클래스의 div 안에서 찾기
-                title_div = soup.find('div', class_='se_card_titleView')
-                if title_div:
-                    title_h5 = title_div.find('h5')
-                    if title_h5:
-                        title = title_h5.text
-        
-        print(f"제목: {title}")
-        
-        # 날짜 추출 (여러 방법 시도)
-        date_text = ''
-        
-        # 방법 1: border-bottom: solid 스타일을 가진 div에서 찾기
-        date_div = soup.find('div', style=lambda s: s and 'border-bottom: solid' in s)
-        if date_div:
-            date_text = date_div.text
-        else:
-            # 방법 2: se_publishDate 클래스를 가진 span에서 찾기
-            date_span = soup.find('span', class_='se_publishDate')
-            if date_span:
-                date_text = date_span.text
-            else:
-                # 방법 3: 파일명에서 날짜 추출 (20160202 -> 2016.02.02)
-                if date_str and len(date_str) >= 8:
-                    year = date_str[:4]
-                    month = date_str[4:6]
-                    day = date_str[6:8]
-                    date_text = f"{year}.{month}.{day}. 00:00"
-        
-        print(f"날짜: {date_text}")
-        
-        # 태그 추출
-        tags = extract_tags_from_html(html_content)
-        print(f"추출된 태그: {tags}")
-        
-        # 본문 내용 추출 (여러 클래스 시도)
-        content_divs = []
-        
-        # 방법 1: se2_in_page 클래스의 div 찾기 (기존 방식)
-        se2_divs = soup.find_all('div', class_='se2_in_page')
-        if se2_divs:
-            content_divs = se2_divs
-            print(f"se2_in_page div 수: {len(content_divs)}")
-        
-        # 방법 2: se_textView 클래스의 div 찾기
-        if not content_divs:
-            se_textview_divs = soup.find_all('div', class_='se_textView')
-            if se_textview_divs:
-                content_divs = se_textview_divs
-                print(f"se_textView div 수: {len(content_divs)}")
-        
-        # 방법 3: se_component_wrap 클래스의 div 찾기 (이미지 포함 가능성 높음)
-        if not content_divs:
-            se_component_divs = soup.find_all('div', class_='se_component_wrap')
-            if se_component_divs:
-                content_divs = se_component_divs
-                print(f"se_component_wrap div 수: {len(content_divs)}")
-        
-        # 방법 4: se_card 클래스의 div 찾기 (이미지 카드 포함)
-        if not content_divs:
-            se_card_divs = soup.find_all('div', class_='se_card')
-            if se_card_divs:
-                content_divs = se_card_divs
-                print(f"se_card div 수: {len(content_divs)}")
-        
-        # 방법 5: se_textarea 클래스의 p 태그 직접 찾기
-        if not content_divs:
-            p_tags = soup.find_all('p', class_='se_textarea')
-            if p_tags:
-                print(f"se_textarea p 태그 수: {len(p_tags)}")
-                # p 태그를 div로 감싸서 content_divs에 추가
-                content_div = soup.new_tag('div')
-                for p in p_tags:
-                    content_div.append(p)
-                content_divs = [content_div]
-        
-        # 방법 6: 본문 영역으로 추정되는 div 찾기 (마지막 수단)
-        if not content_divs:
-            # 본문 영역으로 추정되는 div 찾기 (예: 큰 div 중에서 이미지나 텍스트가 많은 div)
-            main_content_div = None
-            max_content_length = 0
-            
-            for div in soup.find_all('div'):
-                # div 내의 텍스트 및 이미지 태그 수 확인
-                text_length = len(div.get_text())
-                img_count = len(div.find_all('img'))
-                content_length = text_length + img_count * 100  # 이미지에 가중치 부여
-                
-                if content_length > max_content_length:
-                    max_content_length = content_length
-                    main_content_div = div
-            
-            if main_content_div:
-                content_divs = [main_content_div]
-                print(f"본문 영역으로 추정되는 div 찾음 (텍스트 길이: {len(main_content_div.get_text())}, 이미지 수: {len(main_content_div.find_all('img'))})")
+        with metrics.stage('extract'):
+            # 레이아웃 판별 후 제목, 날짜, 태그, 본문 추출 (문서당 한 번 색인)
+            layout, title, date_text, tags, content_divs = extract_document(soup, title_slug, date_str)
+            logger.debug("레이아웃: %s", layout)
+            logger.debug("제목: %s", title)
+            logger.debug("날짜: %s", date_text)
+            logger.debug("추출된 태그: %s", tags)
         
-        print(f"최종 선택된 본문 div 수: {len(content_divs)}")
+        logger.debug("최종 선택된 본문 div 수: %d", len(content_divs))
         
         # 이미지 태그 처리
         first_image = None
@@ -266,160 +2687,184 @@ def process_html_file(html_file, output_dir):
         
         # 2. 본문 div에서 이미지를 찾지 못한 경우, 전체 HTML에서 이미지 태그 찾기
         if not content_img_tags:
-            print("본문 div에서 이미지를 찾지 못했습니다. 전체 HTML에서 이미지 태그를 찾습니다.")
+            logger.debug("본문 div에서 이미지를 찾지 못했습니다. 전체 HTML에서 이미지 태그를 찾습니다.")
             content_img_tags = soup.find_all('img')
         
-        print(f"처리할 이미지 태그 수: {len(content_img_tags)}")
+        logger.debug("처리할 이미지 태그 수: %d", len(content_img_tags))
+        
+        # 이미지 파일 탐색 인덱스
+        if image_locator is None:
+            image_locator = get_image_locator()
+        
+        # 이미지 변환 캐시 (출력 디렉토리에 저장)
+        image_cache = get_image_cache(output_dir) if use_image_cache else None
+        
+        # 마지막으로 추출된 이미지 ID (이후 이미지의 ID 기반 후보 경로에도 사용됨)
+        image_id = None
+        
+        # defer_images인 경우 실행하지 않은 이미지 저장 작업과 압축 결과 크기를 기다리는 출력 파일명
+        image_jobs = []
+        pending_sizes = []
+        
+        # 저장 후 만들 너비별 이미지
+        variant_widths = image_widths if image_variants else ()
         
         # 이미지 태그 처리
         for img in content_img_tags:
             if 'src' in img.attrs:
                     # 원본 이미지 경로
                     src = img['src']
-                    print(f"이미지 src: {src}")
+                    logger.debug("이미지 src: %s", src)
                     
                     # 이미지 파일명 추출
                     if src.startswith('image/'):
                         img_filename = os.path.basename(src)
-                        print(f"이미지 파일명(image/ 시작): {img_filename}")
+                        logger.debug("이미지 파일명(image/ 시작): %s", img_filename)
                     else:
-                        # 이미지 ID 추출 시도
-                        img_id_match = re.search(r'data-image-id="(\d+)_(\d+)"', str(img))
+                        # 이미지 ID 추출 시도 (태그를 문자열로 직렬화하지 않고 속성 값을 직접 확인)
+                        img_id_match = IMAGE_ID_RE.fullmatch(img.get('data-image-id') or '')
                         if img_id_match:
                             section_id, img_id = img_id_match.groups()
+                            image_id = (section_id, img_id)
                             img_filename = f"{date_str}_{post_id}_{section_id}_{img_id}.jpg"
-                            print(f"이미지 파일명(ID 추출): {img_filename}")
+                            logger.debug("이미지 파일명(ID 추출): %s", img_filename)
                         else:
                             # 고유한 이미지 파일명 생성
                             img_filename = f"{date_str}_{post_id}_{uuid.uuid4().hex}.jpg"
-                            print(f"이미지 파일명(UUID 생성): {img_filename}")
+                            logger.debug("이미지 파일명(UUID 생성): %s", img_filename)
                     
                     # 원본 이미지 경로 시도 (여러 가능한 경로)
-                    possible_paths = [
-                        # 1. HTML 파일과 같은 디렉토리의 image 폴더
-                        os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", img_filename),
-                        # 2. 현재 작업 디렉토리의 image 폴더
-                        os.path.join('image', f"{date_str}_{post_id}", img_filename),
-                        # 3. 원본 src 경로 그대로 시도
-                        src if os.path.isabs(src) else os.path.join(os.path.dirname(html_file), src),
-                        # 4. POST_ARTICLE_001/image 폴더
-                        os.path.join('POST_ARTICLE_001', 'image', f"{date_str}_{post_id}", img_filename),
-                        # 5. 이미지 ID 기반 경로
-                        os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", f"{section_id}_{img_id}.jpg") if 'section_id' in locals() else None,
-                        os.path.join('image', f"{date_str}_{post_id}", f"{section_id}_{img_id}.jpg") if 'section_id' in locals() else None,
-                        # 6. 파일명만 사용
-                        os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", os.path.basename(src)),
-                        os.path.join('image', f"{date_str}_{post_id}", os.path.basename(src)),
-                        # 7. 사용자가 제공한 형식 (image/20160414_3999621/20160414_3999621_1.JPEG)
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.JPEG"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpeg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.JPG"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.png"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.PNG"),
-                        # 8. 상위 디렉토리의 image 폴더
-                        os.path.join(os.path.dirname(os.path.dirname(html_file)), 'image', f"{date_str}_{post_id}", img_filename),
-                        os.path.join(os.path.dirname(os.path.dirname(html_file)), 'image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpg"),
-                        # 9. 추가 이미지 번호 시도 (1~5)
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_2.jpg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_3.jpg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_4.jpg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_5.jpg"),
-                        # 10. 다른 확장자 시도
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.jpg"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.png"),
-                        os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.gif"),
-                        # 11. 상위 디렉토리에서 이미지 폴더 직접 시도
-                        os.path.join('image', f"{date_str}_{post_id}", img_filename),
-                    ]
+                    possible_paths = build_image_candidates(html_file, date_str, post_id, src, img_filename, image_id)
                     
-                    # 가능한 경로 중 존재하는 첫 번째 경로 사용
-                    original_img_path = None
-                    for path in possible_paths:
-                        if path and os.path.exists(path):
-                            original_img_path = path
-                            print(f"이미지 파일 발견: {path}")
-                            break
-                    
-                    if not original_img_path:
-                        print(f"이미지 파일을 찾을 수 없음: {img_filename}")
-                        print("시도한 경로:")
-                        for path in possible_paths:
-                            if path:
-                                print(f"  - {path}")
+                    # 가능한 경로 중 존재하는 첫 번째 경로 사용 (디렉토리 인덱스 조회)
+                    with metrics.stage('image_resolve'):
+                        original_img_path = image_locator.find(possible_paths)
+                    if original_img_path:
+                        metrics.count('images.found')
+                        logger.debug("이미지 파일 발견: %s", original_img_path)
+                    else:
+                        metrics.count('images.missing')
+                        logger.info("이미지 파일을 찾을 수 없음: %s (후보 경로 %d개)", img_filename, len([p for p in possible_paths if p]))
                     
                     # 연도 추출 (date_str에서 첫 4자리)
                     year = date_str[:4]
                     
-                    # Ghost 블로그용 이미지 경로 (연도별 폴더 추가)
-                    ghost_img_filename = f"{date_str}_{post_id}_{uuid.uuid4().hex}.jpg"
-                    year_images_dir = os.path.join(output_dir, 'images', year)
-                    
                     # 연도별 이미지 디렉토리 생성
+                    year_images_dir = os.path.join(output_dir, 'images', year)
                     os.makedirs(year_images_dir, exist_ok=True)
                     
-                    ghost_img_path = os.path.join(year_images_dir, ghost_img_filename)
-                    
-                    # 이미지 압축 및 복사
-                    if original_img_path and os.path.exists(original_img_path):
-                        compress_image(original_img_path, ghost_img_path)
+                    # 이미지 압축 및 복사 (내용 해시 기반 파일명, 캐시 재사용)
+                    if original_img_path:
+                        if defer_images:
+                            # 저장은 이미지 단계에 맡기고 출력 파일명만 먼저 결정
+                            with metrics.stage('image_plan'):
+                                job = plan_image(original_img_path, year_images_dir, image_cache,
+                                                 output_format=output_format, variant_widths=variant_widths)
+                            image_jobs.append(job)
+                        else:
+                            job = store_image(original_img_path, year_images_dir, image_cache,
+                                              output_format=output_format, variant_widths=variant_widths)
+                        
+                        ghost_url = f"/content/images/{year}/{job['filename']}"
+                        width, height = job['width'], job['height']
+                        # 압축으로 크기가 바뀌는 이미지는 원본 크기를 쓰지 않고, 이미지 단계의 압축 결과를 기다림
+                        pending = (defer_images and job['action'] == 'compress' and width is None
+                                   and (image_cards or post_format != 'html'))
+                        if pending:
+                            pending_sizes.append(job['filename'])
+                            width, height = (pending_size_token(job['filename'], 'width'),
+                                             pending_size_token(job['filename'], 'height'))
                         
                         # 이미지 경로 수정 (연도 정보 추가)
-                        img['src'] = f"/content/images/{year}/{ghost_img_filename}"
+                        if image_cards:
+                            apply_image_card(soup, img, ghost_url, width, height, image_widths, pending)
+                            metrics.count('images.cards')
+                        else:
+                            img['src'] = ghost_url
                         
                         # 이미지 정보 저장
                         images.append({
                             'original_path': original_img_path,
-                            'ghost_path': ghost_img_path,
-                            'ghost_url': f"/content/images/{year}/{ghost_img_filename}"
+                            'ghost_path': job['output_path'],
+                            'ghost_url': ghost_url,
+                            'digest': job['digest'],
+                            'width': width,
+                            'height': height
                         })
                         
                         # 첫 번째 이미지 저장
                         if first_image is None:
                             first_image = img
-                            first_image_path = f"/content/images/{year}/{ghost_img_filename}"
-                    else:
-                        print(f"Warning: Image file not found: {original_img_path}")
+                            first_image_path = ghost_url
         
         # 본문 HTML 생성 - 이미지 경로 변환에 집중
-        # 이미지 태그가 본문에 포함되어 있는지 확인
-        has_images_in_content = any('<img' in str(div) for div in content_divs)
-        
-        # 본문 HTML 생성
-        content_html = ''.join(str(div) for div in content_divs)
-        
-        # 이미지가 본문에 없지만 이미지가 발견된 경우, 이미지를 본문에 추가
-        if not has_images_in_content and images:
-            print("본문 HTML에 이미지 태그가 없지만 이미지가 발견되었습니다. 이미지를 본문에 추가합니다.")
-            
-            # 이미지 HTML 생성
-            image_html = "<div class='ghost-image-container'>\n"
-            for img_info in images:
-                image_html += f'<div><img src="{img_info["ghost_url"]}" alt="{title}" class="ghost-image"></div>\n'
-            image_html += "</div>\n"
-            
-            # 기존 본문 HTML에 이미지 HTML 추가
-            content_html += image_html
-            
-            print(f"이미지 {len(images)}개를 본문에 추가했습니다.")
+        with metrics.stage('serialize'):
+            if post_format != 'html':
+                # 본문 div를 Ghost 편집기 카드 문서로 변환 (가져올 때 HTML 카드 변환을 거치지 않음)
+                sections = build_card_sections(content_divs, {info['ghost_url']: info for info in images}, keep_naver_markup)
+                
+                # 이미지 카드가 본문에 없지만 이미지가 발견된 경우, 이미지 카드를 본문에 추가
+                if images and not any(section['type'] in ('image', 'gallery') for section in sections):
+                    logger.debug("본문에 이미지 카드가 없지만 이미지가 발견되었습니다. 이미지 카드를 본문에 추가합니다.")
+                    sections.extend(image_card_section(info['ghost_url'], info['width'], info['height'], title)
+                                    for info in images)
+                
+                for section in sections:
+                    metrics.count(f"sections.{section['type']}")
+                content = card_document(sections, post_format)
+            else:
+                # 본문 HTML 생성 (직렬화와 공백 정리, 네이버 전용 마크업 제거를 한 번의 순회로 처리)
+                content = render_content_html(content_divs, keep_naver_markup)
+                
+                # 이미지 태그가 본문에 포함되어 있는지 확인 (div마다 다시 직렬화하지 않고 생성된 HTML에서 확인)
+                has_images_in_content = '<img' in content
+                
+                # 이미지가 본문에 없지만 이미지가 발견된 경우, 이미지를 본문에 추가
+                if not has_images_in_content and images:
+                    logger.debug("본문 HTML에 이미지 태그가 없지만 이미지가 발견되었습니다. 이미지를 본문에 추가합니다.")
+                    
+                    # 이미지 컨테이너를 트리로 만들어 본문과 같은 직렬화 사용
+                    container = soup.new_tag('div', attrs={'class': 'ghost-image-container'})
+                    for img_info in images:
+                        if image_cards:
+                            card = apply_image_card(soup, soup.new_tag('img', attrs={'alt': title}), img_info['ghost_url'],
+                                                    img_info['width'], img_info['height'], image_widths,
+                                                    os.path.basename(img_info['ghost_url']) in pending_sizes)
+                            container.append(card)
+                        else:
+                            wrapper = soup.new_tag('div')
+                            wrapper.append(soup.new_tag('img', attrs={'src': img_info['ghost_url'], 'alt': title, 'class': 'ghost-image'}))
+                            container.append(wrapper)
+                    
+                    # 기존 본문 HTML에 이미지 HTML 추가
+                    content += render_content_html([container], keep_naver_markup)
+                    
+                    logger.debug("이미지 %d개를 본문에 추가했습니다.", len(images))
         
         # Ghost 블로그 포스트 데이터 생성
         post_data = {
             'title': title,
             'date': date_text,
             'tags': tags,  # 추출된 태그 목록
-            'content': content_html,
+            'content': content,  # post_format 형식의 본문 (html: HTML, mobiledoc/lexical: 문서 JSON 문자열)
+            'content_format': post_format,
             'feature_image': first_image_path,
             'images': images,
             'slug': create_slug(title),
-            'id': str(uuid.uuid4()),
-            'published_at': parse_date(date_text)
+            'id': stable_post_id(date_str, post_id),
+            'published_at': parse_date(date_text),
+            'content_clean': True
         }
         
+        if defer_images:
+            post_data['image_jobs'] = image_jobs
+            if pending_sizes:
+                post_data['pending_sizes'] = pending_sizes
+        
         return post_data
     
     except Exception as e:
-        print(f"Error processing HTML file {html_file}: {e}")
+        logger.error("Error processing HTML file %s: %s", html_file, e)
         return None
 
 def clean_text(text):
@@ -433,25 +2878,69 @@ def clean_text(text):
     text = text.replace('\\n', '').replace('\\', '')
     
     # 두 번 이상 연속으로 반복되는 공백 제거 (단일 공백으로 대체)
-    text = re.sub(r'\s{2,}', ' ', text)
+    text = MULTI_SPACE_RE.sub(' ', text)
     
     return text
 
 def clean_html(html):
     """
-    HTML 본문에서 줄바꿈(\n)과 백슬래시(\) 제거 및 중복 공백 제거
+    HTML 본문에서 줄바꿈(\n) 제거 및 중복 공백 제거
     HTML 태그 내부 구조는 유지
+
+    문자열을 한 번 훑으며 태그 밖의 텍스트만 정리합니다. pre/textarea/script/style 블록과
+    따옴표로 감싼 속성 값의 공백은 그대로 두고, 주석(네이버 편집기 표식 등)은 제거합니다.
     """
     if not isinstance(html, str):
         return html
     
-    # 실제 줄바꿈 문자 제거
-    html = re.sub(r'\n', '', html)
+    out = []
+    # 주석을 사이에 둔 텍스트는 이어서 하나로 정리
+    text = []
+    position = 0
     
-    # 두 번 이상 연속으로 반복되는 공백 제거 (단일 공백으로 대체)
-    html = re.sub(r'\s{2,}', ' ', html)
+    for match in HTML_CLEAN_TOKEN_RE.finditer(html):
+        text.append(html[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        if token.startswith('<!--'):
+            continue
+        
+        # 실제 줄바꿈 문자 제거 후 두 번 이상 연속으로 반복되는 공백 제거 (단일 공백으로 대체)
+        out.append(MULTI_SPACE_RE.sub(' ', ''.join(text).replace('\n', '')))
+        text.clear()
+        
+        if match.group(1):
+            out.append(token)
+        else:
+            out.append(TAG_SPACE_RE.sub(lambda m: m.group(1) or ' ', token))
+    
+    text.append(html[position:])
+    out.append(MULTI_SPACE_RE.sub(' ', ''.join(text).replace('\n', '')))
+    return ''.join(out)
+
+def clean_post(post, with_html=True):
+    """포스트 하나의 제목과 본문 정제 (with_html이 False이면 이미 정리된 본문은 건너뜀)"""
+    # title 처리
+    if 'title' in post:
+        post['title'] = clean_text(post['title'])
+    
+    # html 본문 처리
+    if with_html and 'html' in post:
+        post['html'] = clean_html(post['html'])
+    
+    return post
+
+def clean_tag(tag):
+    """태그 하나의 이름과 설명 정제"""
+    # name 처리
+    if 'name' in tag:
+        tag['name'] = clean_text(tag['name'])
+    
+    # description 처리
+    if 'description' in tag:
+        tag['description'] = clean_text(tag['description'])
     
-    return html
+    return tag
 
 def clean_json_data(data):
     """JSON 데이터 정제"""
@@ -460,136 +2949,923 @@ def clean_json_data(data):
         
         # posts 배열이 있는지 확인
         if 'posts' in db_data:
-            posts = db_data['posts']
-            
             # 각 포스트 처리
-            for post in posts:
-                # title 처리
-                if 'title' in post:
-                    post['title'] = clean_text(post['title'])
-                
-                # html 본문 처리
-                if 'html' in post:
-                    post['html'] = clean_html(post['html'])
+            for post in db_data['posts']:
+                clean_post(post)
         
         # tags 배열이 있는지 확인
         if 'tags' in db_data:
-            tags = db_data['tags']
-            
             # 각 태그 처리
-            for tag in tags:
-                # name 처리
-                if 'name' in tag:
-                    tag['name'] = clean_text(tag['name'])
-                
-                # description 처리
-                if 'description' in tag:
-                    tag['description'] = clean_text(tag['description'])
+            for tag in db_data['tags']:
+                clean_tag(tag)
     
     return data
 
-def create_ghost_json(posts, output_file):
-    """Ghost 블로그 JSON 파일 생성"""
-    # 태그 정보 수집 및 ID 할당
-    tags = {}
-    tag_id = 1
-    
-    for post in posts:
-        for tag_name in post.get('tags', []):
-            if tag_name and tag_name not in tags:
-                tags[tag_name] = {
-                    'id': tag_id,
-                    'name': tag_name,
-                    'slug': create_slug(tag_name),
-                    'description': ''
-                }
-                tag_id += 1
-    
-    # posts_tags 관계 생성
-    posts_tags = []
-    for post in posts:
-        post_id = post['id']
-        for tag_name in post.get('tags', []):
-            if tag_name and tag_name in tags:
-                posts_tags.append({
-                    'post_id': post_id,
-                    'tag_id': tags[tag_name]['id']
-                })
-    
-    # Ghost 블로그 JSON 구조 생성
-    ghost_data = {
-        "db": [
-            {
-                "meta": {
-                    "exported_on": int(time.time() * 1000),
-                    "version": "4.0.0"
-                },
-                "data": {
-                    "posts": [],
-                    "tags": list(tags.values()),
-                    "posts_tags": posts_tags
-                }
-            }
-        ]
-    }
+# 스트리밍 정제 시 값 전체를 읽지 않고 항목 단위로 내려가는 경로 (clean_json_data가 정제하는 위치)
+CLEAN_STREAM_PATHS = {(), ('db',), ('db', 0), ('db', 0, 'data'), ('db', 0, 'data', 'posts'), ('db', 0, 'data', 'tags')}
+JSON_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+class JsonStreamReader:
+    """JSON 텍스트를 조각 단위로 읽으며 구조 문자와 값을 하나씩 꺼내는 reader
+
+    값은 json.JSONDecoder.raw_decode로 해석하므로 버퍼에는 현재 값과 읽기 조각만 유지됩니다.
+    """
+    
+    def __init__(self, f, chunk_size=1 << 16):
+        self._file = f
+        self.chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+    
+    def _fill(self):
+        """버퍼에 다음 조각 추가 (값이 길면 읽는 크기를 늘림), 더 읽을 내용이 없으면 False"""
+        chunk = self._file.read(max(self.chunk_size, len(self._buf) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+    
+    def peek(self):
+        """공백을 건너뛰고 다음 문자 반환 (끝이면 빈 문자열)"""
+        while True:
+            self._pos = JSON_WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+    
+    def take(self, char):
+        """다음 문자가 char인지 확인하고 건너뜀"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON 형식 오류: '{char}' 대신 '{found}'")
+        self._pos += 1
+    
+    def value(self):
+        """다음 JSON 값 하나를 읽어 반환"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # 버퍼 끝에서 끝난 숫자/리터럴은 잘렸을 수 있으므로 더 읽은 뒤 다시 해석
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._eof:
+                    raise
+            self._fill()
+
+def stream_clean_value(reader, write, level=0, path=()):
+    """reader에서 값 하나를 읽어 정제한 뒤 json.dump(indent=2)와 같은 형식으로 기록
+
+    CLEAN_STREAM_PATHS에 해당하는 객체/배열은 항목 단위로 내려가며 처리하므로
+    포스트와 태그는 한 번에 하나씩만 메모리에 유지됩니다.
+    """
+    opening = reader.peek()
+    if path not in CLEAN_STREAM_PATHS or opening not in ('{', '['):
+        value = reader.value()
+        if len(path) == 5 and isinstance(path[4], int) and isinstance(value, dict):
+            if path[3] == 'posts':
+                clean_post(value)
+            else:
+                clean_tag(value)
+        write(dump_json_indented(value, level))
+        return
     
-    print(f"JSON 생성 중... 포스트 수: {len(posts)}")
+    closing = '}' if opening == '{' else ']'
+    reader.take(opening)
+    if reader.peek() == closing:
+        reader.take(closing)
+        write(opening + closing)
+        return
     
-    for i, post in enumerate(posts):
-        print(f"포스트 {i+1} 처리 중:")
-        print(f"  제목: {post['title']}")
-        print(f"  태그: {post['tags']}")
-        print(f"  이미지 수: {len(post['images'])}")
-        print(f"  본문 길이: {len(post['content'])}")
+    write(opening)
+    index = 0
+    while True:
+        write(('\n' if index == 0 else ',\n') + '  ' * (level + 1))
+        if opening == '{':
+            key = reader.value()
+            reader.take(':')
+            write(json.dumps(key, ensure_ascii=False) + ': ')
+            child = path + (key,)
+        else:
+            child = path + (index,)
+        stream_clean_value(reader, write, level + 1, child)
+        index += 1
         
-        # Ghost 블로그 포스트 데이터 생성
-        post_data = {
-            "id": post['id'],
-            "title": post['title'],
-            "slug": post['slug'],
-            "mobiledoc": None,
-            "html": post['content'],
-            "feature_image": post['feature_image'],
-            "featured": False,
-            "status": "published",
-            "published_at": post['published_at'],
-            "created_at": post['published_at'],
-            "updated_at": post['published_at']
+        separator = reader.peek()
+        reader.take(separator if separator in (',', closing) else ',')
+        if separator == closing:
+            break
+    write('\n' + '  ' * level + closing)
+
+def clean_json_file(json_path):
+    """JSON 파일을 스트리밍으로 정제하여 임시 파일에 쓴 뒤 원본과 교체
+
+    (파일 경로, 정제 전 크기, 정제 후 크기, 소요 시간)을 반환합니다.
+    정제 중 오류가 나면 임시 파일만 삭제되고 원본은 그대로 남습니다.
+    """
+    start = time.perf_counter()
+    size_before = os.path.getsize(json_path)
+    tmp_path = f"{json_path}.{os.getpid()}.tmp"
+    try:
+        with open(json_path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+            reader = JsonStreamReader(src)
+            stream_clean_value(reader, dst.write)
+            if reader.peek():
+                raise ValueError("JSON 형식 오류: 최상위 값 뒤에 내용이 있습니다")
+        os.replace(tmp_path, json_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return json_path, size_before, os.path.getsize(json_path), time.perf_counter() - start
+
+def ghost_post_record(post):
+    """변환된 포스트 데이터를 Ghost 블로그 포스트 레코드로 변환
+
+    본문이 mobiledoc/lexical 문서이면 해당 필드에 넣고 html은 비워 두어 Ghost가 가져올 때
+    HTML을 편집기 형식으로 다시 변환하지 않게 합니다 (html은 Ghost가 문서에서 생성).
+    """
+    content_format = post.get('content_format', 'html')
+    record = {
+        "id": post['id'],
+        "title": post['title'],
+        "slug": post['slug'],
+        "mobiledoc": post['content'] if content_format == 'mobiledoc' else None,
+    }
+    if content_format == 'lexical':
+        record["lexical"] = post['content']
+    record.update({
+        "html": post['content'] if content_format == 'html' else None,
+        "feature_image": post['feature_image'],
+        "featured": False,
+        "status": "published",
+        "published_at": post['published_at'],
+        "created_at": post['published_at'],
+        "updated_at": post['published_at']
+    })
+    return record
+
+def dump_json_indented(obj, level):
+    """json.dump(indent=2)로 전체 문서를 쓸 때와 같은 형식으로 중첩 위치의 값을 직렬화"""
+    text = json.dumps(obj, ensure_ascii=False, indent=2)
+    return text.replace('\n', '\n' + '  ' * level)
+
+# 연도별 내보내기에서 공유하는 태그 목록 파일 (출력 디렉토리에 저장)
+TAG_REGISTRY_FILENAME = 'ghost-tags.json'
+TAG_REGISTRY_VERSION = 1
+
+class TagRegistry:
+    """태그 이름별 ID와 슬러그를 한 번만 할당하는 태그 목록
+
+    태그는 처음 등록된 순서대로 1부터 ID를 받고, 슬러그가 이미 다른 태그에 쓰였으면
+    -2, -3 ... 을 붙여 구분합니다 (등록 순서가 같으면 항상 같은 결과).
+    파일로 저장하고 다시 읽을 수 있으므로 여러 연도의 내보내기에서 같은 태그는 같은 ID와 슬러그를 가집니다.
+    """
+    
+    def __init__(self):
+        # 태그 이름 -> {'id', 'name', 'slug', 'description'}
+        self._tags = {}
+        self._slugs = set()
+        self._next_id = 1
+    
+    def __len__(self):
+        return len(self._tags)
+    
+    def __iter__(self):
+        return iter(self._tags.values())
+    
+    def _unique_slug(self, slug, tag_id):
+        if not slug:
+            slug = f"tag-{tag_id}"
+        candidate, suffix = slug, 2
+        while candidate in self._slugs:
+            candidate = f"{slug}-{suffix}"
+            suffix += 1
+        if candidate != slug:
+            get_metrics().count('tags.slug_collisions')
+        return candidate
+    
+    def _add(self, name, tag_id, slug):
+        tag = {'id': tag_id, 'name': name, 'slug': slug, 'description': ''}
+        self._tags[name] = tag
+        self._slugs.add(slug)
+        self._next_id = max(self._next_id, tag_id + 1)
+        return tag
+    
+    def get(self, name):
+        """태그 이름에 해당하는 태그 반환 (처음 보는 이름이면 새 ID와 슬러그로 등록)"""
+        tag = self._tags.get(name)
+        if tag is None:
+            name = sys.intern(name)
+            tag_id = self._next_id
+            tag = self._add(name, tag_id, self._unique_slug(create_slug(name), tag_id))
+        return tag
+    
+    def post_tags(self, names):
+        """포스트의 태그 이름 목록을 태그 목록으로 변환 (빈 이름과 중복 제거, 순서 유지)"""
+        tags = []
+        seen = set()
+        for name in names:
+            if not name:
+                continue
+            if name in seen:
+                get_metrics().count('tags.duplicates_removed')
+                continue
+            seen.add(name)
+            tags.append(self.get(name))
+        return tags
+    
+    def merge(self, other):
+        """다른 태그 목록의 태그를 ID 순서대로 추가 (이미 있는 이름은 기존 ID와 슬러그 유지)"""
+        for tag in sorted(other, key=lambda t: t['id']):
+            self.get(tag['name'])
+        return self
+    
+    @classmethod
+    def load(cls, path):
+        """저장된 태그 목록 읽기 (파일이 없거나 형식이 다르면 빈 목록)"""
+        registry = cls()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError:
+                logger.warning("경고: 태그 목록 파일을 읽을 수 없어 새로 만듭니다: %s", path)
+                data = {}
+            if data.get('version') == TAG_REGISTRY_VERSION:
+                for tag in sorted(data.get('tags', []), key=lambda t: t['id']):
+                    registry._add(sys.intern(tag['name']), tag['id'], tag['slug'])
+        return registry
+    
+    def save(self, path):
+        """태그 목록을 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = {
+            'version': TAG_REGISTRY_VERSION,
+            'tags': [{'id': tag['id'], 'name': tag['name'], 'slug': tag['slug']} for tag in self._tags.values()]
         }
-        ghost_data["db"][0]["data"]["posts"].append(post_data)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+class GhostJsonWriter:
+    """Ghost 블로그 JSON 파일을 포스트 단위로 스트리밍하여 쓰는 writer
+
+    포스트는 추가되는 즉시 정제되어 파일에 기록되므로 본문 HTML을 메모리에 모아 두지 않습니다.
+    태그와 posts_tags 관계(이름과 ID만 포함)는 posts 배열 뒤에 기록해야 하므로 닫을 때 씁니다.
+    출력 형식은 전체 데이터를 json.dump(indent=2)로 쓴 결과와 같습니다.
+    같은 디렉토리의 임시 파일에 쓰고 close에서 output_file과 교체하므로, 쓰는 도중 오류가 나면(abort)
+    이전 실행의 output_file이 그대로 남습니다.
+    tag_registry(TagRegistry)를 여러 writer가 공유하면 파일을 나누어 쓰거나 연도별로 따로 써도
+    같은 태그는 같은 ID와 슬러그를 가지며, 각 파일에는 해당 파일의 포스트가 사용하는 태그만 기록됩니다.
+    """
+    
+    # posts 배열 이후 파일 끝까지의 고정 부분 크기 (크기 추정용)
+    CLOSING_BYTES = len('\n        ],\n        "tags": [],\n        "posts_tags": []\n      }\n    }\n  ]\n}')
+    
+    def __init__(self, output_file, exported_on=None, tag_registry=None):
+        self.output_file = output_file
+        self.exported_on = exported_on if exported_on is not None else int(time.time() * 1000)
+        # ID와 슬러그 할당용 태그 목록 (여러 파일이 공유 가능)
+        self.tag_registry = tag_registry if tag_registry is not None else TagRegistry()
+        # 이 파일에 기록할 태그
+        self.tags = {}
+        self.posts_tags = []
+        self.post_count = 0
+        # 이 파일의 포스트가 사용하는 이미지 (ghost_url -> 출력 파일 경로)
+        self.images = {}
+        # 기록한 바이트 수와 닫을 때 기록할 태그/관계의 예상 바이트 수
+        self.bytes_written = 0
+        self.pending_bytes = 0
+        self._tmp_path = f"{output_file}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        meta = dump_json_indented({"exported_on": self.exported_on, "version": "4.0.0"}, 3)
+        self._write(
+            '{\n  "db": [\n    {\n'
+            f'      "meta": {meta},\n'
+            '      "data": {\n        "posts": ['
+        )
+    
+    def _write(self, text):
+        self._file.write(text)
+        self.bytes_written += len(text.encode('utf-8'))
+    
+    @staticmethod
+    def encode_post(post):
+        """포스트 하나를 정제하여 posts 배열 항목 위치의 JSON 문자열로 직렬화"""
+        metrics = get_metrics()
+        with metrics.stage('clean'):
+            # render_content_html로 만든 본문은 이미 정리되어 있으므로 제목만 정제
+            record = clean_post(ghost_post_record(post), with_html=not post.get('content_clean'))
+        with metrics.stage('json'):
+            return dump_json_indented(record, 5)
+    
+    @staticmethod
+    def _array_item_bytes(item, first):
+        """tags/posts_tags 배열에 항목 하나를 추가할 때 늘어나는 바이트 수 (close에서 쓰는 형식과 같음)"""
+        size = len(('\n          ' + dump_json_indented(item, 5)).encode('utf-8'))
+        # 빈 배열([])의 첫 항목은 닫는 줄의 줄바꿈과 들여쓰기('\n        ')를, 이후 항목은 앞의 쉼표를 추가
+        return size + (9 if first else 1)
+    
+    def _new_tag_bytes(self, post):
+        """포스트를 추가할 때 늘어나는 태그/관계 바이트 수
+
+        닫을 때 기록할 태그와 posts_tags 항목을 같은 형식으로 직렬화하여 계산합니다.
+        처음 보는 태그는 이때 tag_registry에 등록되어 ID를 받습니다 (add_post에서 같은 ID 사용).
+        """
+        size = 0
+        tag_count = len(self.tags)
+        link_count = len(self.posts_tags)
+        for tag_name in dict.fromkeys(name for name in post.get('tags', []) if name):
+            tag = self.tag_registry.get(tag_name)
+            if tag['name'] not in self.tags:
+                size += self._array_item_bytes(clean_tag(dict(tag)), not tag_count)
+                tag_count += 1
+            size += self._array_item_bytes({'post_id': post['id'], 'tag_id': tag['id']}, not link_count)
+            link_count += 1
+        return size
+    
+    def projected_size(self, post, record_text):
+        """post를 추가하고 닫았을 때의 파일 크기 (바이트)"""
+        return (self.bytes_written + 12 + len(record_text.encode('utf-8')) + self.pending_bytes
+                + self._new_tag_bytes(post) + self.CLOSING_BYTES)
+    
+    def add_post(self, post, record_text=None):
+        """포스트 하나를 정제하여 기록하고 태그 정보를 누적"""
+        logger.debug("포스트 %d 처리 중:", self.post_count + 1)
+        logger.debug("  제목: %s", post['title'])
+        logger.debug("  태그: %s", post['tags'])
+        logger.debug("  이미지 수: %d", len(post['images']))
+        logger.debug("  본문 길이: %d", len(post['content']))
+        
+        if record_text is None:
+            record_text = self.encode_post(post)
+        self.pending_bytes += self._new_tag_bytes(post)
+        
+        # 태그 ID 할당 및 posts_tags 관계 생성 (포스트 안에서 중복된 태그는 한 번만 연결)
+        for tag in self.tag_registry.post_tags(post.get('tags', [])):
+            self.tags.setdefault(tag['name'], tag)
+            self.posts_tags.append({
+                'post_id': post['id'],
+                'tag_id': tag['id']
+            })
+        
+        for image in post.get('images', []):
+            self.images.setdefault(image['ghost_url'], image['ghost_path'])
+        
+        # 포스트 단위 정제 후 기록
+        with get_metrics().stage('json'):
+            self._write(',\n' if self.post_count else '\n')
+            self._write('          ' + record_text)
+        self.post_count += 1
+    
+    def close(self):
+        """posts 배열을 닫고 태그와 posts_tags 관계를 기록한 뒤 임시 파일을 output_file로 교체"""
+        if self._file is None:
+            return
+        
+        try:
+            tags = [clean_tag(dict(tag)) for tag in self.tags.values()]
+            self._write('\n        ]' if self.post_count else ']')
+            self._write(f',\n        "tags": {dump_json_indented(tags, 4)}')
+            self._write(f',\n        "posts_tags": {dump_json_indented(self.posts_tags, 4)}')
+            self._write('\n      }\n    }\n  ]\n}')
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, self.output_file)
+        finally:
+            self.abort()
+    
+    def abort(self):
+        """마무리하지 않고 임시 파일 삭제 (output_file은 바뀌지 않음)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def shard_path_for(json_file, index):
+    """ghost-export-<year>.json을 나눈 index번째 파일 경로 (ghost-export-<year>-001.json)"""
+    base, ext = os.path.splitext(json_file)
+    return f"{base}-{index:03d}{ext}"
+
+def remove_stale_exports(json_file, keep=()):
+    """이전 실행에서 만든 같은 연도의 내보내기 파일 중 keep에 없는 파일 삭제
+
+    분할하지 않은 ghost-export-<year>.json/.zip과 분할 파일 ghost-export-<year>-NNN.json/.zip이 대상이며,
+    분할 여부를 바꾸거나 분할 파일 수가 줄어도 디렉토리 전체를 가져올 때 포스트가 중복되지 않게 합니다.
+    출력 디렉토리를 관리하는 Converter.export_year가 연도의 새 파일을 모두 쓴 뒤에 호출하므로,
+    쓰는 도중 오류가 나면 이전 내보내기가 그대로 남습니다 (create_ghost_json 등은 다른 파일을 지우지 않음).
+    """
+    out_dir = os.path.dirname(json_file) or '.'
+    base = os.path.splitext(os.path.basename(json_file))[0]
+    pattern = re.compile(re.escape(base) + r'(?:-\d{3})?\.(?:json|zip)')
+    keep = {os.path.abspath(path) for path in keep}
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if pattern.fullmatch(name) and os.path.abspath(path) not in keep:
+            os.remove(path)
+            logger.info("이전 내보내기 파일 삭제: %s", path)
+
+class ShardedGhostJsonWriter:
+    """포스트를 최대 크기/포스트 수 기준으로 여러 Ghost JSON 파일에 나누어 기록
+
+    각 파일은 해당 파일의 포스트가 사용하는 태그와 posts_tags 관계만 포함하므로 따로 가져올 수 있으며,
+    태그 ID는 모든 파일에서 같습니다. 포스트 하나가 최대 크기보다 크면 해당 포스트만 담은 파일을 만듭니다.
+    """
+    
+    def __init__(self, output_file, max_bytes=None, max_posts=None, exported_on=None, tag_registry=None):
+        self.output_file = output_file
+        self.max_bytes = max_bytes
+        self.max_posts = max_posts
+        self.exported_on = exported_on if exported_on is not None else int(time.time() * 1000)
+        self.tag_registry = tag_registry if tag_registry is not None else TagRegistry()
+        # 완료된 파일 목록: {'path', 'post_count', 'size', 'images'}
+        self.shards = []
+        self.post_count = 0
+        self._writer = None
+    
+    def _open(self):
+        path = shard_path_for(self.output_file, len(self.shards) + 1)
+        self._writer = GhostJsonWriter(path, self.exported_on, self.tag_registry)
+        return self._writer
+    
+    def _finish(self):
+        writer = self._writer
+        writer.close()
+        self.shards.append({
+            'path': writer.output_file,
+            'post_count': writer.post_count,
+            'size': writer.bytes_written,
+            'images': writer.images
+        })
+        logger.info("  분할 파일: %s (포스트 %d개, %.2f KB)", writer.output_file, writer.post_count,
+                    writer.bytes_written / 1024)
+        self._writer = None
+    
+    def add_post(self, post):
+        writer = self._writer or self._open()
+        record_text = writer.encode_post(post)
+        if writer.post_count and (
+                (self.max_posts and writer.post_count >= self.max_posts)
+                or (self.max_bytes and writer.projected_size(post, record_text) > self.max_bytes)):
+            self._finish()
+            writer = self._open()
+        writer.add_post(post, record_text)
+        self.post_count += 1
+    
+    def close(self):
+        """마지막 분할 파일 마무리"""
+        if self._writer is not None:
+            self._finish()
+    
+    def abort(self):
+        """작성 중인 분할 파일을 마무리하지 않고 삭제"""
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_import_zip(shard, zip_path=None):
+    """분할 JSON 파일과 해당 포스트의 이미지를 Ghost 가져오기용 zip 파일로 기록
+
+    이미지는 zip 안의 content/images/<연도>/ 경로에 저장되며, 파일 내용은 조각 단위로 복사되어
+    이미지 전체를 메모리에 올리지 않습니다. 이미 압축된 이미지는 다시 압축하지 않고 저장합니다.
+    """
+    json_path = shard['path']
+    zip_path = zip_path or os.path.splitext(json_path)[0] + '.zip'
+    tmp_path = f"{zip_path}.{os.getpid()}.tmp"
+    missing = 0
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        archive.write(json_path, os.path.basename(json_path), compress_type=zipfile.ZIP_DEFLATED)
+        for ghost_url, ghost_path in shard['images'].items():
+            if os.path.exists(ghost_path):
+                archive.write(ghost_path, ghost_url.lstrip('/'))
+            else:
+                missing += 1
+    os.replace(tmp_path, zip_path)
+    if missing:
+        logger.warning("경고: %s에 포함하지 못한 이미지 %d개 (파일 없음)", zip_path, missing)
+    return zip_path
+
+def create_ghost_json(posts, output_file, tag_registry=None):
+    """Ghost 블로그 JSON 파일 생성
+
+    posts는 리스트뿐 아니라 변환 결과를 차례로 내보내는 이터레이터도 받을 수 있으며,
+    이 경우 한 번에 포스트 하나만 메모리에 유지됩니다.
+    tag_registry를 넘기면 다른 연도의 내보내기와 태그 ID/슬러그를 공유합니다.
+    """
+    if isinstance(posts, list):
+        logger.info("JSON 생성 중... 포스트 수: %d", len(posts))
+    else:
+        logger.info("JSON 생성 중... (스트리밍)")
     
-    # JSON 데이터 정제
-    ghost_data = clean_json_data(ghost_data)
+    with GhostJsonWriter(output_file, tag_registry=tag_registry) as writer:
+        for post in posts:
+            writer.add_post(post)
     
-    print(f"JSON 파일 생성: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(ghost_data, f, ensure_ascii=False, indent=2)
+    logger.info("JSON 파일 생성: %s (포스트 %d개)", output_file, writer.post_count)
     
     # 생성된 JSON 파일 크기 확인
     if os.path.exists(output_file):
-        file_size = os.path.getsize(output_file) / 1024  # KB 단위
-        print(f"JSON 파일 크기: {file_size:.2f} KB")
+        file_size = os.path.getsize(output_file)
+        get_metrics().count('bytes.json_out', file_size)
+        logger.info("JSON 파일 크기: %.2f KB", file_size / 1024)
         
         # 내용 확인 (처음 100자)
-        with open(output_file, 'r', encoding='utf-8') as f:
-            content = f.read(100)
-            print(f"JSON 파일 내용 미리보기: {content}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            with open(output_file, 'r', encoding='utf-8') as f:
+                logger.debug("JSON 파일 내용 미리보기: %s...", f.read(100))
     
     return output_file
 
+def create_sharded_ghost_json(posts, output_file, max_bytes=None, max_posts=None, tag_registry=None):
+    """Ghost 블로그 JSON을 최대 크기/포스트 수 기준으로 나누어 생성하고 분할 파일 목록 반환
+
+    파일명은 output_file에 번호를 붙인 ghost-export-<year>-001.json 형식입니다.
+    """
+    logger.info("JSON 생성 중... (최대 %s, 최대 포스트 %s개씩 분할)",
+                f"{max_bytes / (1024 * 1024):g}MB" if max_bytes else '-', max_posts or '-')
+    
+    with ShardedGhostJsonWriter(output_file, max_bytes, max_posts, tag_registry=tag_registry) as writer:
+        for post in posts:
+            writer.add_post(post)
+    
+    get_metrics().count('bytes.json_out', sum(shard['size'] for shard in writer.shards))
+    logger.info("JSON 파일 %d개 생성 (포스트 %d개)", len(writer.shards), writer.post_count)
+    return writer.shards
+
+# 매니페스트 형식/변환 결과 버전 (변환 결과가 달라지는 변경 시 올려서 기존 기록 무효화)
+MANIFEST_VERSION = 6
+
+def manifest_path_for(json_file):
+    """ghost-export-<year>.json 옆에 저장되는 매니페스트 파일 경로"""
+    return os.path.splitext(json_file)[0] + '.manifest.jsonl'
+
+class ConversionManifest:
+    """HTML 파일별 변환 기록 (JSON Lines)
+
+    각 줄에 원본 파일의 크기, 수정 시각, 해시와 변환된 포스트 데이터(이미지 출력 포함)를 기록합니다.
+    변환이 끝난 파일마다 한 줄씩 바로 추가하므로 중간에 중단되어도 완료된 파일은 다시 변환하지 않습니다.
+    메모리에는 파일별 메타데이터와 줄 위치만 유지하고, 포스트 데이터는 필요할 때 읽습니다.
+    """
+    
+    def __init__(self, path, options=''):
+        self.path = path
+        self.options = options
+        self._index = {}
+        self._load()
+        self._file = open(path, 'ab')
+    
+    @staticmethod
+    def _key(html_file):
+        return os.path.normpath(html_file)
+    
+    def _load(self):
+        """기존 매니페스트를 읽어 파일별 마지막 기록의 위치를 인덱싱"""
+        if not os.path.exists(self.path):
+            return
+        
+        with open(self.path, 'rb+') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 중단으로 잘린 마지막 줄은 잘라내어 다음 기록이 이어 붙지 않도록 함
+                    f.truncate(offset)
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if entry and entry.get('version') == MANIFEST_VERSION and entry.get('options') == self.options:
+                    self._index[entry['path']] = {
+                        'size': entry['size'],
+                        'mtime_ns': entry['mtime_ns'],
+                        'sha256': entry['sha256'],
+                        'offset': offset
+                    }
+                offset += len(line)
+    
+    def _read_entry(self, offset):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+    
+    def lookup(self, html_file):
+        """원본 파일이 바뀌지 않았고 이미지 출력도 남아 있으면 기록된 포스트 데이터 반환"""
+        info = self._index.get(self._key(html_file))
+        if info is None:
+            return None
+        
+        size, mtime_ns = input_stat(html_file)
+        if size != info['size'] or mtime_ns != info['mtime_ns']:
+            # 크기나 수정 시각만 바뀐 경우 내용 해시로 다시 확인
+            if size != info['size'] or file_digest(html_file) != info['sha256']:
+                return None
+            entry = self._read_entry(info['offset'])
+            self.add(html_file, entry['post'], info['sha256'])
+        else:
+            entry = self._read_entry(info['offset'])
+        
+        post = entry['post']
+        for image in post.get('images', []):
+            if not os.path.exists(image['ghost_path']):
+                return None
+        return post
+    
+    def recorded(self, html_file):
+        """원본 파일의 현재 상태와 관계없이 마지막으로 기록된 포스트 데이터 반환 (기록이 없으면 None)
+
+        감시 모드에서 쓰는 중인 파일의 이전 변환 결과를 유지할 때 사용합니다.
+        """
+        info = self._index.get(self._key(html_file))
+        return self._read_entry(info['offset'])['post'] if info else None
+    
+    def add(self, html_file, post, digest=None):
+        """변환된 포스트 데이터 기록 (바로 디스크에 반영)"""
+        key = self._key(html_file)
+        size, mtime_ns = input_stat(html_file)
+        entry = {
+            'version': MANIFEST_VERSION,
+            'options': self.options,
+            'path': key,
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'sha256': digest or file_digest(html_file),
+            'post': post
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        
+        self._index[key] = {
+            'size': entry['size'],
+            'mtime_ns': entry['mtime_ns'],
+            'sha256': entry['sha256'],
+            'offset': offset
+        }
+    
+    def compact(self, html_files):
+        """지정한 파일들의 최신 기록만 남기도록 매니페스트를 다시 작성"""
+        self._file.close()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        index = {}
+        with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for key in dict.fromkeys(self._key(f) for f in html_files):
+                info = self._index.get(key)
+                if info is None:
+                    continue
+                src.seek(info['offset'])
+                line = src.readline()
+                index[key] = dict(info, offset=dst.tell())
+                dst.write(line)
+        os.replace(tmp_path, self.path)
+        self._index = index
+        self._file = open(self.path, 'ab')
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class MemoryManifest:
+    """메모리에만 유지하는 변환 기록 (ConversionManifest와 같은 인터페이스)
+
+    매니페스트를 사용하지 않는 감시 모드에서 이미 변환한 파일을 다시 변환하지 않도록 사용하며,
+    바뀌었는지는 크기와 수정 시각으로만 확인합니다. 포스트 데이터를 메모리에 유지합니다.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+    
+    def lookup(self, html_file):
+        entry = self._entries.get(ConversionManifest._key(html_file))
+        if entry is None or input_stat(html_file) != entry[0]:
+            return None
+        post = entry[1]
+        for image in post.get('images', []):
+            if not os.path.exists(image['ghost_path']):
+                return None
+        return post
+    
+    def recorded(self, html_file):
+        entry = self._entries.get(ConversionManifest._key(html_file))
+        return entry[1] if entry else None
+    
+    def add(self, html_file, post, digest=None):
+        self._entries[ConversionManifest._key(html_file)] = (tuple(input_stat(html_file)), post)
+    
+    def compact(self, html_files):
+        keys = {ConversionManifest._key(f) for f in html_files}
+        self._entries = {key: entry for key, entry in self._entries.items() if key in keys}
+    
+    def close(self):
+        pass
+
+def convert_with_metrics(html_file, log_level=logging.INFO, locator_generation=0, image_locator=None, **kwargs):
+    """process_html_file을 별도 지표 수집기로 실행하여 (포스트 데이터, 지표) 반환
+
+    워커 프로세스에서도 실행되므로 로그 레벨을 다시 설정하고, 지표는 호출한 쪽에서 합칩니다.
+    image_locator가 없으면 (워커 프로세스) 프로세스 공용 이미지 인덱스를 사용하며,
+    locator_generation이 그 번호와 다르면 (감시 모드에서 입력이 바뀐 뒤)
+    이전에 읽은 디렉토리 목록과 바뀐 압축 파일의 멤버 목록을 버리고 다시 읽습니다.
+    """
+    configure_logging(log_level)
+    if image_locator is None:
+        image_locator = get_image_locator()
+        if image_locator.generation != locator_generation:
+            refresh_input_archives()
+            image_locator.clear()
+            image_locator.generation = locator_generation
+    previous = swap_metrics(Metrics())
+    try:
+        post_data = process_html_file(html_file, image_locator=image_locator, **kwargs)
+        return post_data, get_metrics().to_dict()
+    finally:
+        swap_metrics(previous)
+
+# 이미지 크기를 기다리며 보류할 수 있는 최대 포스트 수 (넘으면 가장 앞선 포스트의 압축이 끝날 때까지 대기)
+MAX_HELD_POSTS = 64
+
+def iter_converted_posts(files, output_dir, workers=1, parser=None, use_image_cache=True, manifest=None, image_stage=None,
+                         executor=None, keep_recorded=(), image_locator=None, **options):
+    """HTML 파일 목록을 변환하여 포스트 데이터를 입력 파일 순서대로 하나씩 반환
+
+    workers가 2 이상이면 프로세스 풀에 process_html_file 호출을 분산합니다.
+    결과는 항상 입력 파일 순서대로 내보내므로 순차 실행과 동일한 순서를 보장하며,
+    동시에 진행 중인 작업 수를 제한하여 완료된 결과가 메모리에 쌓이지 않도록 합니다.
+    manifest가 주어지면 바뀌지 않은 파일은 기록된 결과를 사용하고, 새로 변환한 결과는 기록합니다.
+    image_stage가 주어지면 이미지 저장은 해당 단계에서 백그라운드로 실행되며,
+    호출한 쪽에서 모든 포스트를 받은 뒤 image_stage.join()을 호출해야 합니다.
+    압축으로 크기가 바뀌는 이미지가 있는 포스트는 압축이 끝날 때까지 (순서를 유지하여) 보류한 뒤
+    결과 크기로 카드를 채워 내보내고 매니페스트에 기록합니다.
+    executor가 주어지면 새 프로세스 풀을 만들지 않고 해당 풀을 사용합니다 (Converter가 풀을 유지하는 경우).
+    keep_recorded의 파일은 (감시 모드에서 쓰는 중인 파일) 바뀌었는지 확인하지 않고 매니페스트에 기록된 결과를 사용하며,
+    기록이 없으면 변환합니다.
+    image_locator는 이 프로세스에서 변환할 때 사용할 이미지 인덱스입니다 (없으면 프로세스 공용 인덱스).
+    워커 프로세스는 풀을 만들 때 넘겨받은 인덱스(set_image_locator)를 사용합니다.
+    나머지 options(max_html_bytes, image_cards, output_format 등)는 process_html_file에 그대로 전달됩니다.
+    """
+    convert = partial(convert_with_metrics, log_level=logger.getEffectiveLevel(), output_dir=output_dir,
+                      parser=parser, use_image_cache=use_image_cache, defer_images=image_stage is not None, **options)
+    metrics = get_metrics()
+    image_widths = options.get('image_widths', GHOST_IMAGE_WIDTHS)
+    # 내보내기를 기다리는 포스트 (HTML 파일, 포스트 데이터, 크기를 기다리는 저장 작업, 매니페스트에 기록할지 여부)
+    held = deque()
+    
+    def cached(html_file):
+        metrics.count('files.total')
+        if not manifest:
+            return None
+        with metrics.stage('manifest'):
+            if html_file in keep_recorded:
+                post_data = manifest.recorded(html_file)
+            else:
+                post_data = manifest.lookup(html_file)
+        if post_data:
+            metrics.count('files.cached')
+        return post_data
+    
+    def record(html_file, result):
+        post_data, post_metrics = result
+        metrics.merge(post_metrics)
+        if post_data:
+            metrics.count('files.converted')
+        elif not post_metrics['counters'].get('files.skipped_large'):
+            metrics.count('files.failed')
+        jobs = []
+        if post_data and image_stage is not None:
+            pending = post_data.get('pending_sizes', ())
+            for job in post_data.pop('image_jobs', []):
+                image_stage.submit(job)
+                if job['filename'] in pending:
+                    jobs.append(job)
+        return post_data, jobs
+    
+    def emit(html_file=None, post_data=None, jobs=(), new=False, wait=False):
+        """포스트를 입력 순서대로 내보냄 (앞선 포스트의 이미지 크기가 정해지지 않았으면 보류)"""
+        if post_data:
+            held.append((html_file, post_data, jobs, new))
+        while held:
+            done_file, done_post, done_jobs, done_new = held[0]
+            sizes = {}
+            for job in done_jobs:
+                size = image_stage.image_size(job, wait or len(held) > MAX_HELD_POSTS)
+                if size is None:
+                    return
+                sizes[job['filename']] = size
+            held.popleft()
+            if sizes:
+                fill_image_sizes(done_post, sizes, image_widths)
+            if manifest and done_new:
+                with metrics.stage('manifest'):
+                    manifest.add(done_file, done_post)
+            yield done_post
+    
+    if workers and workers > 1 and len(files) > 1:
+        logger.info("병렬 처리: 워커 %d개 사용", workers)
+        max_pending = workers * 4
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=set_image_locator,
+                                           initargs=(image_locator or get_image_locator(),))
+        try:
+            pending = deque()
+            for i, html_file in enumerate(files):
+                post_data = cached(html_file)
+                future = None if post_data else executor.submit(convert, html_file)
+                pending.append((i, html_file, future, post_data))
+                # 가장 먼저 제출한 작업부터 순서대로 결과 수집
+                while len(pending) >= max_pending or (i == len(files) - 1 and pending):
+                    index, done_file, future, post_data = pending.popleft()
+                    if future is None:
+                        logger.info("[%d/%d] %s 변경 없음 (기록된 결과 사용)", index + 1, len(files), done_file)
+                        yield from emit(done_file, post_data)
+                    else:
+                        logger.info("[%d/%d] %s 처리 완료", index + 1, len(files), done_file)
+                        post_data, jobs = record(done_file, future.result())
+                        yield from emit(done_file, post_data, jobs, new=True)
+            yield from emit(wait=True)
+        finally:
+            if own_executor:
+                executor.shutdown()
+        return
+    
+    for i, html_file in enumerate(files):
+        post_data = cached(html_file)
+        if post_data:
+            logger.info("[%d/%d] %s 변경 없음 (기록된 결과 사용)", i + 1, len(files), html_file)
+            yield from emit(html_file, post_data)
+        else:
+            logger.info("[%d/%d] %s 처리 중...", i + 1, len(files), html_file)
+            post_data, jobs = record(html_file, convert(html_file, image_locator=image_locator))
+            yield from emit(html_file, post_data, jobs, new=True)
+    yield from emit(wait=True)
+
+def convert_html_files(files, output_dir, workers=1, parser=None, use_image_cache=True, manifest=None, image_stage=None,
+                       **options):
+    """HTML 파일 목록을 변환하여 포스트 데이터 목록을 반환 (입력 파일 순서 유지)"""
+    return list(iter_converted_posts(files, output_dir, workers, parser, use_image_cache, manifest, image_stage, **options))
+
 def find_post_article_dirs():
-    """현재 디렉토리에서 'POST_ARTICLE_' 패턴을 가진 모든 폴더를 찾아 정렬된 순서로 반환"""
+    """현재 디렉토리에서 'POST_ARTICLE_' 패턴을 가진 모든 폴더를 찾아 정렬된 순서로 반환
+
+    압축을 풀지 않은 백업도 입력으로 사용할 수 있도록 'POST_ARTICLE_' 패턴을 가진 압축 파일과
+    다른 압축 파일 최상위의 'POST_ARTICLE_' 폴더('<압축 파일>/POST_ARTICLE_...')도 함께 반환합니다.
+    """
     post_article_dirs = []
     
     # 현재 디렉토리의 모든 항목 확인
-    for item in os.listdir('.'):
+    with os.scandir('.') as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
         # 디렉토리이고 'POST_ARTICLE_' 패턴을 가진 경우
-        if os.path.isdir(item) and item.startswith('POST_ARTICLE_'):
-            post_article_dirs.append(item)
+        if entry.name.startswith('POST_ARTICLE_') and entry.is_dir():
+            post_article_dirs.append(entry.name)
+        elif is_archive_path(entry.name) and entry.is_file() and get_input_archive(entry.name):
+            if entry.name.startswith('POST_ARTICLE_'):
+                post_article_dirs.append(entry.name)
+            else:
+                post_article_dirs.extend(
+                    sub.path for sub in scan_input_dir(entry.name)
+                    if sub.name.startswith('POST_ARTICLE_') and sub.is_dir()
+                )
     
     # 폴더명의 숫자 부분을 기준으로 정렬
     def extract_number(dir_name):
-        match = re.search(r'POST_ARTICLE_(\d+)', dir_name)
+        match = POST_ARTICLE_DIR_RE.search(dir_name)
         if match:
             return int(match.group(1))
         return 0
@@ -597,7 +3873,418 @@ def find_post_article_dirs():
     post_article_dirs.sort(key=extract_number)
     return post_article_dirs
 
-def create_sample_files(html_file, output_dir):
+def parse_date_filter(value):
+    """날짜 필터 인자(YYYYMMDD, YYYY-MM-DD, YYYY.MM.DD)를 YYYYMMDD 문자열로 변환"""
+    digits = re.sub(r'\D', '', value)
+    if len(digits) != 8:
+        raise argparse.ArgumentTypeError(f"날짜 형식이 올바르지 않습니다: {value} (예: 2016-02-02)")
+    return digits
+
+def parse_image_widths(value):
+    """너비 목록 인자(쉼표로 구분)를 정렬된 정수 튜플로 변환"""
+    try:
+        widths = tuple(sorted({int(width) for width in value.split(',') if width.strip()}))
+    except ValueError:
+        widths = ()
+    if not widths or widths[0] <= 0:
+        raise argparse.ArgumentTypeError(f"너비 목록 형식이 올바르지 않습니다: {value} (예: 600,1000,1600,2000)")
+    return widths
+
+class PostIndex:
+    """입력 디렉토리를 한 번 탐색하여 만든 HTML 파일/이미지 디렉토리 인덱스
+
+    디렉토리(압축 파일 안의 디렉토리 포함)를 한 번씩만 읽으며, 파일명의 날짜와 포스트 ID로 연도/날짜 범위/포스트 ID
+    필터를 탐색 중에 적용합니다. image 디렉토리는 포스트별 이미지 디렉토리 목록만 기록하고
+    그 안의 이미지 파일은 읽지 않습니다 (이미지 탐색 단계에서 필요할 때 읽음).
+    파일 순서는 os.walk로 탐색했을 때와 같습니다.
+    """
+    
+    def __init__(self, year=None, date_from=None, date_to=None, post_ids=None):
+        self.year = year
+        self.date_from = date_from
+        self.date_to = date_to
+        self.post_ids = set(post_ids) if post_ids else None
+        # 연도 -> HTML 파일 경로 목록
+        self.files_by_year = {}
+        # (날짜, 포스트 ID) -> HTML 파일 경로
+        self.html_files = {}
+        # 필터에 맞는 포스트별 이미지 디렉토리 수 (디렉토리 목록은 listings에 있으며 이미지 탐색 인덱스가 사용)
+        self.image_dir_count = 0
+        # 탐색 중 읽은 디렉토리 -> 항목 이름 목록 (이미지 탐색 인덱스에 재사용)
+        self.listings = {}
+    
+    def matches(self, date_str, post_id):
+        """날짜(YYYYMMDD)와 포스트 ID가 필터 조건에 맞는지 확인"""
+        if self.year and date_str[:4] != self.year:
+            return False
+        if self.date_from and date_str < self.date_from:
+            return False
+        if self.date_to and date_str > self.date_to:
+            return False
+        if self.post_ids is not None and post_id not in self.post_ids:
+            return False
+        return True
+    
+    def _list(self, dir_path):
+        try:
+            entries = scan_input_dir(dir_path)
+        except OSError:
+            # 읽지 못한 디렉토리는 이미지 탐색 인덱스에 빈 목록으로 넘기지 않음
+            entries = []
+        else:
+            self.listings[dir_path] = [entry.name for entry in entries]
+        get_metrics().count('discovery.dirs')
+        return entries
+    
+    def scan(self, input_dir):
+        """input_dir 아래의 HTML 파일과 포스트별 이미지 디렉토리를 인덱스에 추가"""
+        with get_metrics().stage('discover'):
+            self._scan_dir(input_dir)
+        return self
+    
+    def _scan_dir(self, dir_path):
+        subdirs = []
+        for entry in self._list(dir_path):
+            if entry.is_dir():
+                if entry.name == 'image':
+                    self._scan_image_dir(entry.path)
+                elif not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.endswith('.html') and not entry.name.startswith('.'):
+                match = POST_FILENAME_KEY_RE.match(entry.name)
+                if match:
+                    date_str, year, post_id = match.groups()
+                    if self.matches(date_str, post_id):
+                        self.files_by_year.setdefault(year, []).append(entry.path)
+                        self.html_files[(date_str, post_id)] = entry.path
+                        get_metrics().count('discovery.html')
+        
+        # os.walk와 같이 현재 디렉토리의 파일 다음에 하위 디렉토리를 차례로 탐색
+        for subdir in subdirs:
+            self._scan_dir(subdir)
+    
+    def _scan_image_dir(self, dir_path):
+        """image 디렉토리의 포스트별 하위 디렉토리 기록 (필터에 맞지 않는 포스트는 제외)"""
+        for entry in self._list(dir_path):
+            match = POST_IMAGE_DIR_RE.fullmatch(entry.name)
+            if match and entry.is_dir() and self.matches(*match.groups()):
+                self.image_dir_count += 1
+    
+    def seed(self, image_locator):
+        """탐색 중 읽은 디렉토리 목록을 이미지 탐색 인덱스에 추가"""
+        for dir_path, names in self.listings.items():
+            image_locator.add_listing(dir_path, names)
+        return image_locator
+
+# 감시 모드 기본 확인 간격 (초)
+DEFAULT_WATCH_INTERVAL = 10.0
+
+class Converter:
+    """네이버 포스트 백업을 Ghost JSON으로 변환하는 라이브러리 API
+
+    CLI(main)와 감시 모드가 같은 객체를 사용합니다. 이미지 변환 캐시, 이미지 탐색 인덱스, 태그 목록,
+    워커 프로세스 풀을 인스턴스 수명 동안 유지하므로 한 프로세스에서 여러 번 변환해도
+    인터프리터 시작, 모듈 로딩, 워커 시작 비용을 다시 내지 않습니다.
+
+        with Converter('ghost_export_final', workers=4) as converter:
+            converter.scan(['POST_ARTICLE_001'])
+            converter.export_all()
+    """
+    
+    def __init__(self, output_dir='ghost_export_final', parser=None, workers=1, use_image_cache=True, use_manifest=True,
+                 stream=False, max_shard_bytes=None, max_shard_posts=None, shard_zip=False, image_threads=0,
+                 image_processes=0, max_html_bytes=None, image_cards=True,
+                 output_format='jpeg', image_widths=GHOST_IMAGE_WIDTHS, image_variants=False, keep_naver_markup=False,
+                 post_format='html', remember_posts=False):
+        if post_format not in POST_FORMATS:
+            raise ValueError(f"post_format은 {', '.join(POST_FORMATS)} 중 하나여야 합니다: {post_format}")
+        if shard_zip and not (max_shard_bytes or max_shard_posts):
+            raise ValueError("shard_zip은 max_shard_bytes 또는 max_shard_posts와 함께 사용해야 합니다.")
+        
+        self.output_dir = output_dir
+        self.parser = parser
+        self.workers = workers
+        self.use_image_cache = use_image_cache
+        self.use_manifest = use_manifest
+        self.stream = stream
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_posts = max_shard_posts
+        self.shard_zip = shard_zip
+        self.image_threads = image_threads
+        self.image_processes = image_processes
+        self.max_html_bytes = max_html_bytes
+        # process_html_file에 그대로 전달하는 본문/이미지 출력 옵션
+        self.convert_options = {
+            'image_cards': image_cards,
+            'output_format': output_format,
+            'image_widths': tuple(image_widths),
+            'image_variants': image_variants,
+            'keep_naver_markup': keep_naver_markup,
+            'post_format': post_format,
+        }
+        
+        os.makedirs(os.path.join(output_dir, 'images'), exist_ok=True)
+        # 인스턴스마다 이미지 인덱스를 따로 유지 (한 프로세스의 여러 Converter가 서로의 목록을 바꾸지 않도록)
+        self.image_locator = ImageLocator()
+        self.image_cache = get_image_cache(output_dir) if use_image_cache else None
+        
+        # 연도별 내보내기가 공유하는 태그 목록 (이전 실행에서 저장한 ID와 슬러그 유지)
+        self.tag_registry_file = os.path.join(output_dir, TAG_REGISTRY_FILENAME)
+        self.tag_registry = TagRegistry.load(self.tag_registry_file)
+        
+        self.post_index = None
+        # 매니페스트를 사용하지 않을 때 연도별 변환 결과를 메모리에 유지 (remember_posts, 감시 모드용)
+        self._memory_manifests = {} if remember_posts and not use_manifest else None
+        self._executor = None
+        self._image_stage = None
+        # 가져오기용 zip으로 만들 분할 파일 (이미지 저장이 모두 끝난 뒤 생성)
+        self._zip_shards = []
+    
+    @property
+    def sharded(self):
+        return bool(self.max_shard_bytes or self.max_shard_posts)
+    
+    @property
+    def manifest_options(self):
+        """매니페스트에 기록하는 변환 설정 (바뀌면 기존 기록을 사용하지 않음)"""
+        options = self.convert_options
+        return (f"parser={resolve_html_parser(self.parser)};cards={int(options['image_cards'])};"
+                f"format={options['output_format']};widths={','.join(map(str, options['image_widths']))};"
+                f"variants={int(options['image_variants'])};naver={int(options['keep_naver_markup'])};"
+                f"post={options['post_format']}")
+    
+    def scan(self, input_dirs, year=None, date_from=None, date_to=None, post_ids=None):
+        """입력 디렉토리를 탐색하여 연도별 HTML 파일 목록 반환
+
+        다시 호출하면 디렉토리를 새로 읽고, 이미지 탐색 인덱스도 새 목록으로 바꿉니다
+        (워커 프로세스는 다음 변환 때 이전 목록을 버림).
+        """
+        rescan = self.post_index is not None
+        if rescan:
+            # 바뀐 압축 파일은 멤버 목록을 다시 읽음
+            refresh_input_archives()
+        post_index = PostIndex(year, date_from, date_to, post_ids)
+        for input_dir in input_dirs:
+            logger.log(logging.DEBUG if rescan else logging.INFO, "\n처리 중인 디렉토리: %s", input_dir)
+            post_index.scan(input_dir)
+        
+        if rescan:
+            self.image_locator.clear()
+            self.image_locator.generation += 1
+        # 탐색 중 읽은 디렉토리 목록은 이미지 탐색에서 다시 읽지 않음 (같은 프로세스에서 변환하는 경우)
+        post_index.seed(self.image_locator)
+        self.post_index = post_index
+        return post_index.files_by_year
+    
+    def _get_executor(self):
+        """변환 워커 프로세스 풀 (처음 필요할 때 만들고 close까지 유지)"""
+        if self.workers > 1 and self._executor is None:
+            # 워커 프로세스는 이 인스턴스의 이미지 인덱스(탐색 단계에서 읽은 목록 포함)를 이어받음
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=set_image_locator,
+                                                 initargs=(self.image_locator,))
+        return self._executor
+    
+    def _get_image_stage(self):
+        """백그라운드 이미지 저장 단계 (image_threads가 0이면 None, finish에서 완료)"""
+        if self.image_threads > 0 and self._image_stage is None:
+            self._image_stage = ImageStage(self.image_threads, self.image_processes, image_cache=self.image_cache)
+            logger.info("이미지 저장 단계: 스레드 %d개, 압축 프로세스 %d개", self.image_threads, self.image_processes)
+        return self._image_stage
+    
+    def convert_file(self, html_file):
+        """HTML 파일 하나를 변환하여 포스트 데이터 반환 (이미지는 바로 저장, 매니페스트와 JSON에는 기록하지 않음)"""
+        return process_html_file(html_file, self.output_dir, self.parser, self.image_locator, self.use_image_cache,
+                                 max_html_bytes=self.max_html_bytes, **self.convert_options)
+    
+    def export_year(self, year, files, force=False, keep_recorded=()):
+        """한 연도의 HTML 파일을 변환하여 ghost-export-<연도>.json(또는 분할 파일)에 기록하고 JSON 경로 반환
+
+        매니페스트를 사용하면 바뀌지 않은 파일은 기록된 결과를 사용하므로, 파일이 추가된 연도를
+        다시 내보내도 새 파일과 바뀐 파일만 변환됩니다. force이면 기록을 지우고 모두 다시 변환합니다.
+        keep_recorded의 파일은 현재 상태와 관계없이 기록된 결과를 사용합니다 (감시 모드에서 쓰는 중인 파일).
+        연도 처리가 끝나면 매니페스트에는 files의 기록만 남깁니다.
+        """
+        # 연도별 이미지 디렉토리 생성
+        year_images_dir = os.path.join(self.output_dir, 'images', year)
+        os.makedirs(year_images_dir, exist_ok=True)
+        
+        logger.info("\n처리 중: %s년 (%d 파일)", year, len(files))
+        logger.info("이미지 디렉토리: %s", year_images_dir)
+        
+        json_file = os.path.join(self.output_dir, f'ghost-export-{year}.json')
+        
+        # 파일별 변환 기록 (바뀌지 않은 파일은 다시 변환하지 않음)
+        manifest = None
+        if self.use_manifest:
+            manifest_file = manifest_path_for(json_file)
+            if force and os.path.exists(manifest_file):
+                os.remove(manifest_file)
+            manifest = ConversionManifest(manifest_file, self.manifest_options)
+            logger.info("매니페스트: %s", manifest_file)
+        elif self._memory_manifests is not None:
+            if force:
+                self._memory_manifests.pop(year, None)
+            manifest = self._memory_manifests.setdefault(year, MemoryManifest())
+        
+        try:
+            posts = iter_converted_posts(files, self.output_dir, self.workers, self.parser, self.use_image_cache, manifest,
+                                         self._get_image_stage(), self._get_executor(), set(keep_recorded),
+                                         self.image_locator, locator_generation=self.image_locator.generation,
+                                         max_html_bytes=self.max_html_bytes, **self.convert_options)
+            
+            # 이번에 쓴 내보내기 파일 (이전 실행에서 만든 나머지 파일은 삭제)
+            written = []
+            if self.sharded:
+                # 분할 모드: 변환되는 포스트를 최대 크기/포스트 수 단위의 파일들에 바로 기록
+                first_post = next(posts, None)
+                if first_post is not None:
+                    shards = create_sharded_ghost_json(chain([first_post], posts), json_file,
+                                                       self.max_shard_bytes, self.max_shard_posts, self.tag_registry)
+                    written = [shard['path'] for shard in shards]
+                    if self.shard_zip:
+                        self._zip_shards.extend(shards)
+                logger.info("%s년 처리 완료", year)
+            elif self.stream:
+                # 스트리밍 모드: 변환되는 포스트를 바로 JSON 파일에 기록
+                first_post = next(posts, None)
+                if first_post is not None:
+                    written = [create_ghost_json(chain([first_post], posts), json_file, self.tag_registry)]
+                    logger.info("생성된 JSON 파일: %s", json_file)
+                logger.info("%s년 처리 완료", year)
+            else:
+                # 해당 연도의 HTML 파일 처리
+                posts = list(posts)
+                
+                logger.info("%s년 처리 완료: %d 포스트", year, len(posts))
+                
+                # Ghost 블로그 JSON 파일 생성
+                if posts:
+                    written = [create_ghost_json(posts, json_file, self.tag_registry)]
+                    logger.info("생성된 JSON 파일: %s", json_file)
+            
+            # 분할 여부를 바꾸거나 분할 파일 수가 줄었을 때 남은 이전 파일 삭제
+            if written:
+                remove_stale_exports(json_file, written)
+            
+            # 다음 연도와 다음 실행에서 같은 태그 ID/슬러그를 쓰도록 태그 목록 저장
+            self.tag_registry.save(self.tag_registry_file)
+            
+            # 연도 처리가 끝나면 현재 파일들의 기록만 남김
+            if manifest:
+                with get_metrics().stage('manifest'):
+                    manifest.compact(files)
+        finally:
+            if manifest:
+                manifest.close()
+        
+        return json_file
+    
+    def export_all(self, files_by_year=None, force=False):
+        """탐색한 모든 연도를 내보내고 finish() 결과(저장하지 못한 이미지 작업 목록) 반환"""
+        if files_by_year is None:
+            files_by_year = self.post_index.files_by_year
+        for year, files in sorted(files_by_year.items()):
+            self.export_year(year, files, force)
+        return self.finish()
+    
+    def finish(self):
+        """백그라운드 이미지 저장 완료를 기다린 뒤 가져오기용 zip 생성, 저장하지 못한 이미지 작업 목록 반환"""
+        failures = []
+        if self._image_stage:
+            failures = self._image_stage.join()
+            self._image_stage = None
+            if failures:
+                logger.warning("경고: 이미지 %d개를 저장하지 못했습니다. 다시 실행하면 해당 포스트를 다시 변환합니다.", len(failures))
+        
+        # 분할 파일별 가져오기용 zip 생성 (JSON + 이미지)
+        for shard in self._zip_shards:
+            with get_metrics().stage('zip'):
+                zip_path = write_import_zip(shard)
+            logger.info("가져오기용 zip 생성: %s (이미지 %d개)", zip_path, len(shard['images']))
+        self._zip_shards = []
+        return failures
+    
+    def snapshot(self):
+        """탐색한 HTML 파일별 (크기, 수정 시각 ns) (감시 모드의 변경 확인용)"""
+        signatures = {}
+        for files in self.post_index.files_by_year.values():
+            for html_file in files:
+                try:
+                    signatures[html_file] = input_stat(html_file)
+                except OSError:
+                    continue
+        return signatures
+    
+    def watch(self, input_dirs, interval=DEFAULT_WATCH_INTERVAL, max_cycles=None, **filters):
+        """입력 디렉토리를 주기적으로 다시 탐색하여 새로 추가되거나 바뀐(또는 삭제된) 파일이 있는 연도만 다시 내보냄
+
+        scan()과 export_all()을 한 번 실행한 뒤 호출합니다. 쓰는 중인 파일을 변환하지 않도록
+        연속한 두 번의 확인에서 크기와 수정 시각이 같은 파일만 처리하며, 이미 내보낸 파일이 쓰는 중이면
+        연도를 다시 내보낼 때 이전 변환 결과를 그대로 사용합니다.
+        매니페스트를 사용하지 않으면 변환 결과를 메모리에 유지하여 바뀐 파일만 변환합니다. 처음 변환부터
+        유지하려면 Converter를 remember_posts=True로 만들어야 하며, 그렇지 않으면 감시를 시작한 뒤 처음
+        다시 내보내는 연도는 모두 변환합니다.
+        filters는 scan()의 year/date_from/date_to/post_ids이며, max_cycles를 주지 않으면 Ctrl+C까지 실행합니다.
+        """
+        exported = self.snapshot()
+        previous = exported
+        if not self.use_manifest and self._memory_manifests is None:
+            self._memory_manifests = {}
+        years_by_path = {html_file: year for year, files in self.post_index.files_by_year.items() for html_file in files}
+        cycles = 0
+        logger.info("\n감시 모드: %s (%.0f초 간격, Ctrl+C로 종료)", ', '.join(input_dirs), interval)
+        
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                time.sleep(interval)
+                cycles += 1
+                
+                files_by_year = self.scan(input_dirs, **filters)
+                current = self.snapshot()
+                years_by_path.update((html_file, year) for year, files in files_by_year.items() for html_file in files)
+                
+                # 바뀐 파일은 크기와 수정 시각이 한 번 더 같게 보인 뒤에 처리
+                settled = {path for path, signature in current.items() if previous.get(path) == signature}
+                changed = {path for path in settled if exported.get(path) != current[path]}
+                removed = exported.keys() - current.keys()
+                previous = current
+                
+                years = {years_by_path[path] for path in changed | removed}
+                if not years:
+                    continue
+                
+                logger.info("\n감시 모드: 새로 추가되거나 바뀐 파일 %d개, 삭제된 파일 %d개", len(changed), len(removed))
+                for year in sorted(years):
+                    # 쓰는 중인 파일 중 이미 내보낸 파일은 이전 결과를 유지하고, 처음 보는 파일은 다음 확인까지 미룸
+                    files = [path for path in files_by_year.get(year, []) if path in settled or path in exported]
+                    writing = {path for path in files if path not in settled}
+                    if files:
+                        self.export_year(year, files, keep_recorded=writing)
+                    elif year not in files_by_year:
+                        logger.info("%s년에 남은 파일이 없어 기존 JSON 파일을 그대로 둡니다.", year)
+                    for path in files:
+                        if path not in writing:
+                            exported[path] = current[path]
+                for path in removed:
+                    exported.pop(path, None)
+                self.finish()
+        except KeyboardInterrupt:
+            logger.info("\n감시 모드를 종료합니다.")
+    
+    def close(self):
+        """워커 프로세스 풀 종료 (완료되지 않은 이미지 저장이 있으면 먼저 finish 호출)"""
+        self.finish()
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def create_sample_files(html_file, output_dir, parser=None, use_image_cache=True, **options):
     """샘플 HTML 파일과 변환된 JSON 파일을 생성"""
     # 샘플 디렉토리 생성
     sample_dir = os.path.join(output_dir, 'sample')
@@ -605,10 +4292,10 @@ def create_sample_files(html_file, output_dir):
     
     # HTML 파일 복사
     sample_html_path = os.path.join(sample_dir, os.path.basename(html_file))
-    shutil.copy2(html_file, sample_html_path)
+    copy_input(html_file, sample_html_path)
     
     # HTML 파일 처리
-    post_data = process_html_file(html_file, sample_dir)
+    post_data = process_html_file(html_file, sample_dir, parser, use_image_cache=use_image_cache, **options)
     
     if post_data:
         # 샘플 JSON 파일 생성
@@ -616,66 +4303,144 @@ def create_sample_files(html_file, output_dir):
         posts = [post_data]
         create_ghost_json(posts, sample_json_path)
         
-        print(f"샘플 파일 생성 완료:")
-        print(f"  HTML: {sample_html_path}")
-        print(f"  JSON: {sample_json_path}")
+        logger.info("샘플 파일 생성 완료:")
+        logger.info("  HTML: %s", sample_html_path)
+        logger.info("  JSON: %s", sample_json_path)
         
         return True
     
     return False
 
+def report_run(started, stats_json=None):
+    """실행 요약 출력 및 지표 JSON 저장"""
+    metrics = get_metrics()
+    elapsed = time.perf_counter() - started
+    metrics.report()
+    layout_lines = layout_report_lines(metrics.counters)
+    if layout_lines:
+        logger.info("레이아웃별 문서 수와 전용 추출기 적중률:")
+        for line in layout_lines:
+            logger.info("  %s", line)
+    logger.info("전체 소요 시간: %.2fs", elapsed)
+    
+    if stats_json:
+        stats = dict(metrics.to_dict(), elapsed=elapsed)
+        with open(stats_json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+        logger.info("지표 파일 저장: %s", stats_json)
+
 def main():
     parser = argparse.ArgumentParser(description='HTML 파일을 Ghost 블로그 JSON 형식으로 변환')
-    parser.add_argument('--input', '-i', help='입력 디렉토리 (지정하지 않으면 모든 POST_ARTICLE_XXX 폴더 처리)', default=None)
+    parser.add_argument('--input', '-i', help='입력 디렉토리 또는 zip/tar 백업 파일 (지정하지 않으면 모든 POST_ARTICLE_XXX 폴더와 압축 파일 처리)', default=None)
     parser.add_argument('--output', '-o', help='출력 디렉토리', default='ghost_export_final')
     parser.add_argument('--year', '-y', help='특정 연도만 처리 (예: 2016)', default=None)
+    parser.add_argument('--date-from', type=parse_date_filter, help='이 날짜 이후 포스트만 처리 (예: 2016-02-01)', default=None)
+    parser.add_argument('--date-to', type=parse_date_filter, help='이 날짜 이전 포스트만 처리 (예: 2016-12-31)', default=None)
+    parser.add_argument('--post-id', action='append', help='지정한 네이버 포스트 ID만 처리 (여러 번 지정 가능, 쉼표로 구분 가능)', default=None)
     parser.add_argument('--clean-only', '-c', action='store_true', help='기존 JSON 파일만 정제')
     parser.add_argument('--sample', '-s', help='샘플 파일 생성 (HTML 파일 경로 지정)', default=None)
+    parser.add_argument('--parser', '-p', choices=['html.parser', 'lxml', 'auto'], help='HTML 파서 백엔드 (기본값: html.parser, auto: lxml 설치 시 lxml 사용)', default=DEFAULT_HTML_PARSER)
+    parser.add_argument('--no-image-cache', action='store_true', help='이미지 변환 캐시를 사용하지 않음')
+    parser.add_argument('--stream', action='store_true', help='변환 결과를 포스트 단위로 바로 JSON에 기록 (메모리 사용량 감소)')
+    parser.add_argument('--no-manifest', action='store_true', help='파일별 변환 기록(매니페스트)을 사용하지 않음')
+    parser.add_argument('--force', '-f', action='store_true', help='변환 기록을 무시하고 모든 파일을 다시 변환')
+    parser.add_argument('--image-threads', type=int, help='이미지 복사/저장을 백그라운드에서 실행할 스레드 수 (기본값: 0, 포스트 처리 중 바로 저장)', default=0)
+    parser.add_argument('--image-processes', type=int, help='--image-threads 사용 시 이미지 압축에 사용할 프로세스 수 (기본값: 0, 스레드에서 압축)', default=0)
+    parser.add_argument('--workers', '-w', type=int, help='병렬 처리에 사용할 워커 프로세스 수 (기본값: 1, 순차 처리)', default=1)
+    parser.add_argument('--max-shard-mb', type=float, help='연도별 JSON을 이 크기(MB) 이하의 파일들로 나누어 생성', default=0)
+    parser.add_argument('--max-shard-posts', type=int, help='연도별 JSON을 이 포스트 수 이하의 파일들로 나누어 생성', default=0)
+    parser.add_argument('--shard-zip', action='store_true', help='나누어 생성한 JSON 파일마다 해당 포스트의 이미지를 포함한 가져오기용 zip 파일 생성')
+    parser.add_argument('--image-format', choices=IMAGE_FORMAT_POLICIES, help='이미지 출력 형식 (기본값: jpeg, 최대 크기를 넘는 이미지만 JPEG로 압축 / webp, avif: 해당 형식으로 변환)', default='jpeg')
+    parser.add_argument('--image-widths', type=parse_image_widths, help=f'srcset과 너비별 이미지에 사용할 너비 목록 (기본값: {",".join(map(str, GHOST_IMAGE_WIDTHS))})', default=GHOST_IMAGE_WIDTHS)
+    parser.add_argument('--image-variants', action='store_true', help='--image-widths 너비별 축소 이미지를 images/size/w<너비>/ 아래에 미리 생성')
+    parser.add_argument('--no-image-cards', action='store_true', help='이미지를 Ghost 이미지 카드(크기/srcset 포함) 대신 기존 img 태그로 출력')
+    parser.add_argument('--keep-naver-markup', action='store_true', help='본문에 네이버 편집기 주석, 래퍼 div, data-* 속성을 그대로 유지')
+    parser.add_argument('--post-format', choices=POST_FORMATS, help='본문 출력 형식 (기본값: html / mobiledoc, lexical: Ghost 편집기 카드 문서로 출력하여 가져올 때 HTML 변환 생략)', default='html')
+    parser.add_argument('--max-html-mb', type=float, help=f'이 크기(MB)를 넘는 HTML 파일은 건너뜀 (기본값: {DEFAULT_MAX_HTML_MB}, 0이면 제한 없음)', default=DEFAULT_MAX_HTML_MB)
+    parser.add_argument('--watch', action='store_true', help='변환 후 종료하지 않고 입력 디렉토리를 감시하여 새로 추가되거나 바뀐 파일만 이어서 변환')
+    parser.add_argument('--watch-interval', type=float, help=f'--watch 사용 시 입력 디렉토리 확인 간격(초) (기본값: {DEFAULT_WATCH_INTERVAL:g})', default=DEFAULT_WATCH_INTERVAL)
+    parser.add_argument('--verbose', '-v', action='store_true', help='파일/이미지별 상세 로그 출력')
+    parser.add_argument('--quiet', '-q', action='store_true', help='경고와 오류만 출력')
+    parser.add_argument('--stats-json', help='단계별 소요 시간과 카운터를 JSON 파일로 저장', default=None)
     args = parser.parse_args()
     
+    configure_logging(logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO)
+    if args.post_id:
+        args.post_id = [post_id.strip() for value in args.post_id for post_id in value.split(',') if post_id.strip()]
+    
+    # 본문/이미지 출력 옵션 (샘플 생성과 Converter에 그대로 전달)
+    if args.image_format != 'jpeg' and not image_format_supported(args.image_format.upper()):
+        logger.error("오류: 설치된 Pillow가 %s 저장을 지원하지 않습니다.", args.image_format.upper())
+        return
+    convert_options = {
+        'image_cards': not args.no_image_cards,
+        'output_format': args.image_format,
+        'image_widths': args.image_widths,
+        'image_variants': args.image_variants,
+        'keep_naver_markup': args.keep_naver_markup,
+        'post_format': args.post_format,
+    }
+    started = time.perf_counter()
+    
     # 출력 디렉토리 생성
     os.makedirs(args.output, exist_ok=True)
     
     # 샘플 파일 생성 모드
     if args.sample:
-        if os.path.exists(args.sample):
-            create_sample_files(args.sample, args.output)
+        if input_exists(args.sample):
+            create_sample_files(args.sample, args.output, args.parser, not args.no_image_cache, **convert_options)
         else:
-            print(f"오류: 샘플 HTML 파일을 찾을 수 없습니다: {args.sample}")
+            logger.error("오류: 샘플 HTML 파일을 찾을 수 없습니다: %s", args.sample)
         return
     
     # 정제 전용 모드
     if args.clean_only:
         # 출력 디렉토리에서 모든 JSON 파일 찾기
-        json_files = [f for f in os.listdir(args.output) if f.endswith('.json')]
+        json_files = [f for f in os.listdir(args.output) if f.endswith('.json') and f != TAG_REGISTRY_FILENAME]
         
         if not json_files:
-            print(f"오류: {args.output} 디렉토리에 JSON 파일이 없습니다.")
+            logger.error("오류: %s 디렉토리에 JSON 파일이 없습니다.", args.output)
             return
         
-        print(f"정제 모드: {len(json_files)}개의 JSON 파일을 처리합니다.")
+        logger.info("정제 모드: %d개의 JSON 파일을 처리합니다.", len(json_files))
+        metrics = get_metrics()
+        json_paths = [os.path.join(args.output, json_file) for json_file in json_files]
         
-        for json_file in json_files:
-            json_path = os.path.join(args.output, json_file)
-            print(f"JSON 파일 정제 중: {json_path}")
-            
-            try:
-                # JSON 파일 읽기
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # JSON 데이터 정제
-                cleaned_data = clean_json_data(data)
-                
-                # 정제된 JSON 파일 저장
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
-                
-                print(f"정제 완료: {json_path}")
+        def clean_results():
+            """파일별 정제 결과를 완료되는 대로 반환 (워커가 2 이상이면 프로세스 풀에서 병렬 처리)"""
+            if args.workers > 1 and len(json_paths) > 1:
+                with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                    futures = {executor.submit(clean_json_file, json_path): json_path for json_path in json_paths}
+                    for future in as_completed(futures):
+                        try:
+                            yield futures[future], future.result(), None
+                        except Exception as e:
+                            yield futures[future], None, e
+            else:
+                for json_path in json_paths:
+                    logger.info("JSON 파일 정제 중: %s", json_path)
+                    try:
+                        yield json_path, clean_json_file(json_path), None
+                    except Exception as e:
+                        yield json_path, None, e
+        
+        total_saved = 0
+        for json_path, result, error in clean_results():
+            if error is not None:
+                metrics.count('files.failed')
+                logger.error("오류: %s 정제 중 예외 발생: %s", json_path, error)
+                continue
             
-            except Exception as e:
-                print(f"오류: {json_path} 정제 중 예외 발생: {e}")
+            _, size_before, size_after, seconds = result
+            total_saved += size_before - size_after
+            metrics.count('files.cleaned')
+            metrics.count('bytes.clean_saved', size_before - size_after)
+            metrics.add_time('clean', seconds)
+            logger.info("정제 완료: %s (%.2f KB -> %.2f KB, %.2f KB 감소, %.2fs)", json_path,
+                        size_before / 1024, size_after / 1024, (size_before - size_after) / 1024, seconds)
         
+        logger.info("정제로 줄어든 크기: %.2f KB", total_saved / 1024)
+        report_run(started, args.stats_json)
         return
     
     # 변환 모드
@@ -683,76 +4448,66 @@ def main():
     input_dirs = []
     if args.input:
         # 사용자가 지정한 입력 디렉토리 사용
+        if not input_isdir(args.input):
+            logger.error("오류: 입력 디렉토리 또는 압축 파일을 찾을 수 없습니다: %s", args.input)
+            return
         input_dirs = [args.input]
-        print(f"입력 디렉토리: {args.input}")
+        logger.info("입력 디렉토리: %s", args.input)
     else:
         # 'POST_ARTICLE_' 패턴을 가진 모든 폴더 자동 탐색
         input_dirs = find_post_article_dirs()
         if not input_dirs:
-            print("오류: 현재 디렉토리에 'POST_ARTICLE_' 디렉토리가 없습니다.")
+            logger.error("오류: 현재 디렉토리에 'POST_ARTICLE_' 디렉토리가 없습니다.")
             return
-        print(f"발견된 POST_ARTICLE 디렉토리: {len(input_dirs)}개 - {', '.join(input_dirs)}")
+        logger.info("발견된 POST_ARTICLE 디렉토리: %d개 - %s", len(input_dirs), ', '.join(input_dirs))
     
-    print(f"출력 디렉토리: {args.output}")
+    logger.info("출력 디렉토리: %s", args.output)
     if args.year:
-        print(f"처리할 연도: {args.year}")
-    
-    # 이미지 디렉토리 생성
-    os.makedirs(os.path.join(args.output, 'images'), exist_ok=True)
-    
-    # HTML 파일 찾기 및 연도별 그룹화
-    html_files_by_year = {}
-    
-    # 모든 입력 디렉토리에서 HTML 파일 수집
-    for input_dir in input_dirs:
-        print(f"\n처리 중인 디렉토리: {input_dir}")
-        for root, _, files in os.walk(input_dir):
-            for file in files:
-                if file.endswith('.html') and not file.startswith('.'):
-                    file_path = os.path.join(root, file)
-                    # 파일명에서 연도 추출 (예: 20160202_3509403_...)
-                    match = re.match(r'(\d{4})\d{4}_\d+_.+\.html', os.path.basename(file_path))
-                    if match:
-                        year = match.group(1)
-                        if args.year and year != args.year:
-                            continue
-                        if year not in html_files_by_year:
-                            html_files_by_year[year] = []
-                        html_files_by_year[year].append(file_path)
-    
-    # 연도별 처리
-    for year, files in sorted(html_files_by_year.items()):
-        # 연도별 이미지 디렉토리 생성
-        year_images_dir = os.path.join(args.output, 'images', year)
-        os.makedirs(year_images_dir, exist_ok=True)
-        
-        print(f"\n처리 중: {year}년 ({len(files)} 파일)")
-        print(f"이미지 디렉토리: {year_images_dir}")
+        logger.info("처리할 연도: %s", args.year)
+    if args.date_from or args.date_to:
+        logger.info("처리할 날짜 범위: %s ~ %s", args.date_from or '', args.date_to or '')
+    if args.post_id:
+        logger.info("처리할 포스트 ID: %s", ', '.join(args.post_id))
+    if args.workers > 1:
+        logger.info("워커 프로세스 수: %d", args.workers)
+    logger.info("HTML 파서: %s", resolve_html_parser(args.parser))
+    
+    # 연도별 JSON 분할 기준
+    max_shard_bytes = int(args.max_shard_mb * 1024 * 1024) if args.max_shard_mb > 0 else None
+    max_shard_posts = args.max_shard_posts if args.max_shard_posts > 0 else None
+    if args.shard_zip and not (max_shard_bytes or max_shard_posts):
+        logger.error("오류: --shard-zip은 --max-shard-mb 또는 --max-shard-posts와 함께 사용해야 합니다.")
+        return
+    
+    # 최대 HTML 파일 크기
+    max_html_bytes = int(args.max_html_mb * 1024 * 1024) if args.max_html_mb > 0 else None
+    
+    filters = {'year': args.year, 'date_from': args.date_from, 'date_to': args.date_to, 'post_ids': args.post_id}
+    
+    with Converter(args.output, args.parser, args.workers, not args.no_image_cache, not args.no_manifest, args.stream,
+                   max_shard_bytes, max_shard_posts, args.shard_zip, args.image_threads, args.image_processes,
+                   max_html_bytes, remember_posts=args.watch, **convert_options) as converter:
+        # HTML 파일 찾기 및 연도별 그룹화 (디렉토리를 한 번씩만 읽고 필터는 탐색 중에 적용)
+        html_files_by_year = converter.scan(input_dirs, **filters)
+        logger.info("발견된 HTML 파일: %d개, 포스트 이미지 디렉토리: %d개",
+                    sum(len(files) for files in html_files_by_year.values()), converter.post_index.image_dir_count)
         
-        # 해당 연도의 HTML 파일 처리
-        posts = []
-        for i, html_file in enumerate(files):
-            print(f"[{i+1}/{len(files)}] {html_file} 처리 중...")
-            post_data = process_html_file(html_file, args.output)
-            if post_data:
-                posts.append(post_data)
+        if len(converter.tag_registry):
+            logger.info("태그 목록: %s (기존 태그 %d개)", converter.tag_registry_file, len(converter.tag_registry))
         
-        print(f"{year}년 처리 완료: {len(posts)} 포스트")
+        # 연도별 처리 (백그라운드 이미지 저장과 가져오기용 zip 생성까지 완료)
+        converter.export_all(force=args.force)
         
-        # Ghost 블로그 JSON 파일 생성
-        if posts:
-            json_file = os.path.join(args.output, f'ghost-export-{year}.json')
-            create_ghost_json(posts, json_file)
-            print(f"생성된 JSON 파일: {json_file}")
+        # 감시 모드: 새로 추가되거나 바뀐 파일만 이어서 변환
+        if args.watch:
+            converter.watch(input_dirs, args.watch_interval, **filters)
     
-    print("변환 작업이 성공적으로 완료되었습니다!")
+    report_run(started, args.stats_json)
+    logger.info("변환 작업이 성공적으로 완료되었습니다!")
 
 if __name__ == '__main__':
-    print("HTML to Ghost 변환 스크립트 시작")
     try:
         main()
-        print("스크립트 실행 완료")
     except Exception as e:
-        print(f"오류: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("오류: %s", e)
+        sys.exit(1)
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import sys
+
+from PIL import Image
+
+# 저장소 최상위의 html_to_ghost.py를 불러오기 위한 경로
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import html_to_ghost as h2g  # noqa: E402
+
+# 저장소에 포함된 샘플 포스트 (이미지는 포스트 ID 디렉토리에 있음)
+SAMPLE_DIR = os.path.join(ROOT, 'POST_ARTICLE_001')
+SAMPLE_NAME = '20160202_3509403_수다쟁이오리와무뚝뚝한곰곰아놀자.html'
+SAMPLE_POST = os.path.join(SAMPLE_DIR, SAMPLE_NAME)
+
+
+def sample_input(base_dir):
+    """샘플 포스트를 백업 형식(POST_ARTICLE_001/image/<날짜>_<포스트 ID>/)으로 복사한 입력 디렉토리"""
+    input_dir = os.path.join(base_dir, 'POST_ARTICLE_001')
+    os.makedirs(os.path.join(input_dir, 'image'))
+    shutil.copy(SAMPLE_POST, os.path.join(input_dir, SAMPLE_NAME))
+    shutil.copytree(os.path.join(SAMPLE_DIR, '20160202_3509403'), os.path.join(input_dir, 'image', '20160202_3509403'))
+    return input_dir
+
+
+def export_post(input_path, output_dir, **options):
+    """input_path(디렉토리 또는 압축 파일)의 2016년 포스트 하나를 변환하여 (포스트, 태그 이름 목록) 반환"""
+    with h2g.Converter(output_dir, **options) as converter:
+        converter.scan([input_path])
+        converter.export_all()
+    with open(os.path.join(output_dir, 'ghost-export-2016.json'), encoding='utf-8') as f:
+        data = json.load(f)['db'][0]['data']
+    post = data['posts'][0]
+    names = {tag['id']: tag['name'] for tag in data['tags']}
+    return post, [names[link['tag_id']] for link in data['posts_tags'] if link['post_id'] == post['id']]
+
+
+def post_html(title, date_text, tags, image_srcs):
+    """태그와 이미지가 들어 있는 SE2 레이아웃 포스트 HTML"""
+    tag_spans = ''.join(f'<span class="backup_post_tag">#{tag}</span>' for tag in tags)
+    images = ''.join(f'<img src="{src}">' for src in image_srcs)
+    return ('<html><head><meta charset="utf-8"></head><body>'
+            f'<h3>{title}</h3><div style="border-bottom: solid 1px">{date_text}</div>'
+            f'<div class="se2_in_page"><p>{title} 본문</p>{images}</div>'
+            f'<div class="backup_post_tags">{tag_spans}</div></body></html>')
+
+
+def write_post(input_dir, date_str, post_id, title, tags=(), image_count=1):
+    """input_dir에 포스트 HTML과 이미지(포스트마다 다른 색의 작은 JPEG) 생성 후 HTML 파일 경로 반환"""
+    post_dir = f'{date_str}_{post_id}'
+    image_dir = os.path.join(input_dir, 'image', post_dir)
+    os.makedirs(image_dir, exist_ok=True)
+    srcs = []
+    for i in range(1, image_count + 1):
+        name = f'{post_dir}_{i}.jpg'
+        color = (int(post_id) * 37 % 256, i * 50 % 256, int(date_str) % 256)
+        Image.new('RGB', (64, 48), color).save(os.path.join(image_dir, name), 'JPEG')
+        srcs.append(f'image/{post_dir}/{name}')
+    date_text = f'{date_str[:4]}.{date_str[4:6]}.{date_str[6:]}. 12:00'
+    html_file = os.path.join(input_dir, f'{post_dir}_{title}.html')
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(post_html(title, date_text, tags, srcs))
+    return html_file
+
+
+def synthetic_input(base_dir, years=('2016', '2017'), posts_per_year=6):
+    """여러 연도에 걸쳐 태그를 공유하는 포스트들의 입력 디렉토리"""
+    input_dir = os.path.join(base_dir, 'POST_ARTICLE_001')
+    for year in years:
+        for i in range(posts_per_year):
+            post_id = f'{year[-2:]}{i:05d}'
+            write_post(input_dir, f'{year}0{i % 9 + 1}1{i % 9}', post_id, f'포스트{post_id}',
+                       tags=[f'태그{i % 3}', f'{year}년', '공통'], image_count=i % 3)
+    return input_dir
+
+
+def read_exports(output_dir):
+    """출력 디렉토리의 연도별 JSON 파일 내용 (파일명 -> 데이터, 실행마다 다른 내보낸 시각은 제외)"""
+    exports = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.startswith('ghost-export-') and name.endswith('.json'):
+            with open(os.path.join(output_dir, name), encoding='utf-8') as f:
+                data = json.load(f)
+            del data['db'][0]['meta']['exported_on']
+            exports[name] = data
+    return exports
@@ -0,0 +1,96 @@
+"""압축을 풀지 않고 zip/tar 백업 파일을 입력으로 변환한 결과가 디렉토리 입력과 같은지 확인"""
+import os
+import shutil
+import tarfile
+import zipfile
+
+import pytest
+
+import html_to_ghost as h2g
+from conftest import export_post, sample_input
+
+
+def make_zip(input_dir, path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for dir_path, _, names in os.walk(input_dir):
+            for name in names:
+                file_path = os.path.join(dir_path, name)
+                archive.write(file_path, os.path.relpath(file_path, os.path.dirname(input_dir)))
+    return path
+
+
+def make_tar(input_dir, path, mode):
+    with tarfile.open(path, mode) as archive:
+        archive.add(input_dir, os.path.basename(input_dir))
+    return path
+
+
+ARCHIVES = {
+    'zip': lambda input_dir, base: make_zip(input_dir, os.path.join(base, 'POST_ARTICLE_001.zip')),
+    'tar': lambda input_dir, base: make_tar(input_dir, os.path.join(base, 'POST_ARTICLE_001.tar'), 'w'),
+    'tar.gz': lambda input_dir, base: make_tar(input_dir, os.path.join(base, 'POST_ARTICLE_001.tar.gz'), 'w:gz'),
+}
+
+
+@pytest.fixture(scope='module')
+def directory_export(tmp_path_factory):
+    base = str(tmp_path_factory.mktemp('directory'))
+    post, tags = export_post(sample_input(base), os.path.join(base, 'out'))
+    return post, tags, sorted(os.listdir(os.path.join(base, 'out', 'images', '2016')))
+
+
+@pytest.mark.parametrize('kind', sorted(ARCHIVES))
+def test_archive_input_matches_directory_input(tmp_path, directory_export, kind):
+    input_dir = sample_input(str(tmp_path / 'src'))
+    archive_path = ARCHIVES[kind](input_dir, str(tmp_path))
+    shutil.rmtree(input_dir)
+    post, tags = export_post(archive_path, str(tmp_path / 'out'))
+    expected_post, expected_tags, expected_images = directory_export
+    assert tags == expected_tags
+    for field in ('id', 'title', 'slug', 'html', 'feature_image', 'published_at'):
+        assert post[field] == expected_post[field]
+    # 압축 파일 안의 이미지도 같은 이름으로 출력 디렉토리에 저장됨
+    assert sorted(os.listdir(tmp_path / 'out' / 'images' / '2016')) == expected_images
+
+
+def test_archive_listing_and_members(tmp_path):
+    input_dir = sample_input(str(tmp_path / 'src'))
+    archive_path = make_zip(input_dir, str(tmp_path / 'backup.zip'))
+    archive = h2g.get_input_archive(archive_path)
+    assert isinstance(archive, h2g.ZipInputArchive)
+    assert archive.isdir('POST_ARTICLE_001/image/20160202_3509403')
+    names = [entry.name for entry in h2g.scan_input_dir(os.path.join(archive_path, 'POST_ARTICLE_001'))]
+    assert sorted(names) == sorted(os.listdir(input_dir))
+    member = os.path.join(archive_path, 'POST_ARTICLE_001', 'image', '20160202_3509403', '20160202_3509403_1.PNG')
+    with h2g.open_input(member) as f, open(os.path.join(input_dir, 'image', '20160202_3509403',
+                                                       '20160202_3509403_1.PNG'), 'rb') as g:
+        assert f.read() == g.read()
+    assert h2g.input_exists(member)
+    assert not h2g.input_exists(os.path.join(archive_path, 'POST_ARTICLE_001', 'missing.html'))
+    assert archive.member_name('../outside') is None
+
+
+def test_archive_reopens_after_fork(tmp_path):
+    input_dir = sample_input(str(tmp_path / 'src'))
+    archive = h2g.ZipInputArchive(make_zip(input_dir, str(tmp_path / 'backup.zip')))
+    inherited = archive._zip
+    # 다른 프로세스에서 연 핸들처럼 표시하면 다음 멤버를 열 때 다시 엶
+    archive._pid = -1
+    with archive.open('POST_ARTICLE_001/image/20160202_3509403/20160202_3509403_1.PNG') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert archive._zip is not inherited
+    assert archive._pid == os.getpid()
+    archive.close()
+    inherited.close()
+
+
+def test_input_archive_is_abstract():
+    with pytest.raises(TypeError):
+        h2g.InputArchive(__file__)
+
+    class IncompleteArchive(h2g.InputArchive):
+        def open(self, member):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteArchive(__file__)
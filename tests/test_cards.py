@@ -0,0 +1,135 @@
+"""Ghost 이미지 카드(srcset/sizes, 압축 후 채우는 크기)와 임베드 카드 출력 확인"""
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import html_to_ghost as h2g
+from conftest import export_post
+
+GHOST_URL = '/content/images/2016/photo.jpg'
+
+
+def card_html(**kwargs):
+    soup = h2g.parse_html('<p><img src="image/a.jpg"></p>')
+    return str(h2g.apply_image_card(soup, soup.img, GHOST_URL, **kwargs))
+
+
+def test_image_srcset_lists_smaller_ghost_widths_and_original():
+    assert h2g.image_srcset(GHOST_URL, 1200) == (
+        '/content/images/size/w600/2016/photo.jpg 600w, '
+        '/content/images/size/w1000/2016/photo.jpg 1000w, '
+        '/content/images/2016/photo.jpg 1200w')
+    # 가장 작은 너비보다 작거나 크기를 줄일 수 없는 형식이면 srcset 없음
+    assert h2g.image_srcset(GHOST_URL, 500) is None
+    assert h2g.image_srcset('/content/images/2016/anim.gif', 1200) is None
+
+
+def test_image_card_with_known_size():
+    html = card_html(width=1200, height=800)
+    assert html.startswith('<figure class="kg-card kg-image-card"><img')
+    assert 'width="1200"' in html and 'height="800"' in html
+    assert f'srcset="{h2g.image_srcset(GHOST_URL, 1200)}"' in html
+    assert f'sizes="{h2g.IMAGE_CARD_SIZES}"' in html
+    assert 'loading="lazy"' in html
+
+
+def test_image_card_without_size_has_no_size_attributes():
+    html = card_html()
+    for field in h2g.PENDING_SIZE_FIELDS:
+        assert f' {field}=' not in html
+
+
+@pytest.mark.parametrize('size', [(3000, 2000), (None, None)])
+def test_pending_html_card_is_filled_with_compressed_size(size):
+    post_data = {'content': card_html(pending=True), 'images': [{'ghost_url': GHOST_URL, 'width': None, 'height': None}],
+                 'pending_sizes': ['photo.jpg']}
+    h2g.fill_image_sizes(post_data, {'photo.jpg': size})
+    # 처음부터 압축 결과 크기로 만든 카드와 같아야 함 (저장에 실패하면 크기 속성 없음)
+    assert post_data['content'] == card_html(width=size[0], height=size[1])
+    assert (post_data['images'][0]['width'], post_data['images'][0]['height']) == (size if size[0] else (None, None))
+    assert 'pending_sizes' not in post_data
+
+
+def test_fill_image_sizes_skips_images_of_other_posts():
+    post_data = {'content': card_html(pending=True), 'images': [{'ghost_url': GHOST_URL, 'width': None, 'height': None}],
+                 'pending_sizes': ['photo.jpg']}
+    h2g.fill_image_sizes(post_data, {'other.jpg': (800, 600), 'photo.jpg': (1200, 800)})
+    assert post_data['content'] == card_html(width=1200, height=800)
+
+
+@pytest.mark.parametrize('post_format', ['mobiledoc', 'lexical'])
+def test_pending_card_document_is_filled_with_compressed_size(post_format):
+    tokens = [h2g.pending_size_token('photo.jpg', field) for field in ('width', 'height')]
+    post_data = {'content': h2g.card_document([h2g.image_card_section(GHOST_URL, *tokens)], post_format),
+                 'content_format': post_format, 'images': [{'ghost_url': GHOST_URL, 'width': None, 'height': None}]}
+    h2g.fill_image_sizes(post_data, {'photo.jpg': (3000, 2000)})
+    assert post_data['content'] == h2g.card_document([h2g.image_card_section(GHOST_URL, 3000, 2000)], post_format)
+
+
+EMBEDS = {
+    '//www.youtube.com/embed/abc': 'video',
+    'https://player.vimeo.com/video/1': 'video',
+    'https://serviceapi.rmcnmv.naver.com/flash/outKeyPlayer.nhn?vid=1': 'video',
+    'https://platform.twitter.com/embed/Tweet.html?id=1': 'rich',
+    'https://example.com/widget': None,
+}
+
+
+def embed_sections():
+    soup = h2g.parse_html(''.join(f'<iframe src="{src}"></iframe>' for src in EMBEDS))
+    return h2g.build_card_sections(soup.find_all('iframe'))
+
+
+def test_embed_type_follows_provider():
+    sections = embed_sections()
+    assert [section.get('embed_type') for section in sections] == list(EMBEDS.values())
+    # 제공자를 알 수 없는 iframe은 HTML 카드에 그대로 담음
+    assert sections[-1] == {'type': 'html', 'html': '<iframe src="https://example.com/widget"></iframe>'}
+
+
+def test_embed_cards_in_card_documents():
+    sections = embed_sections()
+    mobiledoc = h2g.mobiledoc_document(sections)
+    assert [(name, payload.get('type')) for name, payload in mobiledoc['cards']] == [
+        ('embed', 'video'), ('embed', 'video'), ('embed', 'video'), ('embed', 'rich'), ('html', None)]
+    lexical = h2g.lexical_document(sections)
+    assert [(node['type'], node.get('embedType')) for node in lexical['root']['children']] == [
+        ('embed', 'video'), ('embed', 'video'), ('embed', 'video'), ('embed', 'rich'), ('html', None)]
+
+
+def large_photo_post(base_dir):
+    """최저 품질로도 1MB를 넘어 크기를 줄여야 하는 사진 하나가 들어 있는 SE2 포스트 입력 디렉토리"""
+    input_dir = os.path.join(base_dir, 'POST_ARTICLE_001')
+    image_dir = os.path.join(input_dir, 'image', '20160303_3600001')
+    os.makedirs(image_dir)
+    Image.effect_noise((2400, 1800), 64).convert('RGB').save(os.path.join(image_dir, 'photo.jpg'), quality=95)
+    html = ('<html><head><meta charset="utf-8"></head><body><h3>큰 사진</h3>'
+            '<div style="border-bottom: solid 1px">2016.03.03. 12:00</div>'
+            '<div class="se2_in_page"><p>글</p><img src="image/20160303_3600001/photo.jpg"></div></body></html>')
+    with open(os.path.join(input_dir, '20160303_3600001_큰사진.html'), 'w', encoding='utf-8') as f:
+        f.write(html)
+    return input_dir
+
+
+@pytest.mark.parametrize('post_format', ['html', 'lexical'])
+def test_background_compression_reports_compressed_size(tmp_path, post_format):
+    input_dir = large_photo_post(str(tmp_path))
+    sequential, _ = export_post(input_dir, str(tmp_path / 'sequential'), post_format=post_format)
+    staged, _ = export_post(input_dir, str(tmp_path / 'staged'), post_format=post_format,
+                            image_threads=2, image_processes=1)
+    field = 'html' if post_format == 'html' else 'lexical'
+    assert staged[field] == sequential[field]
+    assert h2g.PENDING_SIZE_PREFIX not in staged[field]
+    # 카드의 크기는 원본이 아닌 압축 결과 이미지의 크기
+    image_name = os.path.basename(staged['feature_image'])
+    with Image.open(tmp_path / 'staged' / 'images' / '2016' / image_name) as img:
+        width, height = img.size
+    assert width < 2400
+    if post_format == 'html':
+        assert f'width="{width}"' in staged['html'] and f'height="{height}"' in staged['html']
+        assert f'{staged["feature_image"]} {width}w' in staged['html']
+    else:
+        image = next(node for node in json.loads(staged['lexical'])['root']['children'] if node['type'] == 'image')
+        assert (image['width'], image['height']) == (width, height)
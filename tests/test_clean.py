@@ -0,0 +1,55 @@
+"""스트리밍으로 정제한 JSON 파일(clean_json_file)이 전체를 읽어 정제한 결과(clean_json_data)와 같은지 확인"""
+import json
+
+import pytest
+
+import html_to_ghost as h2g
+
+
+def dirty_export(post_count=3, html_repeat=1):
+    """줄바꿈, 백슬래시, 연속 공백이 남아 있는 Ghost JSON 데이터"""
+    posts = [{
+        'id': f'{i:024x}',
+        'title': f'제목\\n  {i}\\\\ "따옴표"',
+        'slug': f'post-{i}',
+        'html': ('<p>본문\n\n  줄바꿈   공백\t\t탭 \\n 😀</p>' * html_repeat),
+        'feature_image': None,
+        'published_at': '2016-02-02T00:00:00.000Z',
+        'comment_id': i * 1.5,
+        'custom': {'nested': [1, True, None, {'title': '그대로\\n  유지'}], 'empty': {}},
+    } for i in range(post_count)]
+    tags = [{'id': i, 'name': f'태그\\n  {i}', 'slug': f'tag-{i}', 'description': '설명  \\\\ 끝'} for i in range(2)]
+    return {
+        'meta': {'exported_on': 1454371200000, 'version': '5.0.0', 'title': '메타\\n  그대로'},
+        'db': [{'meta': {}, 'data': {'posts': posts, 'tags': tags, 'posts_tags': [], 'users': []}}],
+    }
+
+
+@pytest.mark.parametrize('data', [
+    dirty_export(),
+    # 읽기 조각(64KB)보다 큰 본문
+    dirty_export(post_count=2, html_repeat=4000),
+    # 포스트/태그가 없거나 db가 비어 있는 파일
+    {'db': [{'data': {'posts': [], 'tags': []}}]},
+    {'db': []},
+    {'meta': {'title': '그대로\\n  유지'}},
+], ids=['posts', 'large-post', 'empty-arrays', 'empty-db', 'no-db'])
+# 입력 파일의 들여쓰기와 관계없이 같은 형식으로 저장
+@pytest.mark.parametrize('indent', [2, None])
+def test_clean_json_file_matches_clean_json_data(tmp_path, data, indent):
+    path = tmp_path / 'ghost-export-2016.json'
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=indent), encoding='utf-8')
+    h2g.clean_json_file(str(path))
+    # 기존 스크립트는 전체를 읽어 정제한 뒤 json.dump(ensure_ascii=False, indent=2)로 저장
+    expected = json.dumps(h2g.clean_json_data(json.loads(json.dumps(data))), ensure_ascii=False, indent=2)
+    assert path.read_text(encoding='utf-8') == expected
+
+
+def test_clean_json_file_keeps_original_on_error(tmp_path):
+    path = tmp_path / 'ghost-export-2016.json'
+    text = json.dumps(dirty_export(), ensure_ascii=False, indent=2)[:-20]
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError):
+        h2g.clean_json_file(str(path))
+    assert path.read_text(encoding='utf-8') == text
+    assert [p.name for p in tmp_path.iterdir()] == ['ghost-export-2016.json']
@@ -0,0 +1,82 @@
+"""큰 이미지 압축(디코딩 전 축소 비율 결정, 축소 디코딩, 한 번만 리샘플링) 확인"""
+import os
+
+import pytest
+from PIL import Image, JpegImagePlugin
+
+import html_to_ghost as h2g
+
+MAX_SIZE_MB = 0.1
+MAX_BYTES = int(MAX_SIZE_MB * 1024 * 1024)
+
+
+@pytest.fixture
+def noisy_jpeg(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    Image.effect_noise((1201, 901), 64).convert('RGB').save(path, quality=95)
+    return path
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """draft 요청 크기, 디코딩한 크기, 리샘플링 크기 기록"""
+    recorded = {'draft': [], 'load': [], 'resize': []}
+    real_draft, real_resize = JpegImagePlugin.JpegImageFile.draft, Image.Image.resize
+
+    def draft(self, mode, size):
+        recorded['draft'].append(size)
+        result = real_draft(self, mode, size)
+        recorded['load'].append(self.size)
+        return result
+
+    def resize(self, size, *args, **kwargs):
+        recorded['resize'].append(size)
+        return real_resize(self, size, *args, **kwargs)
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, 'draft', draft)
+    monkeypatch.setattr(Image.Image, 'resize', resize)
+    return recorded
+
+
+def test_header_estimate(noisy_jpeg):
+    file_size = os.path.getsize(noisy_jpeg)
+    with Image.open(noisy_jpeg) as img:
+        # 최저 품질로 맞출 수 있으면 축소하지 않고, 아주 작은 최대 크기면 최소 비율
+        assert h2g.estimate_jpeg_resize_ratio(img, file_size, file_size, h2g.RESIZE_JPEG_QUALITY) is None
+        assert h2g.estimate_jpeg_resize_ratio(img, file_size, 1024, h2g.RESIZE_JPEG_QUALITY) == h2g.MIN_RESIZE_RATIO
+
+
+def test_half_scale_jpeg_is_draft_decoded_without_resampling(noisy_jpeg, tmp_path, calls):
+    output_path = str(tmp_path / 'out.jpg')
+    size = h2g.compress_image(noisy_jpeg, output_path, MAX_SIZE_MB)
+    # 1/2 배율로 디코딩한 결과를 그대로 사용 (원래 크기로 디코딩하거나 리샘플링하지 않음)
+    assert calls['draft'] == [(600, 450)]
+    assert calls['load'] == [(601, 451)]
+    assert calls['resize'] == []
+    assert size == (601, 451)
+    with Image.open(output_path) as img:
+        assert img.size == size
+
+
+def test_underestimated_resize_lowers_quality_instead_of_resizing_again(noisy_jpeg, tmp_path, calls, monkeypatch):
+    # 추정이 빗나가 축소 비율이 너무 크면 다시 줄이지 않고 품질을 낮춰 최대 크기에 맞춤
+    monkeypatch.setattr(h2g, 'estimate_jpeg_resize_ratio', lambda *args: 0.6)
+    output_path = str(tmp_path / 'out.jpg')
+    size = h2g.compress_image(noisy_jpeg, output_path, MAX_SIZE_MB * 3)
+    assert calls['resize'] == [(720, 540)]
+    assert size == (720, 540)
+    assert os.path.getsize(output_path) <= MAX_BYTES * 3
+    with Image.open(output_path) as img:
+        assert img.size == size
+        assert img.quantization[0] != Image.open(noisy_jpeg).quantization[0]
+
+
+def test_other_formats_resample_once(tmp_path, calls):
+    path = str(tmp_path / 'photo.png')
+    Image.effect_noise((1200, 900), 64).convert('RGB').save(path)
+    output_path = str(tmp_path / 'out.jpg')
+    size = h2g.compress_image(path, output_path, MAX_SIZE_MB * 3)
+    # 헤더로 비율을 알 수 없으면 원래 크기로 디코딩한 뒤 한 번 인코딩해 본 크기로 비율을 정해 한 번만 축소
+    assert calls['resize'] == [size]
+    assert 600 < size[0] < 1200
+    assert os.path.getsize(output_path) <= MAX_BYTES * 3
@@ -0,0 +1,23 @@
+"""Converter 라이브러리 API 확인"""
+import os
+import shutil
+
+import html_to_ghost as h2g
+from conftest import export_post, sample_input
+
+
+def test_converters_keep_separate_image_indexes(tmp_path):
+    input_dir = sample_input(str(tmp_path / 'src'))
+    image_dir = os.path.join(input_dir, 'image', '20160202_3509403')
+    moved_dir = str(tmp_path / 'moved')
+    shutil.move(image_dir, moved_dir)
+    with h2g.Converter(str(tmp_path / 'early')) as early:
+        # 포스트 이미지 디렉토리가 없을 때 탐색한 Converter의 목록이 다른 Converter에 섞이지 않아야 함
+        early.scan([input_dir])
+        shutil.move(moved_dir, image_dir)
+        post, _ = export_post(input_dir, str(tmp_path / 'out'))
+        assert early.image_locator is not h2g.get_image_locator()
+    expected, _ = export_post(input_dir, str(tmp_path / 'expected'))
+    assert post['feature_image']
+    assert post['html'] == expected['html']
+    assert sorted(os.listdir(tmp_path / 'out' / 'images' / '2016')) == sorted(os.listdir(tmp_path / 'expected' / 'images' / '2016'))
@@ -0,0 +1,81 @@
+"""HTML 파일의 인코딩 판별과 디코딩(메모리 맵에서 바로 디코딩, 판별이 틀렸을 때의 대체 인코딩) 확인"""
+import zipfile
+
+import pytest
+
+import html_to_ghost as h2g
+
+TEXT = '<p>수다쟁이 오리와 무뚝뚝한 곰 똠방각하</p>'
+
+
+def page(head=''):
+    return f'<html><head>{head}</head><body>{TEXT}</body></html>'
+
+
+# 이름 -> (파일 내용, 판별 결과 (인코딩, 방법))
+CASES = {
+    'utf8_meta': (page('<meta charset="utf-8">').encode('utf-8'), ('utf-8', 'meta')),
+    'euckr_meta': (page('<meta http-equiv="Content-Type" content="text/html; charset=euc-kr">').encode('cp949'),
+                   ('cp949', 'meta')),
+    'cp949_without_meta': (page().encode('cp949'), ('cp949', 'bytes')),
+    'utf8_without_meta': (page().encode('utf-8'), ('utf-8', 'bytes')),
+    'utf8_bom': (b'\xef\xbb\xbf' + page().encode('utf-8'), ('utf-8', 'bom')),
+    'utf16_bom': (page().encode('utf-16'), ('utf-16', 'bom')),
+    # meta charset이 실제 인코딩과 다르면 바이트 통계로 판별
+    'wrong_meta': (page('<meta charset="euc-kr">').encode('utf-8'), ('utf-8', 'bytes')),
+}
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / f'{name}.html'
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_read_html_source_detects_and_decodes(tmp_path, name):
+    data, expected = CASES[name]
+    text, encoding, method = h2g.read_html_source(write(tmp_path, name, data))
+    assert (encoding, method) == expected
+    assert TEXT in text
+    assert not text.startswith('﻿')
+
+
+def test_utf8_matches_plain_text_read(tmp_path):
+    # 기존 스크립트는 HTML 파일을 UTF-8 텍스트로 읽었음
+    path = write(tmp_path, 'utf8', CASES['utf8_meta'][0])
+    with open(path, encoding='utf-8') as f:
+        assert h2g.read_html_source(path)[0] == f.read()
+
+
+def test_empty_file(tmp_path):
+    assert h2g.read_html_source(write(tmp_path, 'empty', b'')) == ('', 'utf-8', 'empty')
+
+
+def test_size_limit_is_opt_in(tmp_path):
+    path = write(tmp_path, 'large', page().encode('utf-8') * 1000)
+    assert h2g.DEFAULT_MAX_HTML_MB == 0
+    assert h2g.read_html_source(path) is not None
+    assert h2g.read_html_source(path, max_bytes=1024) is None
+
+
+def test_decode_html_falls_back_when_detected_encoding_fails():
+    data = page().encode('cp949')
+    assert TEXT in h2g.decode_html(data, 'utf-8', 'meta')
+
+
+def test_decode_html_replaces_undecodable_bytes():
+    data = page().encode('utf-8') + b'\xff\xfe\xff'
+    text = h2g.decode_html(data, 'utf-8', 'bytes')
+    assert TEXT in text
+    assert text.endswith('�' * 3)
+
+
+@pytest.mark.parametrize('name', ['euckr_meta', 'cp949_without_meta', 'utf8_bom'])
+def test_archive_member_decodes_like_file(tmp_path, name):
+    data = CASES[name][0]
+    archive_path = tmp_path / 'backup.zip'
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr(f'POST_ARTICLE_001/{name}.html', data)
+    member = f'{archive_path}/POST_ARTICLE_001/{name}.html'
+    assert h2g.read_html_source(member) == h2g.read_html_source(write(tmp_path, name, data))
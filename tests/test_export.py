@@ -0,0 +1,67 @@
+"""Ghost JSON 내보내기(분할 파일 크기, 이전 내보내기 파일 정리) 확인"""
+import json
+import os
+
+import html_to_ghost as h2g
+from conftest import sample_input
+
+
+def make_post(index, tags):
+    return {'id': f'{index:024x}', 'title': f'포스트 {index}', 'slug': f'post-{index}', 'content': f'<p>본문 {index}</p>',
+            'feature_image': None, 'published_at': '2016-02-02T00:00:00.000Z', 'tags': tags, 'images': []}
+
+
+def test_multi_post_shards_stay_within_max_bytes(tmp_path):
+    # 태그가 많아 태그/posts_tags 배열이 파일 크기의 상당 부분을 차지하는 포스트
+    posts = [make_post(i, [f't{i}a', f't{i}b', f'공통{i % 5}']) for i in range(200)]
+    with h2g.ShardedGhostJsonWriter(str(tmp_path / 'ghost-export-2016.json'), max_bytes=20000) as writer:
+        for post in posts:
+            writer.add_post(post)
+    assert len(writer.shards) > 1
+    for shard in writer.shards:
+        size = os.path.getsize(shard['path'])
+        assert size == shard['size']
+        if shard['post_count'] > 1:
+            assert size <= 20000
+    # 분할 파일을 합치면 모든 포스트와 태그 연결이 한 번씩 들어 있음
+    links = []
+    for shard in writer.shards:
+        with open(shard['path'], encoding='utf-8') as f:
+            links += json.load(f)['db'][0]['data']['posts_tags']
+    assert len(links) == 3 * len(posts)
+
+
+def test_projected_size_matches_written_size(tmp_path):
+    output_file = str(tmp_path / 'ghost-export-2016.json')
+    writer = h2g.GhostJsonWriter(output_file)
+    writer.add_post(make_post(0, ['하나', '둘']))
+    post = make_post(1, ['둘', '셋', '셋', ''])
+    projected = writer.projected_size(post, writer.encode_post(post))
+    writer.add_post(post)
+    writer.close()
+    assert os.path.getsize(output_file) == projected
+
+
+def test_create_ghost_json_leaves_other_files(tmp_path):
+    siblings = ['ghost-export-2016-001.json', 'ghost-export-2016.zip', 'ghost-export-2016-002.zip']
+    for name in siblings:
+        (tmp_path / name).write_text('{}')
+    h2g.create_ghost_json([make_post(0, ['태그'])], str(tmp_path / 'ghost-export-2016.json'))
+    assert sorted(os.listdir(tmp_path)) == sorted(siblings + ['ghost-export-2016.json'])
+
+
+def test_converter_removes_other_export_layout(tmp_path):
+    input_dir = sample_input(str(tmp_path / 'src'))
+    output_dir = tmp_path / 'out'
+    with h2g.Converter(str(output_dir), max_shard_posts=1, shard_zip=True) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    assert os.path.exists(output_dir / 'ghost-export-2016-001.json')
+    assert os.path.exists(output_dir / 'ghost-export-2016-001.zip')
+    (output_dir / 'ghost-export-2017.json').write_text('{}')
+    # 분할하지 않고 다시 내보내면 같은 연도의 분할 파일과 zip만 삭제
+    with h2g.Converter(str(output_dir)) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    exports = sorted(name for name in os.listdir(output_dir) if name.startswith('ghost-export-'))
+    assert exports == ['ghost-export-2016.json', 'ghost-export-2016.manifest.jsonl', 'ghost-export-2017.json']
@@ -0,0 +1,71 @@
+"""본문 클래스가 없는 문서에서 한 번 순회로 찾은 가장 큰 div가 기존 방법 6의 선택과 같은지 확인"""
+import random
+
+import pytest
+
+import html_to_ghost as h2g
+
+WORDS = ['오리', '곰', '똠방각하', 'ghost', 'naver', '포스트', '사진', 'blog']
+
+
+def legacy_largest_div(soup):
+    """기존 방법 6: div마다 get_text()/find_all('img')로 하위 트리를 다시 순회"""
+    main_content_div = None
+    max_content_length = 0
+    for div in soup.find_all('div'):
+        content_length = len(div.get_text()) + len(div.find_all('img')) * 100
+        if content_length > max_content_length:
+            max_content_length = content_length
+            main_content_div = div
+    return main_content_div
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def nested_html(seed, depth, sections=12):
+    """이미지, 주석, script/style, CDATA가 섞인 깊게 중첩된 합성 문서"""
+    rng = random.Random(seed)
+    parts = []
+    for section in range(sections):
+        inner = f"<p>{words(rng, rng.randint(0, 30))}</p>"
+        if rng.random() < 0.4:
+            inner += f'<img src="image/{section}.jpg">'
+        if rng.random() < 0.3:
+            inner += (f"<!-- {words(rng, 20)} --><script>var x = '{words(rng, 20)}';</script>"
+                      f"<style>p {{ color: red; }}</style><![CDATA[{words(rng, 5)}]]>")
+        for level in range(rng.randint(depth // 2, depth)):
+            inner = f'<div class="level{level}">{inner}<span>{rng.choice(WORDS)}</span></div>'
+        parts.append(inner)
+    return (f'<html><head><title>nested</title></head><body>{"".join(parts)}'
+            f'<div class="footer">{words(rng, rng.randint(0, 60))}</div></body></html>')
+
+
+@pytest.mark.parametrize('depth', [1, 4, 12, 40])
+@pytest.mark.parametrize('seed', range(5))
+def test_largest_div_matches_legacy_scan(seed, depth):
+    soup = h2g.parse_html(nested_html(seed, depth))
+    div, text_length, img_count = h2g.find_largest_content_div(soup)
+    assert div is legacy_largest_div(soup)
+    assert (text_length, img_count) == (len(div.get_text()), len(div.find_all('img')))
+    # 각 섹션 안에서도 같은 div를 선택 (하위 트리만 순회)
+    for section in soup.body.find_all('div', recursive=False):
+        assert h2g.find_largest_content_div(section)[0] is legacy_largest_div(section)
+
+
+@pytest.mark.parametrize('html', [
+    # 같은 크기면 문서에서 먼저 나온 div
+    '<div id="a"><p>같은 글</p></div><div id="b"><p>같은 글</p></div>',
+    # 바깥 div가 안쪽 div의 텍스트를 모두 포함하면 바깥 div
+    '<div id="outer"><div id="inner">본문</div></div>',
+    # 이미지 하나는 텍스트 100자와 같은 가중치
+    f'<div id="text">{"가" * 100}</div><div id="image"><img src="a.jpg"></div>',
+    f'<div id="text">{"가" * 101}</div><div id="image"><img src="a.jpg"></div>',
+    # 내용이 없는 div만 있으면 선택하지 않음
+    '<div></div><div><!-- 주석 --></div>',
+    '<p>div 없음</p>',
+])
+def test_largest_div_edge_cases_match_legacy_scan(html):
+    soup = h2g.parse_html(html)
+    assert h2g.find_largest_content_div(soup)[0] is legacy_largest_div(soup)
@@ -0,0 +1,112 @@
+"""레이아웃별 추출기가 기존(레이아웃 판별 전) 추출 순서와 같은 제목/날짜/본문을 찾는지 확인"""
+import glob
+import os
+
+import pytest
+
+import html_to_ghost as h2g
+from conftest import ROOT
+
+
+def baseline_extract(soup, default_title, date_str):
+    """레이아웃 판별 전의 추출 순서 (soup.find/find_all로 후보를 차례로 확인)"""
+    title = default_title
+    title_tag = soup.find('h3')
+    if title_tag:
+        title = title_tag.text
+    else:
+        title_h5 = soup.find('h5', class_='se_textarea')
+        if title_h5:
+            title = h2g.se3_text_title(title_h5)
+        else:
+            title_div = soup.find('div', class_='se_card_titleView')
+            if title_div and title_div.find('h5'):
+                title = title_div.find('h5').text
+
+    date_div = soup.find('div', style=lambda s: s and 'border-bottom: solid' in s)
+    if date_div:
+        date_text = date_div.text
+    else:
+        date_span = soup.find('span', class_='se_publishDate')
+        date_text = date_span.text if date_span else f"{date_str[:4]}.{date_str[4:6]}.{date_str[6:8]}. 00:00"
+
+    content_divs = []
+    for class_name in ('se2_in_page', 'se_textView', 'se_component_wrap', 'se_card'):
+        content_divs = soup.find_all('div', class_=class_name)
+        if content_divs:
+            break
+    return title, date_text, content_divs
+
+
+def page(body):
+    return f'<html><head><meta charset="utf-8"></head><body>{body}</body></html>'
+
+
+FIXTURES = {
+    'se2': page(
+        '<h3>SE2 제목</h3><div style="border-bottom: solid 1px #ccc">2016.02.02. 12:00</div>'
+        '<div class="se2_in_page"><p>첫 문단</p></div><div class="se2_in_page"><p>둘째 문단</p></div>'),
+    'se2_with_se3_markers': page(
+        '<h5 class="se_textarea">SE3 제목</h5><span class="se_publishDate">2016.01.01. 09:00</span>'
+        '<div class="se2_in_page"><p>본문</p></div><div class="se_textView"><p>다른 본문</p></div>'),
+    'se3_text': page(
+        '<div class="se_title"><h5 class="se_textarea"><!-- SE3-TEXT { -->텍스트 제목<!-- } SE3-TEXT --></h5></div>'
+        '<span class="se_publishDate">2017.03.04. 10:00</span>'
+        '<div class="se_textView"><p class="se_textarea">본문</p></div>'),
+    'se3_text_with_h3_and_border_date': page(
+        '<h3>h3 제목</h3><h5 class="se_textarea">텍스트 제목</h5>'
+        '<div style="border-bottom: solid 1px">2017.05.06. 11:00</div><span class="se_publishDate">2017.01.01. 00:00</span>'
+        '<div class="se_textView"><p>본문</p></div>'),
+    'se3_card': page(
+        '<div class="se_card_titleView"><h5>카드 제목</h5></div><span class="se_publishDate">2018.07.08. 13:00</span>'
+        '<div class="se_component_wrap"><div class="se_card"><img src="image/a.jpg"></div></div>'),
+    'se3_card_with_textarea': page(
+        '<div class="se_card_titleView"><h5>카드 제목</h5></div><h5 class="se_textarea">텍스트 제목</h5>'
+        '<span class="se_publishDate">2018.07.08. 13:00</span>'
+        '<div class="se_component_wrap"><div class="se_textView"><p>글</p></div></div>'
+        '<div class="se_component_wrap"><div class="se_card"><img src="image/b.jpg"></div></div>'),
+    'se3_card_only_cards': page(
+        '<div class="se_card"><p>첫 카드</p></div><div class="se_card"><img src="image/c.jpg"></div>'),
+    'unknown': page('<div><p>짧은 글</p></div><div><p>가장 긴 본문 문단입니다.</p><img src="image/d.jpg"></div>'),
+}
+
+EXPECTED_LAYOUTS = {
+    'se2': 'se2',
+    'se2_with_se3_markers': 'se2',
+    'se3_text': 'se3_text',
+    'se3_text_with_h3_and_border_date': 'se3_text',
+    'se3_card': 'se3_card',
+    'se3_card_with_textarea': 'se3_card',
+    'se3_card_only_cards': 'se3_card',
+    'unknown': 'unknown',
+}
+
+
+def assert_same_as_baseline(soup, default_title, date_str):
+    layout, title, date_text, _, content_divs = h2g.extract_document(soup, default_title, date_str)
+    base_title, base_date, base_divs = baseline_extract(soup, default_title, date_str)
+    assert title == base_title
+    assert date_text == base_date
+    if base_divs:
+        assert [id(div) for div in content_divs] == [id(div) for div in base_divs]
+    return layout
+
+
+@pytest.mark.parametrize('name', sorted(FIXTURES))
+def test_layout_extractors_match_baseline(name):
+    soup = h2g.parse_html(FIXTURES[name])
+    layout = assert_same_as_baseline(soup, 'filename-title', '20160202')
+    assert layout == EXPECTED_LAYOUTS[name]
+
+
+def test_card_layout_is_checked_before_text_layout():
+    names = [layout.name for layout in h2g.LAYOUT_REGISTRY]
+    assert names.index('se3_card') < names.index('se3_text')
+
+
+@pytest.mark.parametrize('html_file', sorted(glob.glob(os.path.join(ROOT, 'POST_ARTICLE_*', '*.html'))))
+def test_sample_post_matches_baseline(html_file):
+    date_str = os.path.basename(html_file).split('_')[0]
+    text, encoding, _ = h2g.read_html_source(html_file)
+    soup = h2g.parse_html(text)
+    assert assert_same_as_baseline(soup, 'filename-title', date_str) == 'se2'
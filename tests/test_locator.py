@@ -0,0 +1,131 @@
+"""ImageLocator가 기존 스크립트와 같은 우선순위로 이미지 원본 파일을 찾는지 확인"""
+import os
+import re
+
+from PIL import Image
+
+import html_to_ghost as h2g
+
+DATE_STR, POST_ID = '20160303', '3600001'
+POST_DIR = f'{DATE_STR}_{POST_ID}'
+HTML_FILE = os.path.join('blog', 'POST_ARTICLE_001', f'{POST_DIR}_후보.html')
+
+# 여러 후보 경로에 같은 이름의 파일이 있는 입력 트리 (작업 디렉토리 기준)
+FILES = [
+    # HTML 파일 옆 image 폴더와 작업 디렉토리 image 폴더에 모두 있음
+    f'blog/POST_ARTICLE_001/image/{POST_DIR}/a.jpg',
+    f'image/{POST_DIR}/a.jpg',
+    # 작업 디렉토리와 POST_ARTICLE_001 폴더에만 있음
+    f'image/{POST_DIR}/b.jpg',
+    f'POST_ARTICLE_001/image/{POST_DIR}/b.jpg',
+    # 사용자가 제공한 형식과 상위 디렉토리 image 폴더
+    f'image/{POST_DIR}/{POST_DIR}_1.JPEG',
+    f'blog/image/{POST_DIR}/{POST_DIR}_1.jpg',
+    # 외부 src 파일명과 이미지 ID 기반 파일명
+    f'blog/POST_ARTICLE_001/image/{POST_DIR}/e.png',
+    f'blog/POST_ARTICLE_001/image/{POST_DIR}/c.png',
+    f'blog/POST_ARTICLE_001/image/{POST_DIR}/d.png',
+    f'image/{POST_DIR}/7_8.jpg',
+]
+
+IMAGES = [
+    f'<img src="image/{POST_DIR}/a.jpg">',
+    f'<img src="image/{POST_DIR}/b.jpg">',
+    # 어느 폴더에도 없는 파일명은 사용자가 제공한 형식으로 찾음
+    f'<img src="image/{POST_DIR}/z.jpg">',
+    # 이미지 ID가 나오기 전에는 src 파일명으로 찾음
+    '<img src="http://example.com/e.png">',
+    '<img src="http://example.com/c.png" data-image-id="7_8">',
+    # 이미지 ID가 없어도 앞에서 추출한 ID 기반 경로가 src 파일명보다 먼저 선택됨
+    '<img src="http://example.com/d.png">',
+]
+
+
+def legacy_find(html_file, date_str, post_id, soup):
+    """기존 스크립트의 후보 경로 목록과 os.path.exists 탐색 (발견한 경로 목록 반환)"""
+    found = []
+    for img in soup.find_all('img'):
+        src = img['src']
+        if src.startswith('image/'):
+            img_filename = os.path.basename(src)
+        else:
+            img_id_match = re.search(r'data-image-id="(\d+)_(\d+)"', str(img))
+            if img_id_match:
+                section_id, img_id = img_id_match.groups()
+                img_filename = f"{date_str}_{post_id}_{section_id}_{img_id}.jpg"
+            else:
+                img_filename = f"{date_str}_{post_id}_unknown.jpg"
+        possible_paths = [
+            os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", img_filename),
+            os.path.join('image', f"{date_str}_{post_id}", img_filename),
+            src if os.path.isabs(src) else os.path.join(os.path.dirname(html_file), src),
+            os.path.join('POST_ARTICLE_001', 'image', f"{date_str}_{post_id}", img_filename),
+            os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", f"{section_id}_{img_id}.jpg") if 'section_id' in locals() else None,
+            os.path.join('image', f"{date_str}_{post_id}", f"{section_id}_{img_id}.jpg") if 'section_id' in locals() else None,
+            os.path.join(os.path.dirname(html_file), 'image', f"{date_str}_{post_id}", os.path.basename(src)),
+            os.path.join('image', f"{date_str}_{post_id}", os.path.basename(src)),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.JPEG"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpeg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.JPG"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.png"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.PNG"),
+            os.path.join(os.path.dirname(os.path.dirname(html_file)), 'image', f"{date_str}_{post_id}", img_filename),
+            os.path.join(os.path.dirname(os.path.dirname(html_file)), 'image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_1.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_2.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_3.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_4.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}_5.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.jpg"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.png"),
+            os.path.join('image', f"{date_str}_{post_id}", f"{date_str}_{post_id}.gif"),
+            os.path.join('image', f"{date_str}_{post_id}", img_filename),
+        ]
+        found.append(next((path for path in possible_paths if path and os.path.exists(path)), None))
+    return found
+
+
+def make_tree(base_dir):
+    for i, path in enumerate(FILES):
+        full_path = os.path.join(base_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # 파일마다 내용이 달라야 출력 이미지로 구분할 수 있음
+        Image.new('RGB', (8, 8), (i * 20, 0, 0)).save(full_path, 'JPEG')
+    html = ('<html><head><meta charset="utf-8"></head><body><h3>후보</h3>'
+            '<div style="border-bottom: solid 1px">2016.03.03. 12:00</div>'
+            f'<div class="se2_in_page"><p>글</p>{"".join(IMAGES)}</div></body></html>')
+    with open(os.path.join(base_dir, HTML_FILE), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def test_locator_matches_legacy_probe_order(tmp_path, monkeypatch):
+    make_tree(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    expected = legacy_find(HTML_FILE, DATE_STR, POST_ID, h2g.parse_html(''.join(IMAGES)))
+    assert None not in expected
+    # 같은 이름의 파일이 여러 후보 경로에 있어도 우선순위를 따름
+    assert expected == [
+        os.path.join('blog', 'POST_ARTICLE_001', 'image', POST_DIR, 'a.jpg'),
+        os.path.join('image', POST_DIR, 'b.jpg'),
+        os.path.join('image', POST_DIR, f'{POST_DIR}_1.JPEG'),
+        os.path.join('blog', 'POST_ARTICLE_001', 'image', POST_DIR, 'e.png'),
+        os.path.join('image', POST_DIR, '7_8.jpg'),
+        os.path.join('image', POST_DIR, '7_8.jpg'),
+    ]
+    post_data = h2g.process_html_file(HTML_FILE, 'out', image_locator=h2g.ImageLocator(), use_image_cache=False)
+    assert [image['original_path'] for image in post_data['images']] == expected
+
+
+def test_locator_find_matches_os_path_exists(tmp_path, monkeypatch):
+    make_tree(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    locator = h2g.ImageLocator()
+    soup = h2g.parse_html(''.join(IMAGES))
+    image_id = None
+    for img in soup.find_all('img'):
+        match = h2g.IMAGE_ID_RE.fullmatch(img.get('data-image-id') or '')
+        if match:
+            image_id = match.groups()
+        paths = h2g.build_image_candidates(HTML_FILE, DATE_STR, POST_ID, img['src'], os.path.basename(img['src']),
+                                           image_id)
+        assert locator.find(paths) == next((path for path in paths if path and os.path.exists(path)), None)
@@ -0,0 +1,105 @@
+"""변환 기록(매니페스트)으로 바뀌지 않은 파일은 다시 변환하지 않고, 바뀐 파일과 설정은 다시 변환하는지 확인"""
+import os
+
+import pytest
+
+import html_to_ghost as h2g
+from conftest import read_exports, synthetic_input, write_post
+
+
+@pytest.fixture
+def converted(monkeypatch):
+    """process_html_file로 변환한 HTML 파일명 목록"""
+    names = []
+    real_process_html_file = h2g.process_html_file
+
+    def counting_process_html_file(html_file, *args, **kwargs):
+        names.append(os.path.basename(html_file))
+        return real_process_html_file(html_file, *args, **kwargs)
+
+    monkeypatch.setattr(h2g, 'process_html_file', counting_process_html_file)
+    return names
+
+
+def export(input_dir, output_dir, **options):
+    with h2g.Converter(output_dir, **options) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    return read_exports(output_dir)
+
+
+@pytest.fixture
+def first_export(tmp_path, converted):
+    input_dir = synthetic_input(str(tmp_path / 'src'), years=('2016',))
+    output_dir = str(tmp_path / 'out')
+    exports = export(input_dir, output_dir)
+    assert len(converted) == 6
+    converted.clear()
+    return input_dir, output_dir, exports
+
+
+def html_files(input_dir):
+    return sorted(name for name in os.listdir(input_dir) if name.endswith('.html'))
+
+
+def test_unchanged_files_are_not_converted_again(first_export, converted):
+    input_dir, output_dir, exports = first_export
+    assert export(input_dir, output_dir) == exports
+    assert converted == []
+    # 수정 시각만 바뀌고 내용이 같은 파일도 다시 변환하지 않음
+    os.utime(os.path.join(input_dir, html_files(input_dir)[0]), ns=(0, 0))
+    assert export(input_dir, output_dir) == exports
+    assert converted == []
+
+
+def test_changed_file_is_converted_again(first_export, converted):
+    input_dir, output_dir, _ = first_export
+    name = html_files(input_dir)[2]
+    date_str, post_id = name.split('_')[:2]
+    os.remove(os.path.join(input_dir, name))
+    write_post(input_dir, date_str, post_id, name.split('_', 2)[2][:-len('.html')], tags=['바뀐태그'])
+    exports = export(input_dir, output_dir)
+    assert converted == [name]
+    data = exports['ghost-export-2016.json']['db'][0]['data']
+    assert '바뀐태그' in [tag['name'] for tag in data['tags']]
+
+
+def test_missing_output_image_is_converted_again(first_export, converted):
+    input_dir, output_dir, exports = first_export
+    image_dir = os.path.join(output_dir, 'images', '2016')
+    os.remove(os.path.join(image_dir, sorted(os.listdir(image_dir))[0]))
+    assert export(input_dir, output_dir, use_image_cache=False) == exports
+    assert len(converted) == 1
+
+
+def test_interrupted_manifest_line_is_discarded(first_export, converted):
+    input_dir, output_dir, exports = first_export
+    manifest_file = os.path.join(output_dir, 'ghost-export-2016.manifest.jsonl')
+    # 마지막 기록을 쓰는 중에 중단된 매니페스트
+    with open(manifest_file, 'rb+') as f:
+        f.truncate(os.path.getsize(manifest_file) - 10)
+    assert export(input_dir, output_dir) == exports
+    assert len(converted) == 1
+    with open(manifest_file, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+
+def test_changed_options_invalidate_records(first_export, converted):
+    input_dir, output_dir, _ = first_export
+    export(input_dir, output_dir, post_format='lexical')
+    assert len(converted) == 6
+    converted.clear()
+    export(input_dir, output_dir, post_format='lexical')
+    assert converted == []
+
+
+def test_force_and_version_invalidate_records(first_export, converted, monkeypatch):
+    input_dir, output_dir, exports = first_export
+    with h2g.Converter(output_dir) as converter:
+        converter.scan([input_dir])
+        converter.export_all(force=True)
+    assert len(converted) == 6
+    converted.clear()
+    monkeypatch.setattr(h2g, 'MANIFEST_VERSION', h2g.MANIFEST_VERSION + 1)
+    assert export(input_dir, output_dir) == exports
+    assert len(converted) == 6
@@ -0,0 +1,61 @@
+"""한 번 파싱하는 변환 파이프라인이 기존 스크립트와 같은 포스트를 만드는지 확인"""
+import json
+import os
+import re
+
+import pytest
+
+import html_to_ghost as h2g
+from conftest import ROOT, SAMPLE_NAME, SAMPLE_POST, export_post, sample_input
+
+# 기존 스크립트(레이아웃 판별, 이미지 카드, 네이버 마크업 정리 이전)로 sample_input의 디렉토리를 변환한 결과
+# 이미지 파일명은 실행마다 달라지므로 IMAGE로 바꾸어 저장
+with open(os.path.join(ROOT, 'tests', 'data', 'sample_post_baseline.json'), encoding='utf-8') as f:
+    BASELINE = json.load(f)
+
+IMAGE_URL_RE = re.compile(r'/content/images/\d{4}/[^"\s]+')
+
+
+def test_sample_post_matches_baseline_output(tmp_path):
+    # 이미지 카드와 네이버 마크업 정리를 끄면 기존 스크립트와 같은 HTML을 출력
+    post, tags = export_post(sample_input(str(tmp_path)), str(tmp_path / 'out'), image_cards=False,
+                             keep_naver_markup=True)
+    assert post['title'] == BASELINE['title']
+    assert post['slug'] == BASELINE['slug']
+    assert post['published_at'] == BASELINE['published_at']
+    assert IMAGE_URL_RE.sub('IMAGE', post['feature_image']) == BASELINE['feature_image']
+    assert tags == BASELINE['tags']
+    assert IMAGE_URL_RE.sub('IMAGE', post['html']) == BASELINE['html']
+
+
+def test_process_html_file_parses_once(tmp_path, monkeypatch):
+    calls = []
+    real_parse_html = h2g.parse_html
+
+    def counting_parse_html(*args, **kwargs):
+        calls.append(args)
+        return real_parse_html(*args, **kwargs)
+
+    monkeypatch.setattr(h2g, 'parse_html', counting_parse_html)
+    html_file = os.path.join(sample_input(str(tmp_path)), SAMPLE_NAME)
+    post_data = h2g.process_html_file(html_file, str(tmp_path / 'out'), image_locator=h2g.ImageLocator(),
+                                      use_image_cache=False)
+    assert len(post_data['images']) == BASELINE['html'].count('IMAGE')
+    assert len(calls) == 1
+
+
+def test_tags_from_shared_tree_match_standalone_parse():
+    text, _, _ = h2g.read_html_source(SAMPLE_POST)
+    soup = h2g.parse_html(text)
+    assert h2g.extract_tags(soup) == h2g.extract_tags_from_html(text) == BASELINE['tags']
+
+
+@pytest.mark.skipif(h2g.resolve_html_parser('auto') != 'lxml', reason='lxml이 설치되어 있지 않음')
+def test_lxml_backend_extracts_same_fields():
+    text, _, _ = h2g.read_html_source(SAMPLE_POST)
+    results = []
+    for parser in ('html.parser', 'lxml'):
+        soup = h2g.parse_html(text, parser)
+        layout, title, date_text, _, content_divs = h2g.extract_document(soup, 'filename-title', '20160202')
+        results.append((layout, title, date_text, len(content_divs), h2g.extract_tags(soup)))
+    assert results[0] == results[1]
@@ -0,0 +1,30 @@
+"""--stream으로 포스트를 바로 기록한 JSON이 연도 전체를 모아 기록한 JSON과 같은지 확인"""
+import os
+import re
+
+import pytest
+
+import html_to_ghost as h2g
+from conftest import read_exports, synthetic_input
+
+
+def export(input_dir, output_dir, **options):
+    with h2g.Converter(output_dir, **options) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    return read_exports(output_dir)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_stream_export_matches_collected_export(tmp_path, workers):
+    input_dir = synthetic_input(str(tmp_path / 'src'))
+    collected = export(input_dir, str(tmp_path / 'collected'), workers=workers)
+    streamed = export(input_dir, str(tmp_path / 'streamed'), workers=workers, stream=True)
+    assert sorted(collected) == ['ghost-export-2016.json', 'ghost-export-2017.json']
+    assert streamed == collected
+    # 들여쓰기와 키 순서까지 같은 파일 (내보낸 시각 제외)
+    for name in collected:
+        texts = [re.sub(r'"exported_on": \d+', '', (tmp_path / run / name).read_text(encoding='utf-8'))
+                 for run in ('collected', 'streamed')]
+        assert texts[0] == texts[1]
+    assert not [name for name in os.listdir(tmp_path / 'streamed') if name.endswith('.tmp')]
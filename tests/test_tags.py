@@ -0,0 +1,65 @@
+"""여러 연도의 내보내기에서 태그 ID와 슬러그가 겹치지 않고 같은 태그는 같은 값을 가지는지 확인"""
+import os
+
+import html_to_ghost as h2g
+from conftest import read_exports, write_post
+
+# 연도 -> 포스트별 태그 (이름은 다르지만 슬러그가 같은 태그와 슬러그를 만들 수 없는 태그 포함)
+POSTS = {
+    '2016': [['Ghost', 'tag 3', '!!!']],
+    '2017': [['ghost', '블로그'], ['Ghost!', '블로그', 'Ghost']],
+}
+
+
+def make_input(base_dir):
+    input_dir = os.path.join(base_dir, 'POST_ARTICLE_001')
+    for year, posts in POSTS.items():
+        for i, tags in enumerate(posts):
+            write_post(input_dir, f'{year}030{i + 1}', f'{year[-2:]}0000{i}', f'포스트{year}{i}', tags=tags, image_count=0)
+    return input_dir
+
+
+def export(input_dir, output_dir, **options):
+    with h2g.Converter(output_dir, **options) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    return read_exports(output_dir)
+
+
+def tags_by_name(exports):
+    """모든 연도 파일의 태그 이름 -> (ID, 슬러그) (연도마다 다르면 실패)"""
+    tags = {}
+    for data in exports.values():
+        data = data['db'][0]['data']
+        ids = {tag['id'] for tag in data['tags']}
+        assert {link['tag_id'] for link in data['posts_tags']} <= ids
+        for tag in data['tags']:
+            assert tags.setdefault(tag['name'], (tag['id'], tag['slug'])) == (tag['id'], tag['slug'])
+    return tags
+
+
+def test_tag_ids_and_slugs_are_unique_across_years(tmp_path):
+    exports = export(make_input(str(tmp_path / 'src')), str(tmp_path / 'out'), workers=2)
+    tags = tags_by_name(exports)
+    assert tags['Ghost'] == (1, 'ghost')
+    assert tags['tag 3'] == (2, 'tag-3')
+    # 슬러그를 만들 수 없는 태그의 슬러그(tag-<ID>)도 다른 태그의 슬러그와 겹치지 않음
+    assert tags['!!!'] == (3, 'tag-3-2')
+    # 연도 안의 파일 순서와 관계없이 먼저 등록된 태그가 앞 번호의 슬러그를 가짐
+    assert [slug for _, slug in sorted([tags['ghost'], tags['Ghost!']])] == ['ghost-2', 'ghost-3']
+    assert sorted(tag_id for tag_id, _ in tags.values()) == [1, 2, 3, 4, 5, 6]
+    assert tags['블로그'][1] == '블로그'
+
+
+def test_persisted_tags_keep_ids_when_years_are_exported_again(tmp_path):
+    input_dir = make_input(str(tmp_path / 'src'))
+    output_dir = str(tmp_path / 'out')
+    first = tags_by_name(export(input_dir, output_dir))
+    # 새 포스트에 슬러그가 겹치는 새 태그를 추가하고 다시 내보내도 기존 태그는 그대로
+    write_post(input_dir, '20160309', '1600009', '새포스트', tags=['GHOST', 'ghost', 'tag 3'], image_count=0)
+    second = tags_by_name(export(input_dir, output_dir))
+    assert {name: second[name] for name in first} == first
+    assert second['GHOST'] == (7, 'ghost-4')
+    # 태그 목록 파일을 다시 읽은 목록도 같은 ID와 슬러그
+    registry = h2g.TagRegistry.load(os.path.join(output_dir, h2g.TAG_REGISTRY_FILENAME))
+    assert {tag['name']: (tag['id'], tag['slug']) for tag in registry} == second
@@ -0,0 +1,24 @@
+"""워커 프로세스로 병렬 변환한 결과가 순차 변환과 같은지 확인"""
+import os
+
+import html_to_ghost as h2g
+from conftest import read_exports, synthetic_input
+
+
+def export(input_dir, output_dir, workers):
+    with h2g.Converter(output_dir, workers=workers) as converter:
+        converter.scan([input_dir])
+        converter.export_all()
+    return read_exports(output_dir)
+
+
+def test_parallel_export_matches_sequential(tmp_path):
+    input_dir = synthetic_input(str(tmp_path / 'src'))
+    sequential = export(input_dir, str(tmp_path / 'w1'), 1)
+    parallel = export(input_dir, str(tmp_path / 'w2'), 2)
+    assert sorted(sequential) == ['ghost-export-2016.json', 'ghost-export-2017.json']
+    # 포스트 순서, 태그 ID, 이미지 파일명까지 같아야 함
+    assert parallel == sequential
+    for year in ('2016', '2017'):
+        assert (sorted(os.listdir(tmp_path / 'w2' / 'images' / year))
+                == sorted(os.listdir(tmp_path / 'w1' / 'images' / year)))